@@ -3,7 +3,17 @@ from __future__ import absolute_import, unicode_literals
 import os
 
 from celery import Celery
+from celery.signals import (
+    task_postrun,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+)
 
+from battle_simulator.utils.db_session import (
+    dispose_db_engine,
+    remove_db_session,
+)
 
 # set the default Django settings module for the 'celery' program.
 os.environ.setdefault(
@@ -16,3 +26,22 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+# Fresh pool per forked worker, fresh session per task.
+worker_process_init.connect(dispose_db_engine)
+task_postrun.connect(remove_db_session)
+
+
+@worker_ready.connect
+def serve_metrics(**kwargs):
+    """Expose the worker's metrics once Django is set up."""
+    from battle_simulator.utils.metrics import start_metrics_server
+
+    start_metrics_server()
+
+
+@worker_process_shutdown.connect
+def forget_metrics(pid=None, **kwargs):
+    from battle_simulator.utils.metrics import mark_process_dead
+
+    mark_process_dead(pid)
@@ -15,7 +15,9 @@ import os
 from dotenv import load_dotenv
 from urllib import parse
 from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from battle_simulator.utils.db_pool import InstrumentedQueuePool
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -33,7 +35,9 @@ SECRET_KEY = (
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
 
-ALLOWED_HOSTS = ["battle-simulator.hariomdubey.me"]
+ALLOWED_HOSTS = os.getenv(
+    key="ALLOWED_HOSTS", default="battle-simulator.hariomdubey.me"
+).split(",")
 
 
 # Application definition
@@ -57,6 +61,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "battle_simulator.utils.profiling.RequestProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "battle_simulator.urls"
@@ -106,21 +111,74 @@ DATABASES = {
     }
 }
 
-DATABASE_URL = (
-    "mysql://"
-    + DB_USER
-    + ":"
-    + parse.quote_plus(DB_PASSWORD)
-    + "@"
-    + DB_HOST
-    + "/"
-    + DB_NAME
+# DATABASE_URL overrides the DB_* settings, e.g. sqlite:///bench.sqlite3
+# for the load benchmark (benchmarks/load_test.py).
+DATABASE_URL = os.getenv(
+    key="DATABASE_URL",
+    default=(
+        "mysql://"
+        + DB_USER
+        + ":"
+        + parse.quote_plus(DB_PASSWORD)
+        + "@"
+        + DB_HOST
+        + "/"
+        + DB_NAME
+    ),
+)
+if DATABASE_URL.startswith("sqlite"):
+    # Django itself only needs a connection for its contrib apps
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": DATABASE_URL.split(":///", 1)[-1] or ":memory:",
+        }
+    }
+
+# Connection pool, per process
+DB_POOL_SIZE = int(os.getenv(key="DB_POOL_SIZE", default="5"))
+DB_MAX_OVERFLOW = int(os.getenv(key="DB_MAX_OVERFLOW", default="10"))
+DB_POOL_TIMEOUT = float(os.getenv(key="DB_POOL_TIMEOUT", default="30"))
+# Recycling connections before MySQL's wait_timeout replaces the
+# pre-ping round-trip on every checkout; DB_POOL_PRE_PING turns it back on.
+DB_POOL_RECYCLE = int(os.getenv(key="DB_POOL_RECYCLE", default="1800"))
+DB_POOL_PRE_PING = (
+    os.getenv(key="DB_POOL_PRE_PING", default="False").lower() == "true"
 )
 
-ENGINE = create_engine(DATABASE_URL, pool_pre_ping=True, echo=False)
+ENGINE = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    # SQLite connections are handed between request threads by the pool
+    connect_args=(
+        {"check_same_thread": False}
+        if DATABASE_URL.startswith("sqlite")
+        else {}
+    ),
+    echo=False,
+)
+# Async driver URL of the same database, used by the async views
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+_scheme, _address = DATABASE_URL.split("://", 1)
+ASYNC_DATABASE_URL = os.getenv(
+    key="ASYNC_DATABASE_URL",
+    default=ASYNC_DRIVERS.get(_scheme.split("+")[0], _scheme)
+    + "://"
+    + _address,
+)
 METADATA = MetaData(bind=ENGINE)
 SAL_SESSION = sessionmaker(bind=ENGINE)
-DB_SESSION = SAL_SESSION()
+# One session per thread, i.e. per request or Celery task; removed when
+# the request or task ends (see battle_simulator/utils/db_session.py).
+DB_SESSION = scoped_session(SAL_SESSION)
 
 
 # Password validation
@@ -207,12 +265,191 @@ CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TASK_TRACK_STARTED = True
+# Run tasks inside the calling process, without a broker or worker
+CELERY_TASK_ALWAYS_EAGER = (
+    os.getenv(key="CELERY_TASK_ALWAYS_EAGER", default="False").lower()
+    == "true"
+)
 CELERY_TASK_ROUTES = {
     "pokemon.views.perform_battle_task": {
         "queue": "perform_battle_queue"
-    }
+    },
+    "pokemon.views.perform_battle_batch_task": {
+        "queue": "perform_battle_queue"
+    },
+    "pokemon.views.run_tournament_task": {"queue": "tournament_queue"},
 }
 
+# Serve the list, battle and battle status endpoints from native async
+# views (pokemon/async_views.py); needs the ASGI application.
+ASYNC_VIEWS = (
+    os.getenv(key="ASYNC_VIEWS", default="False").lower() == "true"
+)
+
+# Resolve POST /v1/pokemon/battle within the request instead of in a
+# Celery task; ?inline=true|false overrides it per request.
+BATTLE_INLINE_RESOLUTION = (
+    os.getenv(key="BATTLE_INLINE_RESOLUTION", default="False").lower()
+    == "true"
+)
+
+# Engine of battles that do not name one (see pokemon/engines.py)
+BATTLE_ENGINE = os.getenv(key="BATTLE_ENGINE", default="classic")
+
+# Seeded turn_based outcomes memoized in each process (not shared between
+# processes) by resolve_battle(), least recently used first out; 0
+# disables the cache. Classic outcomes are not cached: the precomputed
+# matchup table (MATCHUP_TABLE_PATH) already memoizes every pair.
+OUTCOME_CACHE_SIZE = int(
+    os.getenv(key="OUTCOME_CACHE_SIZE", default="100000")
+)
+
+# Battles played by POST /v1/pokemon/simulate
+SIMULATION_DEFAULT_TRIALS = int(
+    os.getenv(key="SIMULATION_DEFAULT_TRIALS", default="10000")
+)
+SIMULATION_MAX_TRIALS = int(
+    os.getenv(key="SIMULATION_MAX_TRIALS", default="100000")
+)
+
+# Limits of POST /v1/pokemon/battle/batch
+BATTLE_BATCH_MAX_SIZE = int(
+    os.getenv(key="BATTLE_BATCH_MAX_SIZE", default="10000")
+)
+BATTLE_BATCH_CHUNK_SIZE = int(
+    os.getenv(key="BATTLE_BATCH_CHUNK_SIZE", default="1000")
+)
+
+# TOURNAMENTS
+# Round robins are resolved TOURNAMENT_CHUNK_SIZE participants at a time
+# over TOURNAMENT_WORKERS processes; results are written
+# TOURNAMENT_INSERT_CHUNK_SIZE rows per statement.
+TOURNAMENT_WORKERS = int(
+    os.getenv(
+        key="TOURNAMENT_WORKERS", default=str(os.cpu_count() or 1)
+    )
+)
+TOURNAMENT_CHUNK_SIZE = int(
+    os.getenv(key="TOURNAMENT_CHUNK_SIZE", default="256")
+)
+TOURNAMENT_INSERT_CHUNK_SIZE = int(
+    os.getenv(key="TOURNAMENT_INSERT_CHUNK_SIZE", default="5000")
+)
+
+# METRICS
+# Port a Celery worker serves its Prometheus metrics on, 0 to disable;
+# gunicorn serves them at /metrics (see battle_simulator/utils/metrics.py).
+METRICS_WORKER_PORT = int(
+    os.getenv(key="METRICS_WORKER_PORT", default="0")
+)
+
+# PROFILING
+# Requests to PROFILING_VIEWS are profiled when they carry an
+# X-Profile-Token header equal to PROFILING_TOKEN (empty disables it), or
+# at random with probability PROFILING_SAMPLE_RATE. Profiles are kept in
+# Redis for PROFILING_TTL seconds (see battle_simulator/utils/profiling.py).
+PROFILING_TOKEN = os.getenv(key="PROFILING_TOKEN", default="")
+PROFILING_SAMPLE_RATE = float(
+    os.getenv(key="PROFILING_SAMPLE_RATE", default="0")
+)
+PROFILING_VIEWS = os.getenv(
+    key="PROFILING_VIEWS", default="PokemonAPIView,BattleAPIView"
+).split(",")
+PROFILING_TTL = int(os.getenv(key="PROFILING_TTL", default="86400"))
+PROFILING_TOP_FUNCTIONS = int(
+    os.getenv(key="PROFILING_TOP_FUNCTIONS", default="50")
+)
+
+# REDIS
+REDIS_URL = os.getenv(key="REDIS_URL", default=CELERY_BROKER_URL)
+REDIS_SOCKET_TIMEOUT = float(
+    os.getenv(key="REDIS_SOCKET_TIMEOUT", default="0.5")
+)
+
+# Seconds a battle status stays in Redis (pokemon/battle_cache.py)
+BATTLE_STATUS_CACHE_TTL = int(
+    os.getenv(key="BATTLE_STATUS_CACHE_TTL", default="3600")
+)
+
+# POST /v1/pokemon/battle with an Idempotency-Key header: the response is
+# replayed to retries for IDEMPOTENCY_KEY_TTL seconds, and the key stays
+# locked for at most IDEMPOTENCY_LOCK_TTL seconds while the first request
+# runs (pokemon/views.py, battle_simulator/utils/idempotency.py).
+IDEMPOTENCY_KEY_TTL = int(
+    os.getenv(key="IDEMPOTENCY_KEY_TTL", default="86400")
+)
+IDEMPOTENCY_LOCK_TTL = int(
+    os.getenv(key="IDEMPOTENCY_LOCK_TTL", default="30")
+)
+
+# Seconds a queued battle is joined, at most, by identical submissions
+# (same pairing, engine and seed) while it runs; it is released as soon
+# as it finishes.
+INFLIGHT_TTL = int(os.getenv(key="INFLIGHT_TTL", default="300"))
+
+# Seconds `manage.py rebuild_leaderboard` may take; a rebuild running
+# longer is abandoned and leaves the leaderboard as it was.
+LEADERBOARD_REBUILD_TTL = int(
+    os.getenv(key="LEADERBOARD_REBUILD_TTL", default="600")
+)
+
+# Battles read per server-side cursor fetch, and per chunk written, by
+# GET /v1/pokemon/battle/export and `manage.py export_battles`
+BATTLE_EXPORT_CHUNK_SIZE = int(
+    os.getenv(key="BATTLE_EXPORT_CHUNK_SIZE", default="1000")
+)
+
+# Cache-Control max-age of finished battles, which never change; clients
+# revalidating one get a 304 without a lookup.
+FINISHED_BATTLE_MAX_AGE = int(
+    os.getenv(key="FINISHED_BATTLE_MAX_AGE", default="31536000")
+)
+
+# GET /v1/pokemon/battle/<battle_id>/stream keeps a connection open for at
+# most BATTLE_STREAM_TIMEOUT seconds, sending a keepalive every
+# BATTLE_STREAM_KEEPALIVE seconds.
+BATTLE_STREAM_TIMEOUT = float(
+    os.getenv(key="BATTLE_STREAM_TIMEOUT", default="30")
+)
+BATTLE_STREAM_KEEPALIVE = float(
+    os.getenv(key="BATTLE_STREAM_KEEPALIVE", default="10")
+)
+
+# ROSTER
+# Every process keeps the pokemon table in memory (see pokemon/roster.py)
+# and reloads it when the version stored in Redis is bumped.
+ROSTER_VERSION_KEY = "pokemon:roster_version"
+ROSTER_VERSION_CHECK_INTERVAL = float(
+    os.getenv(key="ROSTER_VERSION_CHECK_INTERVAL", default="30")
+)
+
+# Serve GET /v1/pokemon/list from an in-memory snapshot of the roster
+POKEMON_LIST_SNAPSHOT = (
+    os.getenv(key="POKEMON_LIST_SNAPSHOT", default="False").lower()
+    == "true"
+)
+
+# Cache-Control max-age of GET /v1/pokemon/list; clients and CDNs then
+# revalidate with the roster version ETag (see
+# battle_simulator/utils/http_cache.py).
+POKEMON_LIST_MAX_AGE = int(
+    os.getenv(key="POKEMON_LIST_MAX_AGE", default="60")
+)
+
+# Precomputed outcome of every pair, built with `manage.py build_matchups`
+MATCHUP_TABLE_PATH = os.getenv(
+    key="MATCHUP_TABLE_PATH",
+    default=os.path.join(BASE_DIR, "matchups.npz"),
+)
+
+# Spell checker name index snapshot, built with `manage.py
+# build_name_index`; processes fall back to the roster's names without
+# a snapshot of the current roster version.
+NAME_INDEX_PATH = os.getenv(
+    key="NAME_INDEX_PATH",
+    default=os.path.join(BASE_DIR, "names.idx"),
+)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
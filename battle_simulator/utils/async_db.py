@@ -0,0 +1,32 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# Async connections belong to the event loop that opened them, so every
+# loop (one per ASGI worker) gets its own engine and pool.
+_engines = weakref.WeakKeyDictionary()
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the async engine of the running event loop."""
+    loop = asyncio.get_running_loop()
+
+    engine = _engines.get(loop)
+    if engine is None:
+        options = {"pool_recycle": settings.DB_POOL_RECYCLE}
+        if not settings.ASYNC_DATABASE_URL.startswith("sqlite"):
+            options.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+            )
+
+        engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL, echo=False, **options
+        )
+        _engines[loop] = engine
+
+    return engine
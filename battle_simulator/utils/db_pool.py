@@ -0,0 +1,67 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Process-wide counters of connection pool checkouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_wait_max_seconds = 0.0
+        self.checkout_timeouts = 0
+
+    def record_checkout(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_seconds += waited
+            if waited > self.checkout_wait_max_seconds:
+                self.checkout_wait_max_seconds = waited
+
+    def record_timeout(self):
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def snapshot(self, pool: QueuePool = None) -> dict:
+        """Counters so far, plus the current state of ``pool`` if given."""
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "checkout_wait_seconds": self.checkout_wait_seconds,
+                "checkout_wait_max_seconds": self.checkout_wait_max_seconds,
+                "checkout_timeouts": self.checkout_timeouts,
+            }
+
+        if pool is not None:
+            stats.update(
+                {
+                    "size": pool.size(),
+                    "checked_in": pool.checkedin(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                }
+            )
+
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+
+        pool_metrics.record_checkout(time.perf_counter() - started)
+        return connection
@@ -0,0 +1,17 @@
+from django.conf import settings
+
+
+def remove_db_session(**kwargs):
+    """
+    Close the calling thread's session and return its connection to the
+    pool. Connected to the end of every request and Celery task.
+    """
+    settings.DB_SESSION.remove()
+
+
+def dispose_db_engine(**kwargs):
+    """
+    Drop pooled connections inherited from the parent process, so forked
+    Celery workers never share a MySQL connection.
+    """
+    settings.ENGINE.dispose(close=False)
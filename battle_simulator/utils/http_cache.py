@@ -0,0 +1,82 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Callable, Optional
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+
+def etag_matches(request, etag: Optional[str]) -> bool:
+    """
+    Whether the request's If-None-Match lists ``etag``, compared weakly
+    as for GET. A bare ``*`` never matches: the views cannot tell that a
+    resource exists without the lookup the 304 is meant to skip.
+    """
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not etag or not header:
+        return False
+
+    opaque = etag.removeprefix("W/")
+    return any(
+        each.removeprefix("W/") == opaque
+        for each in parse_etags(header)
+    )
+
+
+def cache_headers(
+    response, etag: Optional[str] = None, **cache_control
+):
+    """Set the ETag (if any) and Cache-Control directives of a response."""
+    if etag:
+        response["ETag"] = etag
+    if cache_control:
+        patch_cache_control(response, **cache_control)
+    return response
+
+
+def not_modified(etag: str, **cache_control) -> HttpResponseNotModified:
+    """304 response repeating the ETag and Cache-Control of the 200."""
+    return cache_headers(
+        HttpResponseNotModified(), etag, **cache_control
+    )
+
+
+def conditional(etag_func: Callable, **cache_control):
+    """
+    Answer GETs whose If-None-Match lists the ETag computed by
+    ``etag_func(request, *args, **kwargs)`` with a 304, without running
+    the view; otherwise add that ETag and ``cache_control`` to the view's
+    200 responses. For async views ``etag_func`` is awaited.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                etag = await etag_func(request, *args, **kwargs)
+                if etag_matches(request, etag):
+                    return not_modified(etag, **cache_control)
+
+                response = await view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache_headers(response, etag, **cache_control)
+                return response
+
+        else:
+
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                etag = etag_func(request, *args, **kwargs)
+                if etag_matches(request, etag):
+                    return not_modified(etag, **cache_control)
+
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache_headers(response, etag, **cache_control)
+                return response
+
+        return wrapper
+
+    return decorator
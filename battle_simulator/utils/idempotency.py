@@ -0,0 +1,316 @@
+import hashlib
+import json
+import logging
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from battle_simulator.utils import custom_exceptions as ce
+from battle_simulator.utils.redis_client import (
+    get_async_redis,
+    get_redis,
+)
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+IDEMPOTENCY_KEY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def idempotency_key(request) -> Optional[str]:
+    """The request's Idempotency-Key header, None when absent."""
+    key = request.META.get(IDEMPOTENCY_KEY_HEADER)
+    if not key:
+        return None
+
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ce.ValidationFailed(
+            {
+                "message": "Idempotency-Key must be at most "
+                f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            }
+        )
+    return key
+
+
+def idempotency_cache_key(scope: str, key: str) -> str:
+    return f"idempotency:{scope}:{key}"
+
+
+def request_fingerprint(request) -> str:
+    """Hash of the method, path, query string and body of a request."""
+    digest = hashlib.sha256()
+    for part in (
+        request.method,
+        request.path,
+        request.META.get("QUERY_STRING", ""),
+    ):
+        digest.update(part.encode())
+        digest.update(b"\n")
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def response_content(response) -> str:
+    """The JSON body of a DRF Response (not rendered yet) or JsonResponse."""
+    if hasattr(response, "data"):
+        return json.dumps(
+            response.data,
+            cls=JSONEncoder,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+    return response.content.decode()
+
+
+def claimed(record: str, fingerprint: str):
+    """
+    What to do with a request whose key is already held by ``record``:
+    replay the stored response, or refuse a different request reusing
+    the key, or one that is still in flight.
+    """
+    record = json.loads(record)
+
+    if record["fingerprint"] != fingerprint:
+        raise ce.DuplicateKey(
+            {
+                "message": "Idempotency-Key was already used with a "
+                "different request"
+            }
+        )
+
+    if record["status"] is None:
+        raise ce.DuplicateKey(
+            {
+                "message": "A request with this Idempotency-Key is "
+                "still in progress"
+            }
+        )
+
+    response = HttpResponse(
+        record["content"],
+        status=record["status"],
+        content_type="application/json",
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def pending_record(fingerprint: str) -> str:
+    return json.dumps({"fingerprint": fingerprint, "status": None})
+
+
+def completed_record(fingerprint: str, response) -> str:
+    return json.dumps(
+        {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "content": response_content(response),
+        }
+    )
+
+
+def release_idempotency_key(cache_key: str):
+    try:
+        get_redis().delete(cache_key)
+    except Exception as e:
+        logger.error(f"RELEASE IDEMPOTENCY KEY: {e}")
+
+
+async def arelease_idempotency_key(cache_key: str):
+    try:
+        await get_async_redis().delete(cache_key)
+    except Exception as e:
+        logger.error(f"ARELEASE IDEMPOTENCY KEY: {e}")
+
+
+def idempotent(scope: str):
+    """
+    Make a POST view idempotent under its Idempotency-Key header.
+
+    The first request with a key claims it in Redis (SET NX) for
+    IDEMPOTENCY_LOCK_TTL seconds and runs the view; a successful
+    response is then kept for IDEMPOTENCY_KEY_TTL seconds and replayed
+    to every retry of the same request, without running the view again.
+    A request reusing the key with a different method, path, query or
+    body, or arriving while the first is in flight, is answered 409.
+    Failed requests (exceptions, 4xx and 5xx) release the key so they
+    can be retried. Requests without the header, or made while Redis is
+    down, run as usual.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                key = idempotency_key(request)
+                if not key:
+                    return await view(request, *args, **kwargs)
+
+                cache_key = idempotency_cache_key(scope, key)
+                fingerprint = request_fingerprint(request)
+                client = get_async_redis()
+                try:
+                    if not await client.set(
+                        cache_key,
+                        pending_record(fingerprint),
+                        nx=True,
+                        ex=settings.IDEMPOTENCY_LOCK_TTL,
+                    ):
+                        record = await client.get(cache_key)
+                        if record:
+                            return claimed(record, fingerprint)
+                except ce.DuplicateKey:
+                    raise
+                except Exception as e:
+                    logger.error(f"IDEMPOTENT - {scope} : {e}")
+                    return await view(request, *args, **kwargs)
+
+                try:
+                    response = await view(request, *args, **kwargs)
+                except Exception:
+                    await arelease_idempotency_key(cache_key)
+                    raise
+
+                if response.status_code >= 400:
+                    await arelease_idempotency_key(cache_key)
+                    return response
+
+                try:
+                    await client.set(
+                        cache_key,
+                        completed_record(fingerprint, response),
+                        ex=settings.IDEMPOTENCY_KEY_TTL,
+                    )
+                except Exception as e:
+                    logger.error(f"IDEMPOTENT - {scope} : {e}")
+                return response
+
+        else:
+
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                key = idempotency_key(request)
+                if not key:
+                    return view(request, *args, **kwargs)
+
+                cache_key = idempotency_cache_key(scope, key)
+                fingerprint = request_fingerprint(request)
+                client = get_redis()
+                try:
+                    if not client.set(
+                        cache_key,
+                        pending_record(fingerprint),
+                        nx=True,
+                        ex=settings.IDEMPOTENCY_LOCK_TTL,
+                    ):
+                        record = client.get(cache_key)
+                        if record:
+                            return claimed(record, fingerprint)
+                except ce.DuplicateKey:
+                    raise
+                except Exception as e:
+                    logger.error(f"IDEMPOTENT - {scope} : {e}")
+                    return view(request, *args, **kwargs)
+
+                try:
+                    response = view(request, *args, **kwargs)
+                except Exception:
+                    release_idempotency_key(cache_key)
+                    raise
+
+                if response.status_code >= 400:
+                    release_idempotency_key(cache_key)
+                    return response
+
+                try:
+                    client.set(
+                        cache_key,
+                        completed_record(fingerprint, response),
+                        ex=settings.IDEMPOTENCY_KEY_TTL,
+                    )
+                except Exception as e:
+                    logger.error(f"IDEMPOTENT - {scope} : {e}")
+                return response
+
+        return wrapper
+
+    return decorator
+
+
+# Deletes an in-flight key only while it still names the same work, so
+# a late leave never drops the work that replaced it
+LEAVE_INFLIGHT_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def inflight_cache_key(scope: str, key: str) -> str:
+    return f"inflight:{scope}:{key}"
+
+
+def join_inflight(scope: str, key: str, value: str) -> Optional[str]:
+    """
+    Register ``value`` (e.g. a battle ID) as the work in flight for
+    ``key`` for at most INFLIGHT_TTL seconds, unless identical work is
+    already in flight: the value of that work is then returned, for the
+    caller to join it instead of starting it again. None when Redis is
+    down, so the work starts as usual.
+    """
+    cache_key = inflight_cache_key(scope, key)
+    try:
+        client = get_redis()
+        if client.set(
+            cache_key, value, nx=True, ex=settings.INFLIGHT_TTL
+        ):
+            return None
+        return client.get(cache_key)
+    except Exception as e:
+        logger.error(f"JOIN INFLIGHT - {scope} : {e}")
+        return None
+
+
+async def ajoin_inflight(
+    scope: str, key: str, value: str
+) -> Optional[str]:
+    """join_inflight() with the asyncio Redis client."""
+    cache_key = inflight_cache_key(scope, key)
+    try:
+        client = get_async_redis()
+        if await client.set(
+            cache_key, value, nx=True, ex=settings.INFLIGHT_TTL
+        ):
+            return None
+        return await client.get(cache_key)
+    except Exception as e:
+        logger.error(f"AJOIN INFLIGHT - {scope} : {e}")
+        return None
+
+
+def leave_inflight(scope: str, key: str, value: str):
+    """End the work ``value`` registered with join_inflight()."""
+    try:
+        get_redis().register_script(LEAVE_INFLIGHT_SCRIPT)(
+            keys=[inflight_cache_key(scope, key)], args=[value]
+        )
+    except Exception as e:
+        logger.error(f"LEAVE INFLIGHT - {scope} : {e}")
+
+
+async def aleave_inflight(scope: str, key: str, value: str):
+    """leave_inflight() with the asyncio Redis client."""
+    try:
+        await get_async_redis().register_script(LEAVE_INFLIGHT_SCRIPT)(
+            keys=[inflight_cache_key(scope, key)], args=[value]
+        )
+    except Exception as e:
+        logger.error(f"ALEAVE INFLIGHT - {scope} : {e}")
@@ -0,0 +1,181 @@
+import os
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+)
+
+from battle_simulator.utils.db_pool import pool_metrics
+
+# Request stages take milliseconds; battles may sit in the queue for
+# seconds behind a busy worker.
+STAGE_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+)
+QUEUE_WAIT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    300,
+)
+
+stage_seconds = Histogram(
+    "battle_simulator_stage_seconds",
+    "Time spent in each stage of a request or task.",
+    ["operation", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+queue_wait_seconds = Histogram(
+    "battle_simulator_queue_wait_seconds",
+    "Time from enqueueing a Celery task to a worker starting it.",
+    ["task"],
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+
+
+def stage(operation: str, name: str):
+    """Context manager observing the duration of one stage of ``operation``."""
+    return stage_seconds.labels(operation, name).time()
+
+
+def observe_queue_wait(task: str, enqueued_at: Optional[float]):
+    """Record the wait of a task enqueued at ``enqueued_at`` (time.time())."""
+    if enqueued_at is None:
+        return
+
+    try:
+        queue_wait_seconds.labels(task).observe(
+            max(time.time() - float(enqueued_at), 0)
+        )
+    except (TypeError, ValueError):
+        pass
+
+
+class ProcessStatsCollector:
+    """
+    Outcome cache and connection pool counters of the process serving the
+    scrape, read at collection time.
+    """
+
+    def describe(self):
+        # Nothing to describe up front: reading the counters needs Django
+        # settings, which may not be set up when the collector registers.
+        return []
+
+    def collect(self):
+        from pokemon.outcome_cache import outcome_cache
+
+        cache = outcome_cache.snapshot()
+        for name in ("hits", "misses", "evictions"):
+            yield CounterMetricFamily(
+                f"battle_simulator_outcome_cache_{name}",
+                f"Outcome cache {name} of this process.",
+                value=cache[name],
+            )
+        yield GaugeMetricFamily(
+            "battle_simulator_outcome_cache_size",
+            "Outcomes held in this process' cache.",
+            value=cache["size"],
+        )
+
+        pool = pool_metrics.snapshot(settings.ENGINE.pool)
+        yield CounterMetricFamily(
+            "battle_simulator_db_pool_checkouts",
+            "Connections checked out of this process' pool.",
+            value=pool["checkouts"],
+        )
+        yield CounterMetricFamily(
+            "battle_simulator_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled connection.",
+            value=pool["checkout_wait_seconds"],
+        )
+        yield CounterMetricFamily(
+            "battle_simulator_db_pool_checkout_timeouts",
+            "Checkouts that gave up after DB_POOL_TIMEOUT.",
+            value=pool["checkout_timeouts"],
+        )
+        for name in ("checked_in", "checked_out", "overflow"):
+            yield GaugeMetricFamily(
+                f"battle_simulator_db_pool_{name}",
+                f"Connections {name.replace('_', ' ')} of this process' pool.",
+                value=pool[name],
+            )
+
+
+process_stats_collector = ProcessStatsCollector()
+REGISTRY.register(process_stats_collector)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    Registry to expose: with PROMETHEUS_MULTIPROC_DIR set, histograms are
+    aggregated over every gunicorn and Celery process sharing the
+    directory; otherwise this process' default registry.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(process_stats_collector)
+    return registry
+
+
+def metrics_view(request):
+    """
+    Method: GET
+    Exposes the metrics in the Prometheus text format.
+    """
+    return HttpResponse(
+        generate_latest(metrics_registry()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
+
+
+def mark_process_dead(pid: Optional[int] = None, **kwargs):
+    """Drop the live-gauge files of an exited process (multiprocess mode)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def start_metrics_server(**kwargs):
+    """Serve the metrics of a Celery worker on METRICS_WORKER_PORT."""
+    if settings.METRICS_WORKER_PORT:
+        start_http_server(
+            settings.METRICS_WORKER_PORT, registry=metrics_registry()
+        )
@@ -0,0 +1,27 @@
+import base64
+import json
+
+from battle_simulator.utils import custom_exceptions as ce
+
+
+def encode_cursor(key: list) -> str:
+    """Encode a sort key as an opaque, URL-safe cursor."""
+    payload = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor made by encode_cursor(), an empty cursor is []."""
+    if not cursor:
+        return []
+
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise ce.ValidationFailed({"message": "Invalid cursor"})
+
+    if not isinstance(key, list):
+        raise ce.ValidationFailed({"message": "Invalid cursor"})
+
+    return key
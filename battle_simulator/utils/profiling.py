@@ -0,0 +1,227 @@
+import base64
+import contextvars
+import cProfile
+import json
+import logging
+import marshal
+import pstats
+import random
+import secrets
+import time
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from sqlalchemy import event
+
+from battle_simulator.utils.redis_client import get_redis
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Slowest statements kept per profile
+SLOW_STATEMENTS = 10
+
+# SQL statistics of the request being profiled in this context, if any
+_sql_stats = contextvars.ContextVar("profiling_sql_stats", default=None)
+
+
+def profile_key(request_id: str) -> str:
+    return f"profile:{request_id}"
+
+
+class SQLStats:
+    """Count and duration of the SQL statements of one profiled request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.slowest.append((seconds, statement))
+        if len(self.slowest) > SLOW_STATEMENTS:
+            self.slowest.sort(reverse=True)
+            del self.slowest[SLOW_STATEMENTS:]
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "seconds": self.seconds,
+            "slowest": [
+                {"seconds": seconds, "statement": statement}
+                for seconds, statement in sorted(
+                    self.slowest, reverse=True
+                )
+            ],
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, *args):
+    if _sql_stats.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(
+            time.perf_counter()
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, *args):
+    stats = _sql_stats.get()
+    started = conn.info.get("profiling_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+def listen_for_queries(engine):
+    """Time the statements of profiled requests on ``engine``."""
+    if not event.contains(
+        engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(
+            engine, "before_cursor_execute", _before_cursor_execute
+        )
+        event.listen(
+            engine, "after_cursor_execute", _after_cursor_execute
+        )
+
+
+def profile_summary(stats: dict, top: int) -> list:
+    """The ``top`` functions of pstats data by cumulative time."""
+    rows = sorted(
+        stats.items(), key=lambda item: item[1][3], reverse=True
+    )[:top]
+
+    return [
+        {
+            "function": pstats.func_std_string(function),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_seconds": total_seconds,
+            "cumulative_seconds": cumulative_seconds,
+        }
+        for function, (
+            primitive_calls,
+            calls,
+            total_seconds,
+            cumulative_seconds,
+            _,
+        ) in rows
+    ]
+
+
+def save_profile(request_id: str, profile: dict):
+    """Store a profile for PROFILING_TTL seconds."""
+    try:
+        get_redis().set(
+            profile_key(request_id),
+            json.dumps(profile),
+            ex=settings.PROFILING_TTL,
+        )
+    except Exception as e:
+        logger.error(f"SAVE PROFILE: {e}")
+
+
+def fetch_profile(request_id: str) -> Optional[dict]:
+    """Return a stored profile, None if unknown, expired or unavailable."""
+    try:
+        value = get_redis().get(profile_key(request_id))
+    except Exception as e:
+        logger.error(f"FETCH PROFILE: {e}")
+        return None
+
+    return json.loads(value) if value else None
+
+
+def has_profile_token(request) -> bool:
+    """Whether the request carries the configured PROFILING_TOKEN."""
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    return bool(
+        token
+        and settings.PROFILING_TOKEN
+        and secrets.compare_digest(token, settings.PROFILING_TOKEN)
+    )
+
+
+class RequestProfilingMiddleware(MiddlewareMixin):
+    """
+    Profile single requests to PROFILING_VIEWS with cProfile.
+
+    A request is profiled when it carries an X-Profile-Token header equal
+    to PROFILING_TOKEN, or at random with probability
+    PROFILING_SAMPLE_RATE. The view (and rendering of its response) then
+    runs under the profiler while the statements it sends to
+    settings.ENGINE are counted and timed; the result is stored in Redis
+    under a new request id, returned in the X-Profile-Id header. Other
+    requests only pay for a header lookup and, when sampling, one random
+    number.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        listen_for_queries(settings.ENGINE)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not has_profile_token(request) and not (
+            settings.PROFILING_SAMPLE_RATE
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return None
+
+        view = getattr(view_func, "view_class", None)
+        if (
+            view is None
+            or view.__name__ not in settings.PROFILING_VIEWS
+        ):
+            return None
+
+        return self.profile(
+            request, view, view_func, view_args, view_kwargs
+        )
+
+    def profile(self, request, view, view_func, view_args, view_kwargs):
+        request_id = uuid.uuid4().hex
+        sql_stats = SQLStats()
+        profiler = cProfile.Profile()
+
+        token = _sql_stats.set(sql_stats)
+        started = time.perf_counter()
+        try:
+            response = profiler.runcall(
+                view_func, request, *view_args, **view_kwargs
+            )
+            # DRF responses are serialized on render()
+            if callable(getattr(response, "render", None)):
+                response = profiler.runcall(response.render)
+        finally:
+            elapsed = time.perf_counter() - started
+            _sql_stats.reset(token)
+
+        # Takes the data out of the profiler
+        stats = pstats.Stats(profiler).stats
+        save_profile(
+            request_id,
+            {
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": view.__name__,
+                "status": response.status_code,
+                "started_at": time.time() - elapsed,
+                "seconds": elapsed,
+                "sql": sql_stats.as_dict(),
+                "functions": profile_summary(
+                    stats, settings.PROFILING_TOP_FUNCTIONS
+                ),
+                "pstats": base64.b64encode(
+                    marshal.dumps(stats)
+                ).decode(),
+            },
+        )
+
+        response[PROFILE_ID_HEADER] = request_id
+        return response
@@ -0,0 +1,43 @@
+import asyncio
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client built from settings.REDIS_URL."""
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+
+    return _client
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Return the asyncio Redis client of the running event loop."""
+    loop = asyncio.get_running_loop()
+
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+        _async_clients[loop] = client
+
+    return client
@@ -0,0 +1,19 @@
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    A time-ordered UUID (version 7, RFC 9562): 48 bits of Unix time in
+    milliseconds, then 74 random bits. IDs made later sort after earlier
+    ones, so they are appended to a B-tree index instead of scattered.
+    """
+    timestamp = time.time_ns() // 1_000_000
+    random_bits = int.from_bytes(os.urandom(10), "big")
+
+    value = (timestamp & 0xFFFF_FFFF_FFFF) << 80 | random_bits
+    # Version 7 and the RFC 4122 variant over the random bits
+    value = (value & ~(0xF << 76)) | 0x7 << 76
+    value = (value & ~(0x3 << 62)) | 0x2 << 62
+    return uuid.UUID(int=value)
@@ -0,0 +1,56 @@
+"""
+Synthetic Pokemon rows shared by the benchmarks.
+
+Rows carry every column the simulator reads, with the value ranges of
+the real table, so benchmarks run without the production dataset.
+"""
+
+import random
+
+from benchmarks.spell_checker import generate_names
+from pokemon.roster import AGAINST_TYPES
+
+TYPE_MULTIPLIERS = [0, 0.25, 0.5, 1, 1, 1, 1, 2, 4]
+
+
+def synthetic_pokemon(size, seed=7):
+    """``size`` rows of the pokemon table, the same for the same seed."""
+    rng = random.Random(seed)
+    names = [name.title() for name in generate_names(size, rng)]
+
+    rows = []
+    for number, name in enumerate(names, start=1):
+        type1 = rng.choice(AGAINST_TYPES)
+        type2 = (
+            rng.choice(AGAINST_TYPES) if rng.random() < 0.5 else None
+        )
+        row = {
+            "name": name,
+            "pokedex_number": number,
+            "type1": type1,
+            "type2": type2 if type2 != type1 else None,
+            "attack": rng.randint(5, 185),
+            "defense": rng.randint(5, 230),
+            "hp": rng.randint(1, 255),
+            "sp_attack": rng.randint(10, 194),
+            "sp_defense": rng.randint(20, 230),
+            "speed": rng.randint(5, 180),
+            "generation": rng.randint(1, 7),
+            "is_legendary": int(rng.random() < 0.09),
+        }
+        row["base_total"] = sum(
+            row[column]
+            for column in (
+                "attack",
+                "defense",
+                "hp",
+                "sp_attack",
+                "sp_defense",
+                "speed",
+            )
+        )
+        for each in AGAINST_TYPES:
+            row[f"against_{each}"] = rng.choice(TYPE_MULTIPLIERS)
+        rows.append(row)
+
+    return rows
@@ -0,0 +1,421 @@
+"""
+Load test the Pokemon list and battle endpoints over HTTP.
+
+Boots the Django app in-process on a threaded WSGI server, backed by a
+SQLite file (or the database in --database-url) seeded with synthetic
+Pokemon, with Celery tasks run eagerly so no broker or worker is needed.
+Redis is used when reachable at REDIS_URL; without it the caches fall
+back to the database. Each scenario is then driven at the given
+concurrency and its throughput and latency percentiles are written as
+JSON.
+
+    python -m benchmarks.load_test --concurrency 16 --requests 2000
+    python -m benchmarks.load_test --output after.json --baseline before.json
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --no-seed
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = ("list", "battle_post", "battle_get")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--database-url",
+        help="SQLAlchemy URL to seed and serve from "
+        "(default: a new SQLite file).",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="Drive an already running server instead of booting one.",
+    )
+    parser.add_argument(
+        "--no-seed",
+        action="store_true",
+        help="Use the tables and rows already in the database.",
+    )
+    parser.add_argument("--pokemon", type=int, default=800)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="Per scenario."
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=50, help="Per scenario."
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Comma-separated subset of {', '.join(SCENARIOS)}.",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--output", help="Write the report to this file."
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Report to compare with; exits with 1 on a regression.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative drop in throughput or rise in p95 "
+        "(default: 0.2).",
+    )
+    return parser.parse_args()
+
+
+def configure(args):
+    """Point the settings at the stand-in services, then set up Django."""
+    if not args.database_url:
+        args.database_url = "sqlite:///" + os.path.join(
+            tempfile.mkdtemp(prefix="battle_simulator_bench_"),
+            "bench.sqlite3",
+        )
+
+    os.environ["DATABASE_URL"] = args.database_url
+    if args.database_url.startswith("sqlite"):
+        # Battle ids are passed as uuid.UUID, which MySQLdb quotes itself
+        sqlite3.register_adapter(uuid.UUID, str)
+    os.environ["ALLOWED_HOSTS"] = "127.0.0.1,localhost"
+    os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "True")
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "battle_simulator.settings"
+    )
+
+    import django
+
+    django.setup()
+
+
+def create_tables(engine):
+    """Create the tables, from sql/*.sql on MySQL and the models elsewhere."""
+    from sqlalchemy import text
+
+    from pokemon.models import Base
+
+    if engine.dialect.name == "mysql":
+        with engine.begin() as connection:
+            for name in ("pokemon", "battle", "tournament"):
+                sql = (
+                    (BASE_DIR / "sql" / f"{name}.sql")
+                    .read_text()
+                    .replace(
+                        "CREATE TABLE `", "CREATE TABLE IF NOT EXISTS `"
+                    )
+                )
+                for statement in sql.split(";"):
+                    if "CREATE TABLE" in statement:
+                        connection.execute(text(statement))
+        return
+
+    # MySQL-only defaults (uuid(), ON UPDATE) have no SQLite equivalent
+    # and case-insensitive names need NOCASE.
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            default = column.server_default
+            if default is not None and (
+                "uuid()" in str(default.arg)
+                or "ON UPDATE" in str(default.arg)
+            ):
+                column.server_default = None
+            if column.name in ("name", "pokemon_a", "pokemon_b"):
+                column.type.collation = "NOCASE"
+
+    Base.metadata.create_all(engine)
+
+
+def seed_database(args):
+    from django.conf import settings
+    from sqlalchemy import delete, insert
+
+    from benchmarks.fixtures import synthetic_pokemon
+    from pokemon.models import Battle, Pokemon
+
+    engine = settings.ENGINE
+    create_tables(engine)
+
+    with engine.begin() as connection:
+        connection.execute(delete(Battle))
+        connection.execute(delete(Pokemon))
+        connection.execute(
+            insert(Pokemon), synthetic_pokemon(args.pokemon, args.seed)
+        )
+
+
+def fetch_names(limit):
+    from django.conf import settings
+
+    from pokemon.models import Pokemon
+
+    session = settings.SAL_SESSION()
+    try:
+        return [
+            row.name
+            for row in session.query(Pokemon.name).limit(limit).all()
+        ]
+    finally:
+        session.close()
+
+
+def start_server():
+    """Serve the WSGI app on a free local port from a daemon thread."""
+    from django.core.servers.basehttp import (
+        ThreadedWSGIServer,
+        WSGIRequestHandler,
+    )
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class Client(threading.local):
+    """One keep-alive connection per thread."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        headers = {"Content-Type": "application/json"} if body else {}
+        payload = json.dumps(body) if body is not None else None
+
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=30
+                )
+            try:
+                self.connection.request(
+                    method, path, body=payload, headers=headers
+                )
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # The server closed the connection; retry once on a new one
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+def make_requests(scenario, count, names, battle_ids, rng):
+    if scenario == "list":
+        return [
+            (
+                "GET",
+                f"/v1/pokemon/list?page={rng.randint(1, 20)}&limit=10",
+            )
+            for _ in range(count)
+        ]
+    if scenario == "battle_post":
+        return [
+            (
+                "POST",
+                "/v1/pokemon/battle",
+                {
+                    "pokemon_a": rng.choice(names),
+                    "pokemon_b": rng.choice(names),
+                },
+            )
+            for _ in range(count)
+        ]
+    return [
+        ("GET", f"/v1/pokemon/battle/{rng.choice(battle_ids)}")
+        for _ in range(count)
+    ]
+
+
+def run_scenario(client, requests, concurrency):
+    """Send requests from ``concurrency`` threads, timing each one."""
+
+    def send(request):
+        started = time.perf_counter()
+        try:
+            status, body = client.request(*request)
+        except Exception:
+            status, body = None, b""
+        return time.perf_counter() - started, status, body
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests))
+    elapsed = time.perf_counter() - started
+
+    return results, elapsed
+
+
+def summarize(results, elapsed):
+    latencies = np.array([each[0] for each in results]) * 1000
+    errors = sum(
+        1 for _, status, _ in results if status is None or status >= 400
+    )
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": len(results) / elapsed,
+        "latency_ms": {
+            "mean": float(latencies.mean()),
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "max": float(latencies.max()),
+        },
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Regressions of ``report`` against ``baseline``, as messages."""
+    regressions = []
+    for scenario, result in report["results"].items():
+        before = baseline.get("results", {}).get(scenario)
+        if not before:
+            continue
+
+        if result["throughput_rps"] < before["throughput_rps"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{scenario}: throughput {result['throughput_rps']:.1f} "
+                f"< {before['throughput_rps']:.1f} rps"
+            )
+        if result["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{scenario}: p95 {result['latency_ms']['p95']:.1f} "
+                f"> {before['latency_ms']['p95']:.1f} ms"
+            )
+    return regressions
+
+
+def main():
+    args = parse_args()
+    scenarios = [each for each in args.scenarios.split(",") if each]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(
+            f"Unknown scenarios: {', '.join(sorted(unknown))}"
+        )
+
+    configure(args)
+
+    if not args.no_seed:
+        seed_database(args)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_server()
+
+    client = Client(base_url)
+    rng = random.Random(args.seed)
+    names = fetch_names(1000)
+    if not names:
+        raise SystemExit("No Pokemon in the database; drop --no-seed.")
+
+    # Battles for battle_get, also warming the roster and matchup table
+    battle_ids = []
+    for _ in range(max(args.warmup, 1)):
+        status, body = client.request(
+            *make_requests("battle_post", 1, names, battle_ids, rng)[0]
+        )
+        if status and status < 400:
+            battle_ids.append(json.loads(body)["battle_id"])
+    if not battle_ids:
+        raise SystemExit(
+            f"POST /v1/pokemon/battle failed: {status} {body}"
+        )
+
+    report = {
+        "config": {
+            "base_url": args.base_url,
+            "database": args.database_url.split(":")[0],
+            "pokemon": args.pokemon if not args.no_seed else None,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "celery_eager": os.environ["CELERY_TASK_ALWAYS_EAGER"],
+            "python": sys.version.split()[0],
+        },
+        "results": {},
+    }
+
+    print(
+        f"{'scenario':<12}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'errors':>8}"
+    )
+    for scenario in scenarios:
+        run_scenario(
+            client,
+            make_requests(
+                scenario, args.warmup, names, battle_ids, rng
+            ),
+            args.concurrency,
+        )
+        results, elapsed = run_scenario(
+            client,
+            make_requests(
+                scenario, args.requests, names, battle_ids, rng
+            ),
+            args.concurrency,
+        )
+        result = summarize(results, elapsed)
+        report["results"][scenario] = result
+
+        print(
+            f"{scenario:<12}{result['throughput_rps']:>10.1f}"
+            f"{result['latency_ms']['p50']:>10.2f}"
+            f"{result['latency_ms']['p95']:>10.2f}"
+            f"{result['latency_ms']['p99']:>10.2f}"
+            f"{result['errors']:>8}"
+        )
+
+    if server:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        for each in regressions:
+            print(f"REGRESSION {each}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
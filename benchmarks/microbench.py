@@ -0,0 +1,326 @@
+"""
+Micro-benchmark the hot functions against synthetic rosters.
+
+Every case is timed at each roster size (800, 10k and 100k Pokemon by
+default) so scaling shows up next to absolute costs. Rows are seeded into
+a SQLite file (or the database in --database-url); each case runs in
+rounds of calibrated iterations and reports per-call min, median, mean
+and standard deviation. --save-baseline stores the report, and
+--baseline compares the medians with a stored one and exits with 1 when
+a case is slower by more than --threshold.
+
+    python -m benchmarks.microbench --save-baseline baseline.json
+    python -m benchmarks.microbench --baseline baseline.json --threshold 0.25
+    python -m benchmarks.microbench --sizes 800 --cases spell_check_typo
+"""
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from argparse import Namespace
+
+import numpy as np
+
+from benchmarks.load_test import configure, create_tables
+
+SIZES = (800, 10_000, 100_000)
+
+CASES = (
+    "spell_check_hit",
+    "spell_check_typo",
+    "spell_check_miss",
+    "battle_resolve",
+    "battle_damage",
+    "battle_pair_margins",
+    "query_pokemon_page",
+    "query_pokemon_name",
+    "result_list_to_dict_page",
+    "result_list_to_dict_all",
+)
+
+# Pairs resolved per call of battle_pair_margins
+PAIR_BATCH = 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(each) for each in SIZES),
+        help="Comma-separated roster sizes.",
+    )
+    parser.add_argument(
+        "--cases",
+        default=",".join(CASES),
+        help=f"Comma-separated subset of {', '.join(CASES)}.",
+    )
+    parser.add_argument(
+        "--database-url",
+        help="SQLAlchemy URL to seed and query "
+        "(default: a new SQLite file).",
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=7, help="Timed rounds per case."
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.05,
+        help="Minimum seconds per round (default: 0.05).",
+    )
+    parser.add_argument(
+        "--max-matrix",
+        type=int,
+        default=5000,
+        help="Largest roster to build the N x N matchup table for "
+        "(default: 5000).",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--save-baseline", help="Write the report to this file."
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Report to compare with; exits with 1 on a regression.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative rise of a median (default: 0.25).",
+    )
+    return parser.parse_args()
+
+
+def measure(func, rounds, min_time):
+    """
+    Time ``func`` in ``rounds`` rounds of as many calls as fit in
+    ``min_time``, after one warm-up call.
+
+    Returns:
+    dict: Per-call seconds (min, median, mean, stddev), rounds and iterations.
+    """
+    func()
+
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        iterations *= (
+            max(2, min(10, int(min_time / elapsed) + 1))
+            if elapsed
+            else 10
+        )
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - started) / iterations)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stddev": statistics.stdev(timings) if rounds > 1 else 0.0,
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def seed_roster(rows):
+    """Replace the pokemon table with ``rows`` and load it as a Roster."""
+    from django.conf import settings
+    from sqlalchemy import delete, insert
+
+    from pokemon.models import Battle, Pokemon
+    from pokemon.roster import load_roster
+
+    with settings.ENGINE.begin() as connection:
+        connection.execute(delete(Battle))
+        connection.execute(delete(Pokemon))
+        connection.execute(insert(Pokemon), rows)
+
+    return load_roster(version=str(len(rows)))
+
+
+def make_cases(size, args, rng):
+    """Build every case for a roster of ``size``: name -> callable or None."""
+    from battle_simulator.utils import custom_exceptions as ce
+    from battle_simulator.utils.data_formatter import (
+        result_list_to_dict,
+    )
+    from benchmarks.fixtures import synthetic_pokemon
+    from benchmarks.spell_checker import make_queries
+    from pokemon.matchups import build_matchup_table, pair_margins
+    from pokemon.spell_checker import PokemonSpellChecker
+    from pokemon.views import pokemon_list_query, query_pokemon, session
+
+    rows = synthetic_pokemon(size, args.seed)
+    roster = seed_roster(rows)
+    names = [row["name"] for row in rows]
+
+    checker = PokemonSpellChecker(names=names)
+    queries = make_queries([name.lower() for name in names], 1000, rng)
+
+    def check_spelling(words):
+        words = itertools.cycle(words)
+
+        def call():
+            try:
+                checker.check_spelling(next(words))
+            except ce.InvalidPokemon:
+                pass
+
+        return call
+
+    pairs = [
+        (rng.randrange(size), rng.randrange(size)) for _ in range(1000)
+    ]
+    name_pairs = itertools.cycle(
+        [(names[a], names[b]) for a, b in pairs]
+    )
+    index_pairs = itertools.cycle(pairs)
+    batch_a = np.array(
+        [rng.randrange(size) for _ in range(PAIR_BATCH)], dtype=np.intp
+    )
+    batch_b = np.array(
+        [rng.randrange(size) for _ in range(PAIR_BATCH)], dtype=np.intp
+    )
+
+    table = (
+        build_matchup_table(roster) if size <= args.max_matrix else None
+    )
+
+    pages = itertools.cycle(
+        [rng.randrange(max(size // 10, 1)) for _ in range(100)]
+    )
+    fragments = itertools.cycle(
+        [name[: rng.randint(3, 5)] for name in rng.sample(names, 100)]
+    )
+
+    page_rows = pokemon_list_query().limit(10).all()
+    all_rows = pokemon_list_query().all()
+    session.commit()
+
+    return {
+        "spell_check_hit": check_spelling(queries["hit"]),
+        "spell_check_typo": check_spelling(queries["typo"]),
+        "spell_check_miss": check_spelling(queries["miss"]),
+        "battle_resolve": (
+            (lambda: table.resolve(*next(name_pairs)))
+            if table is not None
+            else None
+        ),
+        "battle_damage": lambda: roster.damage(*next(index_pairs)),
+        "battle_pair_margins": lambda: pair_margins(
+            roster, batch_a, batch_b
+        ),
+        "query_pokemon_page": lambda: query_pokemon(
+            limit=10, offset=next(pages) * 10
+        ),
+        "query_pokemon_name": lambda: query_pokemon(
+            name=next(fragments), limit=10, offset=0
+        ),
+        "result_list_to_dict_page": lambda: result_list_to_dict(
+            page_rows
+        ),
+        "result_list_to_dict_all": lambda: result_list_to_dict(
+            all_rows
+        ),
+    }
+
+
+def compare(report, baseline, threshold):
+    """Regressions of ``report`` against ``baseline``, as messages."""
+    regressions = []
+    for key, result in report["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before or not result or not before.get("median"):
+            continue
+
+        if result["median"] > before["median"] * (1 + threshold):
+            regressions.append(
+                f"{key}: median {result['median'] * 1e6:.1f} us "
+                f"> {before['median'] * 1e6:.1f} us "
+                f"({result['median'] / before['median'] - 1:+.0%})"
+            )
+    return regressions
+
+
+def main():
+    args = parse_args()
+    sizes = [int(each) for each in args.sizes.split(",") if each]
+    cases = [each for each in args.cases.split(",") if each]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+    configure(Namespace(database_url=args.database_url))
+
+    from django.conf import settings
+
+    create_tables(settings.ENGINE)
+
+    report = {
+        "config": {
+            "sizes": sizes,
+            "rounds": args.rounds,
+            "min_time": args.min_time,
+            "database": settings.ENGINE.dialect.name,
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+        },
+        "results": {},
+    }
+
+    print(
+        f"{'case':<36}{'median us':>12}{'min us':>12}{'stddev us':>12}"
+        f"{'iterations':>12}"
+    )
+    for size in sizes:
+        rng = random.Random(args.seed)
+        functions = make_cases(size, args, rng)
+
+        for case in cases:
+            key = f"{case}[{size}]"
+            func = functions[case]
+            if func is None:
+                report["results"][key] = None
+                print(f"{key:<36}{'skipped':>12}")
+                continue
+
+            result = measure(func, args.rounds, args.min_time)
+            report["results"][key] = result
+
+            print(
+                f"{key:<36}{result['median'] * 1e6:>12.2f}"
+                f"{result['min'] * 1e6:>12.2f}"
+                f"{result['stddev'] * 1e6:>12.2f}"
+                f"{result['iterations']:>12}"
+            )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.threshold)
+        for each in regressions:
+            print(f"REGRESSION {each}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
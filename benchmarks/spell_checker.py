@@ -0,0 +1,173 @@
+"""
+Compare the indexed spell checker with the previous linear difflib scan.
+
+Runs without a database: names are generated (or read from a file with
+one name per line) and every query is checked to give the same answer
+with both implementations.
+
+    python -m benchmarks.spell_checker --size 800 --queries 2000
+    python -m benchmarks.spell_checker --names names.txt
+"""
+
+import argparse
+import difflib
+import random
+import string
+import time
+
+from pokemon.name_index import NameIndex
+
+SYLLABLES = [
+    "bul",
+    "ba",
+    "saur",
+    "char",
+    "man",
+    "der",
+    "squir",
+    "tle",
+    "pi",
+    "ka",
+    "chu",
+    "rai",
+    "mew",
+    "two",
+    "ek",
+    "ans",
+    "lec",
+    "trike",
+    "ho",
+    "oh",
+    "ta",
+    "pu",
+    "bu",
+    "lu",
+    "gar",
+    "dos",
+    "zu",
+    "bat",
+    "ly",
+    "ra",
+    "ger",
+    "on",
+    "ix",
+    "gen",
+    "gar",
+    "ee",
+    "vee",
+    "snor",
+    "lax",
+    "dra",
+    "go",
+    "nite",
+]
+
+
+def generate_names(size, rng):
+    names = set()
+    while len(names) < size:
+        name = "".join(
+            rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))
+        )
+        if rng.random() < 0.05:
+            name += rng.choice([" x", "-oh", " jr"])
+        names.add(name)
+    return sorted(names)
+
+
+def make_typo(name, rng):
+    position = rng.randrange(len(name))
+    edit = rng.choice(["replace", "delete", "insert", "swap"])
+    letter = rng.choice(string.ascii_lowercase)
+    if edit == "replace":
+        return name[:position] + letter + name[position + 1 :]
+    if edit == "delete" and len(name) > 1:
+        return name[:position] + name[position + 1 :]
+    if edit == "swap" and position < len(name) - 1:
+        return (
+            name[:position]
+            + name[position + 1]
+            + name[position]
+            + name[position + 2 :]
+        )
+    return name[:position] + letter + name[position:]
+
+
+def make_queries(names, count, rng):
+    queries = {"hit": [], "typo": [], "miss": []}
+    for _ in range(count):
+        name = rng.choice(names)
+        queries["hit"].append(name)
+        queries["typo"].append(make_typo(name, rng))
+        queries["miss"].append(
+            "".join(
+                rng.choice(string.ascii_lowercase)
+                for _ in range(rng.randint(4, 12))
+            )
+        )
+    return queries
+
+
+def difflib_match(word, names):
+    """The spell checker's lookup before the index was introduced."""
+    close_matches = difflib.get_close_matches(
+        word, names, n=1, cutoff=0.8
+    )
+    return close_matches[0] if close_matches else None
+
+
+def run(match, queries):
+    started = time.perf_counter()
+    results = [match(each) for each in queries]
+    elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size", type=int, default=800)
+    parser.add_argument("--names", help="File with one name per line.")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.names:
+        with open(args.names) as fh:
+            names = sorted(
+                {line.strip().lower() for line in fh if line.strip()}
+            )
+    else:
+        names = generate_names(args.size, rng)
+
+    started = time.perf_counter()
+    index = NameIndex(names, cutoff=0.8)
+    build = time.perf_counter() - started
+
+    print(f"{len(names)} names, index built in {build * 1000:.1f} ms")
+    print(
+        f"{'queries':<8}{'difflib us/op':>16}{'index us/op':>16}"
+        f"{'speedup':>10}"
+    )
+
+    queries = make_queries(names, args.queries, rng)
+    mismatches = 0
+    for kind, words in queries.items():
+        expected, linear = run(
+            lambda word: difflib_match(word, names), words
+        )
+        actual, indexed = run(index.match, words)
+        mismatches += sum(a != b for a, b in zip(expected, actual))
+        print(
+            f"{kind:<8}{linear / len(words) * 1e6:>16.1f}"
+            f"{indexed / len(words) * 1e6:>16.1f}"
+            f"{linear / indexed:>9.1f}x"
+        )
+
+    print(f"mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
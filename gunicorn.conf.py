@@ -0,0 +1,6 @@
+from battle_simulator.utils.metrics import mark_process_dead
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared metrics directory
+    mark_process_dead(worker.pid)
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
 
 
 class PokemonConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'pokemon'
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "pokemon"
+
+    def ready(self):
+        from battle_simulator.utils.db_session import remove_db_session
+
+        # Give every request's SQLAlchemy session back when it ends
+        request_finished.connect(
+            remove_db_session, dispatch_uid="remove_db_session"
+        )
@@ -0,0 +1,664 @@
+import json
+import logging
+import time
+import uuid
+from functools import wraps
+from typing import List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException
+from rest_framework.utils.encoders import JSONEncoder
+from sqlalchemy import insert, select
+
+from battle_simulator.utils import custom_exceptions as ce
+from battle_simulator.utils.async_db import get_async_engine
+from battle_simulator.utils.http_cache import (
+    conditional,
+    etag_matches,
+    not_modified,
+)
+from battle_simulator.utils.idempotency import (
+    aleave_inflight,
+    ajoin_inflight,
+    idempotent,
+)
+from battle_simulator.utils.db_session import remove_db_session
+from battle_simulator.utils.data_formatter import (
+    result_list_to_dict,
+    result_row_to_dict,
+)
+from battle_simulator.utils.metrics import stage
+from battle_simulator.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+)
+from battle_simulator.utils.uuid7 import uuid7
+from pokemon.battle_cache import (
+    acache_battle_status,
+    aget_cached_battle_status,
+)
+from pokemon.exports import (
+    EXPORT_FORMATS,
+    aiter_battle_export,
+    parse_export_params,
+)
+from pokemon.leaderboard import arecord_battle_results
+from pokemon.list_snapshot import (
+    PokemonListSnapshot,
+    dump,
+    get_list_snapshot,
+    json_object,
+    list_snapshot_is_fresh,
+)
+from pokemon.models import Battle, Pokemon
+from pokemon.roster import Roster, get_roster, roster_is_fresh
+from pokemon.spell_checker import get_spell_checker
+from pokemon.views import (
+    battle_cache_headers,
+    battle_etag,
+    finished_battle_cache_control,
+    format_battle_status,
+    inflight_battle_key,
+    list_etag,
+    load_list_snapshot,
+    perform_battle_task,
+    pokemon_list_after,
+    pokemon_list_query,
+    resolve_battle,
+    validate_engine,
+)
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+
+def api_response(data: dict, status: int = 200) -> JsonResponse:
+    """Render ``data`` the way DRF's JSONRenderer does."""
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=JSONEncoder,
+        json_dumps_params={
+            "separators": (",", ":"),
+            "ensure_ascii": False,
+        },
+    )
+
+
+def api_view(name: str):
+    """
+    Log errors of an async view and answer them like
+    custom_exception_handler: ce.* exceptions with their status and
+    message, anything else as an InternalServerError.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                return await view(request, *args, **kwargs)
+            except APIException as e:
+                logger.error(f"{name} : {e}")
+                error = e
+            except Exception as e:
+                logger.error(f"{name} : {e}")
+                error = ce.InternalServerError()
+
+            detail = error.detail
+            if isinstance(detail, dict):
+                detail = detail.get("message", detail)
+
+            return api_response(
+                {"message": detail, "data": None},
+                status=error.status_code,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def releasing_db_session(func):
+    """
+    Wrap ``func`` to remove the calling thread's DB session when it
+    returns. request_finished removes the session of another thread.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            remove_db_session()
+
+    return wrapper
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable in a worker thread."""
+    return await sync_to_async(
+        releasing_db_session(func), thread_sensitive=False
+    )(*args, **kwargs)
+
+
+def check_spelling(*names: str) -> List[str]:
+    """check_spelling() of every name, in order."""
+    spell_checker = get_spell_checker()
+    return [spell_checker.check_spelling(name) for name in names]
+
+
+async def aget_roster() -> Roster:
+    """
+    get_roster(), moved off the event loop only when it has to check the
+    roster version in Redis or reload the roster.
+    """
+    if roster_is_fresh():
+        return get_roster()
+    return await run_blocking(get_roster)
+
+
+async def aget_list_snapshot() -> PokemonListSnapshot:
+    """get_list_snapshot(), off the event loop when it may do I/O."""
+    if list_snapshot_is_fresh():
+        return get_list_snapshot(load_list_snapshot)
+    return await run_blocking(get_list_snapshot, load_list_snapshot)
+
+
+async def apokemon_list_etag(request) -> Optional[str]:
+    """pokemon_list_etag() without blocking the event loop."""
+    try:
+        return list_etag((await aget_roster()).version)
+    except Exception as e:
+        logger.error(f"APOKEMON LIST ETAG: {e}")
+        return None
+
+
+async def aquery_pokemon(
+    name: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Optional[List[dict]]:
+    """
+    query_pokemon() over the async engine.
+
+    Returns:
+    Optional[List[dict]]: A list of Pokemon matching the query or None if no Pokemon are found.
+    """
+    try:
+        query = pokemon_list_query(name)
+
+        if offset is not None and limit is not None:
+            query = query.limit(limit).offset(offset)
+
+        async with get_async_engine().connect() as connection:
+            rows = (await connection.execute(query.statement)).all()
+
+        pokemon = result_list_to_dict(rows) if rows else None
+
+    except Exception as e:
+        logger.error(f"AQUERY POKEMON: {e}")
+        pokemon = None
+
+    return pokemon
+
+
+async def aquery_pokemon_after(
+    name: Optional[str] = None,
+    limit: int = 10,
+    after: Optional[list] = None,
+) -> Tuple[Optional[List[dict]], Optional[list]]:
+    """
+    query_pokemon_after() over the async engine.
+
+    Returns:
+    Tuple[Optional[List[dict]], Optional[list]]: The page of Pokemon (None if empty) and the sort key of its last row if more rows follow.
+    """
+    try:
+        query = pokemon_list_query(name).add_columns(
+            Pokemon.is_legendary
+        )
+
+        if after:
+            query = query.filter(pokemon_list_after(after))
+
+        async with get_async_engine().connect() as connection:
+            rows = (
+                await connection.execute(
+                    query.limit(limit + 1).statement
+                )
+            ).all()
+
+        next_key = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_key = [last.is_legendary, last.attack, last.name]
+
+        pokemon = result_list_to_dict(rows[:limit]) or None
+        for each in pokemon or []:
+            del each["is_legendary"]
+
+    except Exception as e:
+        logger.error(f"AQUERY POKEMON AFTER: {e}")
+        pokemon, next_key = None, None
+
+    return pokemon, next_key
+
+
+async def afetch_battle_by_id(battle_id) -> Optional[dict]:
+    """
+    fetch_battle_by_id() over the async engine.
+
+    Returns:
+    Optional[dict]: A dictionary containing battle details if a matching record is found; otherwise, None.
+    """
+    try:
+        async with get_async_engine().connect() as connection:
+            row = (
+                await connection.execute(
+                    select(
+                        Battle.battle_id,
+                        Battle.pokemon_a,
+                        Battle.pokemon_b,
+                        Battle.status,
+                        Battle.winner_name,
+                        Battle.won_by_margin,
+                    ).where(Battle.battle_id == str(battle_id))
+                )
+            ).first()
+
+        battle_details = result_row_to_dict(row) if row else None
+
+    except Exception as e:
+        logger.error(f"AFETCH BATTLE BY ID: {e}")
+        battle_details = None
+
+    return battle_details
+
+
+async def ainsert_battle(
+    battle_id: uuid.UUID,
+    pokemon_a: str,
+    pokemon_b: str,
+    status: str,
+    winner_name: Optional[str] = None,
+    won_by_margin: Optional[float] = None,
+) -> bool:
+    """
+    insert_battle() over the async engine and Redis client.
+
+    Returns:
+    bool: Whether the battle was inserted.
+    """
+    try:
+        async with get_async_engine().begin() as connection:
+            await connection.execute(
+                insert(Battle).values(
+                    battle_id=str(battle_id),
+                    pokemon_a=pokemon_a,
+                    pokemon_b=pokemon_b,
+                    status=status,
+                    winner_name=winner_name,
+                    won_by_margin=won_by_margin,
+                )
+            )
+
+    except Exception as e:
+        logger.error(f"AINSERT BATTLE: {e}")
+        return False
+
+    await acache_battle_status(
+        battle_id,
+        status=status,
+        winner_name=winner_name,
+        won_by_margin=won_by_margin,
+    )
+    await arecord_battle_results(
+        [
+            {
+                "battle_id": battle_id,
+                "pokemon_a": pokemon_a,
+                "pokemon_b": pokemon_b,
+                "status": status,
+                "winner_name": winner_name,
+                "won_by_margin": won_by_margin,
+            }
+        ]
+    )
+
+    return True
+
+
+async def aget_battle_status(battle_id) -> Optional[dict]:
+    """
+    get_battle_status() over the async engine and Redis client.
+
+    Returns:
+    Optional[dict]: The battle status and results, or None if the battle isn't found.
+    """
+    battle = await aget_cached_battle_status(battle_id)
+
+    if not battle:
+        battle = await afetch_battle_by_id(battle_id)
+
+        if not battle:
+            return None
+
+        await acache_battle_status(
+            battle_id,
+            status=battle["status"],
+            winner_name=battle["winner_name"],
+            won_by_margin=battle["won_by_margin"],
+            only_if_missing=True,
+        )
+
+    return format_battle_status(battle)
+
+
+@require_GET
+@conditional(
+    apokemon_list_etag,
+    public=True,
+    max_age=settings.POKEMON_LIST_MAX_AGE,
+)
+@api_view("POKEMON ASYNC VIEW - GET")
+async def pokemon_list(request):
+    """
+    Method: GET
+    Async PokemonAPIView.get: a paginated list of Pokemon.
+    -------
+    Query Parameters:
+    name (str): Name of the Pokemon (optional).
+    page (int): Page number for pagination (optional).
+    limit (int): Limit of items per page (optional).
+    cursor (str): Opaque cursor for keyset pagination, empty for the first page (optional).
+
+    Returns:
+    json: A list of Pokemon.
+    """
+    limit = int(request.GET.get("limit", 10))
+    pokemon_name = request.GET.get("name")
+
+    # Keyset pagination when a cursor (even an empty one) is given
+    if "cursor" in request.GET:
+        after = decode_cursor(request.GET["cursor"])
+        if after and len(after) != 3:
+            raise ce.ValidationFailed({"message": "Invalid cursor"})
+
+        if settings.POKEMON_LIST_SNAPSHOT:
+            snapshot = await aget_list_snapshot()
+            snapshot_page = snapshot.after(pokemon_name, after, limit)
+
+            # Cursors from an older roster fall through to SQL
+            if snapshot_page is not None:
+                positions, has_next = snapshot_page
+                next_cursor = (
+                    encode_cursor(snapshot.keys[positions[-1]])
+                    if has_next and positions
+                    else None
+                )
+                return HttpResponse(
+                    json_object(
+                        next_cursor=dump(next_cursor),
+                        has_next=dump(has_next),
+                        data=snapshot.render(positions),
+                    ),
+                    content_type="application/json",
+                )
+
+        pokemon, next_key = await aquery_pokemon_after(
+            name=pokemon_name, limit=limit, after=after
+        )
+
+        return api_response(
+            {
+                "next_cursor": (
+                    encode_cursor(next_key) if next_key else None
+                ),
+                "has_next": True if next_key else False,
+                "data": pokemon,
+            }
+        )
+
+    # Handling pagination
+    page = int(request.GET.get("page", 1))
+    offset = (page - 1) * limit
+
+    if settings.POKEMON_LIST_SNAPSHOT:
+        snapshot = await aget_list_snapshot()
+        positions, has_next = snapshot.page(pokemon_name, offset, limit)
+
+        return HttpResponse(
+            json_object(
+                page=dump(page),
+                has_next=dump(has_next),
+                has_prev=dump(page != 1),
+                data=snapshot.render(positions),
+            ),
+            content_type="application/json",
+        )
+
+    pokemon = await aquery_pokemon(
+        name=pokemon_name, limit=limit + 1, offset=offset
+    )
+
+    return api_response(
+        {
+            "page": page,
+            "has_next": (
+                True if pokemon and len(pokemon) > limit else False
+            ),
+            "has_prev": False if page == 1 else True,
+            "data": (pokemon[:limit] if pokemon else None),
+        }
+    )
+
+
+@csrf_exempt
+@require_POST
+@api_view("BATTLE ASYNC VIEW - POST")
+@idempotent("battle")
+async def create_battle(request):
+    """
+    Method: POST
+    Async BattleAPIView.post: initiates a new battle between two Pokemon.
+    -------
+    Headers:
+    Idempotency-Key (str): Retries with the same key get the first response back (optional).
+    -------
+    Query Parameters:
+    inline (bool): Resolve the battle within the request (optional, defaults to BATTLE_INLINE_RESOLUTION).
+    -------
+    Request Data:
+    - pokemon_a (str): Name of Pokemon A.
+    - pokemon_b (str): Name of Pokemon B.
+    - engine (str): Battle engine, classic or turn_based (optional, defaults to BATTLE_ENGINE).
+    - seed (int): Seed of the engine's random numbers (optional).
+
+    Returns:
+    json: UUID battle ID to track the battle status, along with the result when resolved inline.
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        raise ce.ValidationFailed({"message": "Invalid JSON body"})
+
+    if not isinstance(data, dict):
+        raise ce.ValidationFailed({"message": "Invalid JSON body"})
+
+    pokemon_a = data.get("pokemon_a")
+    pokemon_b = data.get("pokemon_b")
+
+    # Validate input Pokemon names
+    if not pokemon_a or not pokemon_b:
+        raise ce.ValidationFailed(
+            {"message": "Both pokemon_a and pokemon_b are required"}
+        )
+
+    engine, seed = validate_engine(data)
+
+    with stage("battle_post", "spell_check"):
+        # Checking the roster version, and rebuilding the checker when
+        # it changed, may hit Redis, the DB or a snapshot
+        pokemon_a, pokemon_b = await run_blocking(
+            check_spelling, pokemon_a, pokemon_b
+        )
+
+    with stage("battle_post", "db_fetch"):
+        roster = await aget_roster()
+        known = (
+            roster.lookup(pokemon_a) is not None
+            and roster.lookup(pokemon_b) is not None
+        )
+    if not known:
+        raise ce.NotFound({"message": "One or both Pokemon not found"})
+
+    battle_id = uuid7()
+
+    inline = request.GET.get("inline")
+    inline = (
+        settings.BATTLE_INLINE_RESOLUTION
+        if inline is None
+        else inline.lower() in ("1", "true")
+    )
+    if inline:
+        # Resolve now and store the finished battle in one insert
+        try:
+            with stage("battle_post", "compute"):
+                outcome = await run_blocking(
+                    resolve_battle,
+                    pokemon_a,
+                    pokemon_b,
+                    engine=engine,
+                    seed=seed,
+                )
+        except ValueError as e:
+            logger.error(f"BATTLE ASYNC VIEW - POST : {e}")
+            outcome = {
+                "status": "BATTLE_FAILED",
+                "winner_name": None,
+                "won_by_margin": None,
+            }
+
+        with stage("battle_post", "insert_battle"):
+            inserted = await ainsert_battle(
+                battle_id=battle_id,
+                pokemon_a=pokemon_a,
+                pokemon_b=pokemon_b,
+                **outcome,
+            )
+        if not inserted:
+            raise ce.InternalServerError
+
+        return api_response(
+            {
+                "battle_id": battle_id,
+                "data": format_battle_status(outcome),
+            }
+        )
+
+    # Join the identical battle already queued, if any
+    inflight = inflight_battle_key(pokemon_a, pokemon_b, engine, seed)
+    if inflight:
+        with stage("battle_post", "join_inflight"):
+            joined = await ajoin_inflight(
+                "battle", inflight, str(battle_id)
+            )
+        if joined:
+            return api_response({"battle_id": joined}, status=202)
+
+    with stage("battle_post", "insert_battle"):
+        await ainsert_battle(
+            battle_id=battle_id,
+            pokemon_a=pokemon_a,
+            pokemon_b=pokemon_b,
+            status="BATTLE_INPROGRESS",
+        )
+
+    # Initiate battle in the background; Celery publishes synchronously
+    with stage("battle_post", "enqueue"):
+        battle = await run_blocking(
+            perform_battle_task.apply_async,
+            kwargs={
+                "battle_id": battle_id,
+                "pokemon_a": pokemon_a,
+                "pokemon_b": pokemon_b,
+                "engine": engine,
+                "seed": seed,
+                "enqueued_at": time.time(),
+            },
+        )
+
+    if not battle:
+        if inflight:
+            await aleave_inflight("battle", inflight, str(battle_id))
+        return api_response(
+            {"message": "Failed to create Battle"}, status=400
+        )
+
+    return api_response({"battle_id": battle_id}, status=202)
+
+
+@require_GET
+@api_view("BATTLE ASYNC VIEW - GET")
+async def battle_status(request, battle_id):
+    """
+    Method: GET
+    Async BattleAPIView.get: the status of a battle by its battle ID.
+    -------
+    Query Parameters:
+    battle_id (UUID): Unique identifier of the battle.
+
+    Returns:
+    json: Status of the battle (BATTLE_INPROGRESS, BATTLE_COMPLETED, BATTLE_FAILED).
+    """
+    # Finished battles never change: revalidations skip the lookup
+    etag = battle_etag(battle_id)
+    if etag_matches(request, etag):
+        return not_modified(etag, **finished_battle_cache_control())
+
+    battle = await aget_battle_status(battle_id)
+
+    if not battle:
+        raise ce.NotFound({"message": "Battle not found"})
+
+    return battle_cache_headers(
+        api_response({"data": battle}), battle_id, battle
+    )
+
+
+@require_GET
+@api_view("BATTLE EXPORT ASYNC VIEW - GET")
+async def battle_export(request):
+    """
+    Method: GET
+    Async BattleExportAPIView.get: streams the battles, oldest first, as NDJSON or CSV.
+    -------
+    Query Parameters:
+    format (str): ndjson or csv (optional, defaults to ndjson).
+    status (str): Only battles with this status (optional).
+    created_from (str): Only battles created at or after this ISO 8601 date or datetime (optional).
+    created_to (str): Only battles created before this ISO 8601 date or datetime (optional).
+
+    Returns:
+    stream: One JSON object or CSV record per battle, read from the database in chunks.
+    """
+    params = parse_export_params(request.GET)
+    export_format = params["export_format"]
+
+    # An async iterator: Django buffers sync ones whole under ASGI
+    response = StreamingHttpResponse(
+        aiter_battle_export(**params),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="battles.{export_format}"'
+    )
+    return response
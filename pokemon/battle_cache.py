@@ -0,0 +1,149 @@
+import json
+import logging
+from typing import List, Optional
+
+from django.conf import settings
+
+from battle_simulator.utils.redis_client import (
+    get_async_redis,
+    get_redis,
+)
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+
+def battle_status_key(battle_id) -> str:
+    return f"battle:status:{battle_id}"
+
+
+def battle_events_channel(battle_id) -> str:
+    return f"battle:events:{battle_id}"
+
+
+def _battle_status_value(
+    status: Optional[str],
+    winner_name: Optional[str] = None,
+    won_by_margin: Optional[float] = None,
+) -> str:
+    return json.dumps(
+        {
+            "status": status,
+            "winner_name": winner_name,
+            "won_by_margin": won_by_margin,
+        }
+    )
+
+
+def cache_battle_status(
+    battle_id,
+    status: Optional[str],
+    winner_name: Optional[str] = None,
+    won_by_margin: Optional[float] = None,
+    only_if_missing: bool = False,
+):
+    """
+    Store the status of a battle for BATTLE_STATUS_CACHE_TTL seconds.
+
+    Writes after a DB commit overwrite the entry, and a finished status is
+    also published on the battle's events channel for streaming clients.
+    Read-through fills pass only_if_missing so a value read from the
+    database can never replace a newer one written by a worker in the
+    meantime.
+    """
+    value = _battle_status_value(status, winner_name, won_by_margin)
+
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        pipeline.set(
+            battle_status_key(battle_id),
+            value,
+            ex=settings.BATTLE_STATUS_CACHE_TTL,
+            nx=only_if_missing,
+        )
+        if not only_if_missing and status != "BATTLE_INPROGRESS":
+            pipeline.publish(battle_events_channel(battle_id), value)
+        pipeline.execute()
+    except Exception as e:
+        logger.error(f"CACHE BATTLE STATUS: {e}")
+
+
+def cache_battle_statuses(battles: List[dict]):
+    """cache_battle_status() for many battles in one pipeline."""
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        for each in battles:
+            value = _battle_status_value(
+                each.get("status"),
+                each.get("winner_name"),
+                each.get("won_by_margin"),
+            )
+            pipeline.set(
+                battle_status_key(each["battle_id"]),
+                value,
+                ex=settings.BATTLE_STATUS_CACHE_TTL,
+            )
+            if each.get("status") != "BATTLE_INPROGRESS":
+                pipeline.publish(
+                    battle_events_channel(each["battle_id"]), value
+                )
+        pipeline.execute()
+    except Exception as e:
+        logger.error(f"CACHE BATTLE STATUSES: {e}")
+
+
+def invalidate_battle_status(battle_id):
+    """Drop a cached status so the next read goes to the database."""
+    try:
+        get_redis().delete(battle_status_key(battle_id))
+    except Exception as e:
+        logger.error(f"INVALIDATE BATTLE STATUS: {e}")
+
+
+def get_cached_battle_status(battle_id) -> Optional[dict]:
+    """Return the cached status, winner_name and won_by_margin, if any."""
+    try:
+        value = get_redis().get(battle_status_key(battle_id))
+    except Exception as e:
+        logger.error(f"GET CACHED BATTLE STATUS: {e}")
+        return None
+
+    return json.loads(value) if value else None
+
+
+async def acache_battle_status(
+    battle_id,
+    status: Optional[str],
+    winner_name: Optional[str] = None,
+    won_by_margin: Optional[float] = None,
+    only_if_missing: bool = False,
+):
+    """cache_battle_status() with the asyncio Redis client."""
+    value = _battle_status_value(status, winner_name, won_by_margin)
+
+    try:
+        pipeline = get_async_redis().pipeline(transaction=False)
+        pipeline.set(
+            battle_status_key(battle_id),
+            value,
+            ex=settings.BATTLE_STATUS_CACHE_TTL,
+            nx=only_if_missing,
+        )
+        if not only_if_missing and status != "BATTLE_INPROGRESS":
+            pipeline.publish(battle_events_channel(battle_id), value)
+        await pipeline.execute()
+    except Exception as e:
+        logger.error(f"ACACHE BATTLE STATUS: {e}")
+
+
+async def aget_cached_battle_status(battle_id) -> Optional[dict]:
+    """get_cached_battle_status() with the asyncio Redis client."""
+    try:
+        value = await get_async_redis().get(
+            battle_status_key(battle_id)
+        )
+    except Exception as e:
+        logger.error(f"AGET CACHED BATTLE STATUS: {e}")
+        return None
+
+    return json.loads(value) if value else None
@@ -0,0 +1,243 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+from pokemon.matchups import pair_margins
+from pokemon.roster import NO_TYPE, Roster
+
+
+class BattleEngine(ABC):
+    """
+    Rules deciding the outcome of a battle.
+
+    ``margins()`` plays ``trials`` independent battles for every pair of
+    roster rows and returns an array of shape (pairs, trials) following
+    MatchupTable.margins: positive when ``a`` wins, negative when ``b``
+    wins, zero on a draw and NaN for pairs with incomplete stats.
+    """
+
+    name = None
+
+    @abstractmethod
+    def margins(
+        self,
+        roster: Roster,
+        pokemon_a: np.ndarray,
+        pokemon_b: np.ndarray,
+        trials: int = 1,
+        rng: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ClassicEngine(BattleEngine):
+    """
+    The original rules: attack against the type multipliers of the
+    defender, without randomness, so every trial has the same outcome.
+    """
+
+    name = "classic"
+
+    def margins(self, roster, pokemon_a, pokemon_b, trials=1, rng=None):
+        return np.repeat(
+            pair_margins(roster, pokemon_a, pokemon_b)[:, np.newaxis],
+            trials,
+            axis=1,
+        )
+
+
+class TurnBasedEngine(BattleEngine):
+    """
+    Turn-based rules using hp, attack, defense, sp_attack, sp_defense and
+    speed.
+
+    Both Pokemon fight at LEVEL with the HP of that level. Every turn the
+    faster one (a coin flip on equal speed) strikes first, and the other
+    strikes back if it is still standing. A strike uses whichever of
+    attack/defense and sp_attack/sp_defense hits harder, with one of the
+    attacker's types (at random when it has two) against the defender's
+    multiplier for it, a random roll of 85-100% and a chance of a
+    critical hit. The margin is the HP the winner has left; if nobody
+    faints within MAX_TURNS the one with more HP left wins.
+
+    Every trial of every pair is played at once, one turn at a time.
+    """
+
+    name = "turn_based"
+
+    LEVEL = 50
+    POWER = 60
+    CRITICAL_CHANCE = 1 / 16
+    CRITICAL_MULTIPLIER = 1.5
+    MAX_TURNS = 100
+
+    def max_hp(self, roster: Roster, rows: np.ndarray) -> np.ndarray:
+        return 2 * roster.hp[rows] * self.LEVEL / 100 + self.LEVEL + 10
+
+    def base_damage(
+        self,
+        roster: Roster,
+        attackers: np.ndarray,
+        defenders: np.ndarray,
+    ) -> np.ndarray:
+        """Damage of a strike before type, roll and critical hit."""
+        ratio = np.maximum(
+            roster.attack[attackers] / roster.defense[defenders],
+            roster.sp_attack[attackers] / roster.sp_defense[defenders],
+        )
+        return (2 * self.LEVEL / 5 + 2) * self.POWER * ratio / 50 + 2
+
+    def strike(
+        self,
+        roster: Roster,
+        against: np.ndarray,
+        attackers: np.ndarray,
+        defenders: np.ndarray,
+        base: np.ndarray,
+        rng: np.random.Generator,
+        shape: tuple,
+    ) -> np.ndarray:
+        """Damage of one strike in every trial, shape (pairs, trials)."""
+        type1 = roster.type1_idx[attackers]
+        type2 = roster.type2_idx[attackers]
+        use_type2 = (type2 != NO_TYPE)[:, np.newaxis] & (
+            rng.random(shape) < 0.5
+        )
+        effectiveness = np.where(
+            use_type2,
+            against[defenders, type2][:, np.newaxis],
+            against[defenders, type1][:, np.newaxis],
+        )
+        critical = np.where(
+            rng.random(shape) < self.CRITICAL_CHANCE,
+            self.CRITICAL_MULTIPLIER,
+            1.0,
+        )
+        roll = rng.uniform(0.85, 1.0, shape)
+
+        return base[:, np.newaxis] * effectiveness * critical * roll
+
+    def margins(self, roster, pokemon_a, pokemon_b, trials=1, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        shape = (len(pokemon_a), trials)
+
+        # NO_TYPE (-1) selects the trailing column of 1s
+        against = np.hstack(
+            [
+                roster.against,
+                np.ones((len(roster), 1), dtype=np.float64),
+            ]
+        )
+        base_ab = self.base_damage(roster, pokemon_a, pokemon_b)
+        base_ba = self.base_damage(roster, pokemon_b, pokemon_a)
+
+        hp_a = np.repeat(
+            self.max_hp(roster, pokemon_a)[:, np.newaxis],
+            trials,
+            axis=1,
+        )
+        hp_b = np.repeat(
+            self.max_hp(roster, pokemon_b)[:, np.newaxis],
+            trials,
+            axis=1,
+        )
+
+        speed_a = roster.speed[pokemon_a][:, np.newaxis]
+        speed_b = roster.speed[pokemon_b][:, np.newaxis]
+
+        # NaN stats compare False and would never finish
+        fighting = np.isfinite(base_ab + base_ba)[:, np.newaxis] & (
+            np.isfinite(hp_a + hp_b + speed_a + speed_b)
+        )
+
+        for _ in range(self.MAX_TURNS):
+            if not fighting.any():
+                break
+
+            a_first = (speed_a > speed_b) | (
+                (speed_a == speed_b) & (rng.random(shape) < 0.5)
+            )
+            damage_ab = self.strike(
+                roster,
+                against,
+                pokemon_a,
+                pokemon_b,
+                base_ab,
+                rng,
+                shape,
+            )
+            damage_ba = self.strike(
+                roster,
+                against,
+                pokemon_b,
+                pokemon_a,
+                base_ba,
+                rng,
+                shape,
+            )
+
+            # First strike
+            hp_b = np.where(fighting & a_first, hp_b - damage_ab, hp_b)
+            hp_a = np.where(fighting & ~a_first, hp_a - damage_ba, hp_a)
+            fighting &= (hp_a > 0) & (hp_b > 0)
+
+            # Strike back
+            hp_a = np.where(fighting & a_first, hp_a - damage_ba, hp_a)
+            hp_b = np.where(fighting & ~a_first, hp_b - damage_ab, hp_b)
+            fighting &= (hp_a > 0) & (hp_b > 0)
+
+        margins = np.maximum(hp_a, 0) - np.maximum(hp_b, 0)
+        margins[~np.isfinite(margins)] = np.nan
+
+        return margins
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (ClassicEngine(), TurnBasedEngine())
+}
+
+
+def get_engine(name: str) -> BattleEngine:
+    """Return a registered engine by name, ValueError if unknown."""
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown battle engine: {name}")
+
+
+def summarize(margins: np.ndarray, bins: int = 20) -> dict:
+    """
+    Win probabilities and margin distribution of one pair's trials.
+
+    Parameters:
+    margins (np.ndarray): Margins of every trial, from pokemon_a's side.
+    bins (int): Number of histogram bins.
+
+    Returns:
+    dict: winProbability (pokemon_a, pokemon_b, draw) and margin (mean, std, percentiles, histogram).
+    """
+    trials = len(margins)
+    percentiles = np.percentile(margins, [5, 25, 50, 75, 95])
+    counts, edges = np.histogram(margins, bins=bins)
+
+    return {
+        "winProbability": {
+            "pokemon_a": float(np.count_nonzero(margins > 0) / trials),
+            "pokemon_b": float(np.count_nonzero(margins < 0) / trials),
+            "draw": float(np.count_nonzero(margins == 0) / trials),
+        },
+        "margin": {
+            "mean": float(margins.mean()),
+            "std": float(margins.std()),
+            "percentiles": {
+                str(q): float(value)
+                for q, value in zip([5, 25, 50, 75, 95], percentiles)
+            },
+            "histogram": {
+                "edges": edges.tolist(),
+                "counts": counts.tolist(),
+            },
+        },
+    }
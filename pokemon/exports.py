@@ -0,0 +1,223 @@
+import csv
+import datetime
+import io
+import logging
+from typing import AsyncIterator, Iterator, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from sqlalchemy import select
+
+from battle_simulator.utils import custom_exceptions as ce
+from battle_simulator.utils.async_db import get_async_engine
+from pokemon.list_snapshot import dump
+from pokemon.models import Battle
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+# Content type of each export format
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_COLUMNS = (
+    "battle_id",
+    "pokemon_a",
+    "pokemon_b",
+    "status",
+    "winner_name",
+    "won_by_margin",
+    "created_at",
+    "updated_at",
+)
+
+BATTLE_STATUSES = (
+    "BATTLE_INPROGRESS",
+    "BATTLE_COMPLETED",
+    "DRAW",
+    "BATTLE_FAILED",
+)
+
+
+def parse_timestamp(value: str, name: str) -> datetime.datetime:
+    """
+    Parse an ISO 8601 date or datetime into the naive UTC form the
+    battle timestamps are compared in.
+    """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = (
+                datetime.datetime.combine(day, datetime.time())
+                if day
+                else None
+            )
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        raise ce.ValidationFailed(
+            {"message": f"{name} must be an ISO 8601 date or datetime"}
+        )
+
+    if timezone.is_aware(parsed):
+        parsed = timezone.make_naive(parsed, datetime.timezone.utc)
+    return parsed
+
+
+def parse_export_params(params) -> dict:
+    """
+    Validate the query parameters of a battle export.
+
+    Returns:
+    dict: The format, status, created_from and created_to of the export.
+    """
+    export_format = params.get("format") or "ndjson"
+    if export_format not in EXPORT_FORMATS:
+        choices = ", ".join(EXPORT_FORMATS)
+        raise ce.ValidationFailed(
+            {"message": f"format must be one of {choices}"}
+        )
+
+    battle_status = params.get("status") or None
+    if battle_status and battle_status not in BATTLE_STATUSES:
+        choices = ", ".join(BATTLE_STATUSES)
+        raise ce.ValidationFailed(
+            {"message": f"status must be one of {choices}"}
+        )
+
+    return {
+        "export_format": export_format,
+        "status": battle_status,
+        "created_from": (
+            parse_timestamp(params["created_from"], "created_from")
+            if params.get("created_from")
+            else None
+        ),
+        "created_to": (
+            parse_timestamp(params["created_to"], "created_to")
+            if params.get("created_to")
+            else None
+        ),
+    }
+
+
+def battle_export_query(
+    status: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+):
+    """
+    Battles with ``status``, created from ``created_from`` (inclusive)
+    to ``created_to`` (exclusive), oldest first. The ordering matches the
+    idx_battle_created_at index.
+    """
+    query = select(
+        *[getattr(Battle, column) for column in EXPORT_COLUMNS]
+    ).order_by(Battle.created_at, Battle.battle_id)
+
+    if status:
+        query = query.where(Battle.status == status)
+    if created_from:
+        query = query.where(Battle.created_at >= created_from)
+    if created_to:
+        query = query.where(Battle.created_at < created_to)
+
+    return query
+
+
+def export_header(export_format: str) -> str:
+    """Text sent before the first row: the CSV header line."""
+    if export_format == "csv":
+        return ",".join(EXPORT_COLUMNS) + "\r\n"
+    return ""
+
+
+def export_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def render_rows(rows, export_format: str) -> str:
+    """One chunk of the export: ``rows`` as NDJSON lines or CSV records."""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [export_value(value) for value in row] for row in rows
+        )
+        return buffer.getvalue()
+
+    return "".join(
+        dump(
+            {
+                column: export_value(value)
+                for column, value in zip(EXPORT_COLUMNS, row)
+            }
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def iter_battle_export(
+    export_format: str = "ndjson",
+    chunk_size: Optional[int] = None,
+    **filters,
+) -> Iterator[str]:
+    """
+    Stream the matching battles in ``export_format``, one chunk of text
+    per ``chunk_size`` rows (BATTLE_EXPORT_CHUNK_SIZE by default).
+
+    Rows are read through a server-side cursor ``chunk_size`` at a time,
+    so memory stays flat whatever the number of battles. The connection
+    is held until the iterator is exhausted or closed.
+    """
+    chunk_size = chunk_size or settings.BATTLE_EXPORT_CHUNK_SIZE
+
+    header = export_header(export_format)
+    if header:
+        yield header
+
+    try:
+        with settings.ENGINE.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=chunk_size
+            ).execute(battle_export_query(**filters))
+
+            for rows in result.partitions():
+                yield render_rows(rows, export_format)
+    except Exception as e:
+        logger.error(f"EXPORT BATTLES: {e}")
+        raise
+
+
+async def aiter_battle_export(
+    export_format: str = "ndjson",
+    chunk_size: Optional[int] = None,
+    **filters,
+) -> AsyncIterator[str]:
+    """iter_battle_export() over the async engine."""
+    chunk_size = chunk_size or settings.BATTLE_EXPORT_CHUNK_SIZE
+
+    header = export_header(export_format)
+    if header:
+        yield header
+
+    try:
+        async with get_async_engine().connect() as connection:
+            result = await connection.stream(
+                battle_export_query(**filters).execution_options(
+                    yield_per=chunk_size
+                )
+            )
+
+            async for rows in result.partitions():
+                yield render_rows(rows, export_format)
+    except Exception as e:
+        logger.error(f"AEXPORT BATTLES: {e}")
+        raise
@@ -0,0 +1,451 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from sqlalchemy import case, func
+
+from battle_simulator.utils.redis_client import (
+    get_async_redis,
+    get_redis,
+)
+from pokemon.models import Battle
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+# Create DB Session
+session = settings.DB_SESSION
+
+# Sorted set ranking the Pokemon by each statistic
+LEADERBOARD_KEYS = {
+    "wins": "leaderboard:wins",
+    "win_rate": "leaderboard:win_rate",
+    "margin": "leaderboard:margin",
+}
+
+STAT_FIELDS = ("wins", "losses", "draws", "margin")
+
+FINISHED_STATUSES = ("BATTLE_COMPLETED", "DRAW")
+
+# Set while `manage.py rebuild_leaderboard` runs, and the IDs of the
+# battles counted meanwhile
+REBUILD_KEY = "leaderboard:rebuild"
+REBUILD_BATTLES_KEY = "leaderboard:rebuild:battles"
+
+# Journaled battle IDs looked up per query
+JOURNAL_CHUNK_SIZE = 1000
+
+# Where the rebuild writes the new leaderboard before swapping it in
+REBUILT_KEYS = {
+    by: f"leaderboard:rebuild:{by}" for by in LEADERBOARD_KEYS
+}
+
+# Adds the deltas of each Pokemon to its stats hash and re-scores it on
+# the three boards, atomically, in one round-trip. During a rebuild the
+# battle IDs are journaled too.
+# KEYS: the wins, win_rate and margin sorted sets, the rebuild flag and
+# journal, then one stats hash per Pokemon. ARGV: the number of battles
+# and their IDs, then name and wins, losses, draws, margin deltas, five
+# values per Pokemon.
+RECORD_SCRIPT = """
+local battles = tonumber(ARGV[1])
+if battles > 0 and redis.call("EXISTS", KEYS[4]) == 1 then
+    for i = 2, battles + 1 do
+        redis.call("SADD", KEYS[5], ARGV[i])
+    end
+end
+
+for i = 6, #KEYS do
+    local at = battles + 1 + (i - 6) * 5
+    local name = ARGV[at + 1]
+    local wins = redis.call("HINCRBY", KEYS[i], "wins", ARGV[at + 2])
+    local losses = redis.call("HINCRBY", KEYS[i], "losses", ARGV[at + 3])
+    local draws = redis.call("HINCRBY", KEYS[i], "draws", ARGV[at + 4])
+    local margin = tonumber(
+        redis.call("HINCRBYFLOAT", KEYS[i], "margin", ARGV[at + 5])
+    )
+    local played = wins + losses + draws
+
+    redis.call("ZADD", KEYS[1], wins, name)
+    if played > 0 then
+        redis.call("ZADD", KEYS[2], wins / played, name)
+    end
+    if wins > 0 then
+        redis.call("ZADD", KEYS[3], margin / wins, name)
+    end
+end
+return #KEYS - 5
+"""
+
+# Starts journaling for a rebuild, unless one is already running.
+# KEYS: the rebuild flag and journal. ARGV: the flag's TTL in seconds.
+START_REBUILD_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+redis.call("DEL", KEYS[2])
+redis.call("SET", KEYS[1], 1, "EX", ARGV[1])
+return 1
+"""
+
+# Renames the rebuilt leaderboard over the live one, drops the stats of
+# the Pokemon it no longer lists and stops journaling, atomically.
+# KEYS: the rebuild flag and journal, the live then the rebuilt wins,
+# win_rate and margin sorted sets. ARGV: the live and the rebuilt stats
+# hash key prefixes. Returns the journaled battle IDs, or false if the
+# flag expired before the swap.
+SWAP_REBUILD_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return false
+end
+local battles = redis.call("SMEMBERS", KEYS[2])
+redis.call("DEL", KEYS[1], KEYS[2])
+
+for _, name in ipairs(redis.call("ZRANGE", KEYS[3], 0, -1)) do
+    redis.call("DEL", ARGV[1] .. name)
+end
+for _, name in ipairs(redis.call("ZRANGE", KEYS[6], 0, -1)) do
+    redis.call("RENAME", ARGV[2] .. name, ARGV[1] .. name)
+end
+for i = 3, 5 do
+    if redis.call("EXISTS", KEYS[i + 3]) == 1 then
+        redis.call("RENAME", KEYS[i + 3], KEYS[i])
+    else
+        redis.call("DEL", KEYS[i])
+    end
+end
+return battles
+"""
+
+
+def stats_key(name: str) -> str:
+    return f"leaderboard:stats:{name}"
+
+
+def rebuilt_stats_key(name: str) -> str:
+    return f"leaderboard:rebuild:stats:{name}"
+
+
+def result_deltas(results: Iterable[dict]) -> Dict[str, List[float]]:
+    """
+    Wins, losses, draws and won margin to add per Pokemon for finished
+    battles (dicts with pokemon_a, pokemon_b, status, winner_name and
+    won_by_margin). Other statuses count for nothing.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0.0])
+
+    for each in results:
+        pokemon_a = (each.get("pokemon_a") or "").lower()
+        pokemon_b = (each.get("pokemon_b") or "").lower()
+        if not pokemon_a or not pokemon_b:
+            continue
+
+        if each.get("status") == "DRAW":
+            deltas[pokemon_a][2] += 1
+            deltas[pokemon_b][2] += 1
+        elif each.get("status") == "BATTLE_COMPLETED":
+            winner = (each.get("winner_name") or "").lower()
+            loser = pokemon_b if winner == pokemon_a else pokemon_a
+            deltas[winner][0] += 1
+            deltas[winner][3] += float(each.get("won_by_margin") or 0)
+            deltas[loser][1] += 1
+
+    return deltas
+
+
+def _script_args(results: List[dict], deltas: Dict[str, List[float]]):
+    keys = [
+        *LEADERBOARD_KEYS.values(),
+        REBUILD_KEY,
+        REBUILD_BATTLES_KEY,
+    ]
+    battle_ids = [
+        str(each["battle_id"])
+        for each in results
+        if each.get("battle_id")
+        and each.get("status") in FINISHED_STATUSES
+    ]
+    args = [len(battle_ids), *battle_ids]
+    for name, (wins, losses, draws, margin) in deltas.items():
+        keys.append(stats_key(name))
+        args.extend([name, wins, losses, draws, repr(margin)])
+    return keys, args
+
+
+def record_battle_results(results: Iterable[dict]):
+    """
+    Count finished battles (dicts as for result_deltas(), with their
+    battle_id) on the leaderboard. Failures are logged and left for
+    `manage.py rebuild_leaderboard` to repair.
+    """
+    results = list(results)
+    deltas = result_deltas(results)
+    if not deltas:
+        return
+
+    try:
+        keys, args = _script_args(results, deltas)
+        get_redis().register_script(RECORD_SCRIPT)(keys=keys, args=args)
+    except Exception as e:
+        logger.error(f"RECORD BATTLE RESULTS: {e}")
+
+
+async def arecord_battle_results(results: Iterable[dict]):
+    """record_battle_results() with the asyncio Redis client."""
+    results = list(results)
+    deltas = result_deltas(results)
+    if not deltas:
+        return
+
+    try:
+        keys, args = _script_args(results, deltas)
+        await get_async_redis().register_script(RECORD_SCRIPT)(
+            keys=keys, args=args
+        )
+    except Exception as e:
+        logger.error(f"ARECORD BATTLE RESULTS: {e}")
+
+
+def format_stats(name: str, values: dict) -> dict:
+    wins = int(values.get("wins") or 0)
+    losses = int(values.get("losses") or 0)
+    draws = int(values.get("draws") or 0)
+    played = wins + losses + draws
+    margin = float(values.get("margin") or 0)
+
+    return {
+        "name": name,
+        "played": played,
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "winRate": wins / played if played else None,
+        "meanMargin": margin / wins if wins else None,
+    }
+
+
+def top_pokemon(by: str = "wins", k: int = 10) -> List[dict]:
+    """
+    The ``k`` best Pokemon by wins, win_rate or margin (mean margin of
+    their wins), best first: one O(log N + k) range read plus one hash
+    read per Pokemon, pipelined.
+    """
+    client = get_redis()
+    names = client.zrevrange(LEADERBOARD_KEYS[by], 0, k - 1)
+
+    pipeline = client.pipeline(transaction=False)
+    for name in names:
+        pipeline.hgetall(stats_key(name))
+
+    return [
+        {"rank": rank, **format_stats(name, values)}
+        for rank, (name, values) in enumerate(
+            zip(names, pipeline.execute()), start=1
+        )
+    ]
+
+
+def pokemon_standing(name: str) -> Optional[dict]:
+    """A Pokemon's statistics and rank on each board, None if unranked."""
+    name = name.lower()
+
+    pipeline = get_redis().pipeline(transaction=False)
+    pipeline.hgetall(stats_key(name))
+    for key in LEADERBOARD_KEYS.values():
+        pipeline.zrevrank(key, name)
+    values, *ranks = pipeline.execute()
+
+    if not values:
+        return None
+
+    return {
+        **format_stats(name, values),
+        "rank": {
+            by: rank + 1 if rank is not None else None
+            for by, rank in zip(LEADERBOARD_KEYS, ranks)
+        },
+    }
+
+
+def load_battle_totals() -> Dict[str, List[float]]:
+    """
+    Wins, losses, draws and won margin of every Pokemon, aggregated from
+    the battle table by the database (one GROUP BY per statistic).
+    """
+    totals = _battle_totals()
+
+    session.commit()
+
+    return totals
+
+
+def _battle_totals() -> Dict[str, List[float]]:
+    """load_battle_totals() without ending the session's transaction."""
+    totals = defaultdict(lambda: [0, 0, 0, 0.0])
+    completed = Battle.status == "BATTLE_COMPLETED"
+    loser = case(
+        (
+            func.lower(Battle.winner_name)
+            == func.lower(Battle.pokemon_a),
+            Battle.pokemon_b,
+        ),
+        else_=Battle.pokemon_a,
+    )
+
+    for name, wins, margin in (
+        session.query(
+            Battle.winner_name,
+            func.count(),
+            func.sum(Battle.won_by_margin),
+        )
+        .filter(completed, Battle.winner_name.isnot(None))
+        .group_by(Battle.winner_name)
+    ):
+        totals[name.lower()][0] += wins
+        totals[name.lower()][3] += float(margin or 0)
+
+    for name, losses in (
+        session.query(loser, func.count())
+        .filter(completed)
+        .group_by(loser)
+    ):
+        totals[name.lower()][1] += losses
+
+    for column in (Battle.pokemon_a, Battle.pokemon_b):
+        for name, draws in (
+            session.query(column, func.count())
+            .filter(Battle.status == "DRAW")
+            .group_by(column)
+        ):
+            totals[name.lower()][2] += draws
+
+    return totals
+
+
+def load_finished_battles(battle_ids: List[str]) -> List[dict]:
+    """
+    The finished battles among ``battle_ids``, as dicts for
+    record_battle_results(), in the session's current transaction.
+    """
+    rows = []
+    for start in range(0, len(battle_ids), JOURNAL_CHUNK_SIZE):
+        rows.extend(
+            row._asdict()
+            for row in session.query(
+                Battle.battle_id,
+                Battle.pokemon_a,
+                Battle.pokemon_b,
+                Battle.status,
+                Battle.winner_name,
+                Battle.won_by_margin,
+            ).filter(
+                Battle.battle_id.in_(
+                    battle_ids[start : start + JOURNAL_CHUNK_SIZE]
+                ),
+                Battle.status.in_(FINISHED_STATUSES),
+            )
+        )
+    return rows
+
+
+def discard_rebuilt_leaderboard(client):
+    """Delete the keys a rebuild writes before swapping them in."""
+    names = client.zrange(REBUILT_KEYS["wins"], 0, -1)
+    client.delete(
+        *REBUILT_KEYS.values(),
+        *(rebuilt_stats_key(each) for each in names),
+    )
+
+
+def write_rebuilt_leaderboard(client, totals: Dict[str, List[float]]):
+    """
+    Write ``totals`` (name -> wins, losses, draws, won margin) to the
+    keys a rebuild swaps in.
+    """
+    boards = {by: {} for by in LEADERBOARD_KEYS}
+    pipeline = client.pipeline(transaction=False)
+
+    for name, (wins, losses, draws, margin) in totals.items():
+        pipeline.hset(
+            rebuilt_stats_key(name),
+            mapping=dict(
+                zip(STAT_FIELDS, (wins, losses, draws, margin))
+            ),
+        )
+        played = wins + losses + draws
+        boards["wins"][name] = wins
+        if played:
+            boards["win_rate"][name] = wins / played
+        if wins:
+            boards["margin"][name] = margin / wins
+
+    for by, scores in boards.items():
+        if scores:
+            pipeline.zadd(REBUILT_KEYS[by], scores)
+    pipeline.execute()
+
+
+def rebuild_leaderboard() -> int:
+    """
+    Recount every finished battle in the battle table and swap the result
+    in for the whole leaderboard, dropping every Pokemon it no longer
+    lists.
+
+    The totals are written to separate keys and renamed over the live
+    ones in one script, so readers never see a partial leaderboard.
+    Battles keep being counted on the live leaderboard meanwhile, and
+    their IDs are journaled: those the recount's snapshot did not see
+    yet (its transaction's, under MySQL's REPEATABLE READ) are counted
+    again on the new leaderboard right after the swap, instead of being
+    lost with the old one.
+
+    Returns:
+    int: The number of Pokemon on the new leaderboard.
+    """
+    client = get_redis()
+    if not client.register_script(START_REBUILD_SCRIPT)(
+        keys=[REBUILD_KEY, REBUILD_BATTLES_KEY],
+        args=[settings.LEADERBOARD_REBUILD_TTL],
+    ):
+        raise RuntimeError("A leaderboard rebuild is already running.")
+
+    try:
+        discard_rebuilt_leaderboard(client)
+        totals = _battle_totals()
+        write_rebuilt_leaderboard(client, totals)
+
+        battle_ids = client.register_script(SWAP_REBUILD_SCRIPT)(
+            keys=[
+                REBUILD_KEY,
+                REBUILD_BATTLES_KEY,
+                *LEADERBOARD_KEYS.values(),
+                *REBUILT_KEYS.values(),
+            ],
+            args=[stats_key(""), rebuilt_stats_key("")],
+        )
+        if battle_ids is None:
+            raise RuntimeError(
+                "The leaderboard rebuild outlived "
+                "LEADERBOARD_REBUILD_TTL and was abandoned."
+            )
+
+        # The journaled battles the recount already saw
+        counted = {
+            each["battle_id"]
+            for each in load_finished_battles(list(battle_ids))
+        }
+        session.commit()
+
+        missed = [each for each in battle_ids if each not in counted]
+        if missed:
+            record_battle_results(load_finished_battles(missed))
+            session.commit()
+
+    except Exception:
+        session.rollback()
+        discard_rebuilt_leaderboard(client)
+        client.delete(REBUILD_KEY, REBUILD_BATTLES_KEY)
+        raise
+
+    return len(totals)
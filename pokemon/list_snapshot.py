@@ -0,0 +1,148 @@
+import json
+import threading
+import unicodedata
+from typing import Callable, List, Optional, Tuple
+
+from pokemon.roster import get_roster, roster_is_fresh
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form of a name, like MySQL's *_ai_ci."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+def dump(value) -> str:
+    """Serialize like DRF's JSONRenderer (compact, unicode kept)."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_object(**fragments: str) -> str:
+    """Join already-serialized values into a JSON object, in order."""
+    return (
+        "{"
+        + ",".join(
+            f"{dump(key)}:{value}" for key, value in fragments.items()
+        )
+        + "}"
+    )
+
+
+class PokemonListSnapshot:
+    """
+    The Pokemon list, pre-ordered and pre-serialized.
+
+    Holds one JSON fragment per row in list order together with its
+    keyset sort key, so pages are served by slicing and name filters by
+    an in-memory scan.
+    """
+
+    def __init__(self, rows: list, version: Optional[str] = None):
+        self.version = version
+        self.fragments = []
+        self.keys = []
+        self.search = []
+        self.positions = {}
+
+        for position, row in enumerate(rows):
+            row = row._asdict()
+            is_legendary = row.pop("is_legendary")
+
+            self.fragments.append(dump(row))
+            self.keys.append([is_legendary, row["attack"], row["name"]])
+            self.search.append(fold(row["name"]))
+            self.positions[row["name"]] = position
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def matching(self, name: Optional[str], start: int, count: int):
+        """Positions from ``start`` whose name contains ``name``."""
+        if not name:
+            return list(range(start, min(start + count, len(self))))
+
+        needle = fold(name)
+        positions = []
+        for position in range(start, len(self)):
+            if needle in self.search[position]:
+                positions.append(position)
+                if len(positions) == count:
+                    break
+        return positions
+
+    def page(
+        self, name: Optional[str], offset: int, limit: int
+    ) -> Tuple[List[int], bool]:
+        """Positions of a page/limit page, and whether more rows follow."""
+        if offset < 0:
+            return [], False
+
+        if not name:
+            positions = self.matching(None, offset, limit + 1)
+        else:
+            positions = self.matching(name, 0, offset + limit + 1)[
+                offset:
+            ]
+        return positions[:limit], len(positions) > limit
+
+    def after(
+        self, name: Optional[str], key: list, limit: int
+    ) -> Optional[Tuple[List[int], bool]]:
+        """
+        Positions of the keyset page following ``key``, and whether more
+        rows follow. None when the key's row is not in this snapshot.
+        """
+        start = 0
+        if key:
+            position = self.positions.get(key[2])
+            if position is None or self.keys[position] != key:
+                return None
+            start = position + 1
+
+        positions = self.matching(name, start, limit + 1)
+        return positions[:limit], len(positions) > limit
+
+    def render(self, positions: List[int]) -> str:
+        """JSON array of the rows at ``positions``, null when empty."""
+        if not positions:
+            return "null"
+        return (
+            "["
+            + ",".join(
+                self.fragments[position] for position in positions
+            )
+            + "]"
+        )
+
+
+_snapshot = None
+_snapshot_roster = None
+_lock = threading.Lock()
+
+
+def list_snapshot_is_fresh() -> bool:
+    """Whether get_list_snapshot() would answer from memory, without I/O."""
+    return roster_is_fresh() and _snapshot_roster is get_roster()
+
+
+def get_list_snapshot(
+    load: Callable[[Optional[str]], PokemonListSnapshot],
+) -> PokemonListSnapshot:
+    """
+    Return the list snapshot, rebuilding it with ``load(version)`` after
+    every roster version bump (see pokemon.roster.get_roster).
+    """
+    global _snapshot, _snapshot_roster
+
+    roster = get_roster()
+    if _snapshot_roster is roster:
+        return _snapshot
+
+    with _lock:
+        if _snapshot_roster is not roster:
+            _snapshot = load(roster.version)
+            _snapshot_roster = roster
+
+        return _snapshot
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pokemon.matchups import build_matchup_table, save_matchup_table
+from pokemon.roster import fetch_roster_version, load_roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the outcome of every pair of Pokemon and write the "
+        "matchup table loaded by web and Celery processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.MATCHUP_TABLE_PATH,
+            help="Destination .npz file (default: MATCHUP_TABLE_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        roster = load_roster(fetch_roster_version())
+        table = build_matchup_table(roster)
+        save_matchup_table(table, options["output"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(table)}x{len(table)} matchup table "
+                f"(roster version {table.version}) to {options['output']} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
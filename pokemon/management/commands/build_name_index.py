@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon.name_index import NameIndex, save_name_index
+from pokemon.roster import fetch_roster_version
+from pokemon.spell_checker import fetch_pokemon_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the spell checker's name index and write the snapshot "
+        "web and Celery processes load instead of querying the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.NAME_INDEX_PATH,
+            help="Destination file (default: NAME_INDEX_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        version = fetch_roster_version()
+        names = fetch_pokemon_names()
+        if names is None:
+            raise CommandError("Could not read the Pokemon names.")
+
+        index = NameIndex(
+            [each.lower() for each in names],
+            cutoff=0.8,
+            version=version,
+        )
+        save_name_index(index, options["output"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote name index of {len(index)} names "
+                f"(roster version {index.version}) to {options['output']} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
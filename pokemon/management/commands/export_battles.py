@@ -0,0 +1,85 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from battle_simulator.utils import custom_exceptions as ce
+from pokemon.exports import (
+    EXPORT_FORMATS,
+    iter_battle_export,
+    parse_export_params,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the battle history as NDJSON or CSV through a server-side "
+        "cursor, in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=EXPORT_FORMATS,
+            default="ndjson",
+        )
+        parser.add_argument(
+            "--status", help="Only battles with this status."
+        )
+        parser.add_argument(
+            "--created-from",
+            help="Only battles created at or after this ISO 8601 date "
+            "or datetime.",
+        )
+        parser.add_argument(
+            "--created-to",
+            help="Only battles created before this ISO 8601 date or "
+            "datetime.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.BATTLE_EXPORT_CHUNK_SIZE,
+            help="Rows per fetch (default: BATTLE_EXPORT_CHUNK_SIZE).",
+        )
+        parser.add_argument(
+            "--output", help="Destination file (default: stdout)."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            params = parse_export_params(
+                {
+                    "format": options["export_format"],
+                    "status": options["status"],
+                    "created_from": options["created_from"],
+                    "created_to": options["created_to"],
+                }
+            )
+        except ce.ValidationFailed as e:
+            raise CommandError(str(e.detail["message"]))
+
+        started = time.perf_counter()
+        output = (
+            open(options["output"], "w", newline="")
+            if options["output"]
+            else sys.stdout
+        )
+        try:
+            for chunk in iter_battle_export(
+                chunk_size=options["chunk_size"], **params
+            ):
+                output.write(chunk)
+        finally:
+            if options["output"]:
+                output.close()
+
+        if options["output"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Exported the battles to {options['output']} in "
+                    f"{time.perf_counter() - started:.2f}s"
+                )
+            )
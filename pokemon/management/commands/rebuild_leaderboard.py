@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pokemon.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every finished battle and replace the leaderboard, to "
+        "backfill it or repair results that failed to reach Redis."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        ranked = rebuild_leaderboard()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the leaderboard of {ranked} Pokemon in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        )
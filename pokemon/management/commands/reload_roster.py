@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pokemon.roster import bump_roster_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Bump the shared roster version so every web and Celery process "
+        "reloads the pokemon table on its next version check."
+    )
+
+    def handle(self, *args, **options):
+        version = bump_roster_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"Roster version bumped to {version}")
+        )
@@ -0,0 +1,122 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon.roster import get_roster
+from pokemon.tournaments import FORMATS, run_tournament
+from pokemon.views import (
+    insert_tournament,
+    play_tournament,
+    tournament_standing_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Play a round-robin, swiss or single-elimination tournament over "
+        "the roster and store its matches and standings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("format", choices=FORMATS)
+        parser.add_argument(
+            "--participants",
+            help="Comma-separated Pokemon names in seed order "
+            "(default: every Pokemon).",
+        )
+        parser.add_argument(
+            "--rounds", type=int, help="Number of swiss rounds."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.TOURNAMENT_WORKERS,
+            help="Processes resolving round-robin chunks "
+            "(default: TOURNAMENT_WORKERS).",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Standings to print (default: 10).",
+        )
+        parser.add_argument(
+            "--no-save",
+            action="store_true",
+            help="Print the standings without writing to the database.",
+        )
+
+    def handle(self, *args, **options):
+        participants = (
+            [
+                name.strip()
+                for name in options["participants"].split(",")
+                if name.strip()
+            ]
+            if options["participants"]
+            else None
+        )
+        roster = get_roster()
+        started = time.perf_counter()
+
+        if options["no_save"]:
+            tournament_id = None
+            try:
+                result = run_tournament(
+                    roster,
+                    options["format"],
+                    participants=participants,
+                    rounds=options["rounds"],
+                    chunk_size=settings.TOURNAMENT_CHUNK_SIZE,
+                    workers=options["workers"],
+                )
+            except ValueError as e:
+                raise CommandError(e)
+        else:
+            tournament_id = str(uuid.uuid4())
+            if not insert_tournament(
+                tournament_id=tournament_id,
+                tournament_format=options["format"],
+                participants=(
+                    len(participants) if participants else len(roster)
+                ),
+            ):
+                raise CommandError("Failed to create the tournament")
+
+            result = play_tournament(
+                tournament_id=tournament_id,
+                tournament_format=options["format"],
+                participants=participants,
+                rounds=options["rounds"],
+                workers=options["workers"],
+            )
+            if result is None:
+                raise CommandError(
+                    f"Tournament {tournament_id} failed, see the logs"
+                )
+
+        elapsed = time.perf_counter() - started
+
+        for row in tournament_standing_rows(
+            tournament_id, roster, result
+        )[: options["top"]]:
+            self.stdout.write(
+                f"{row['rank']:>5}  {row['pokemon_name']:<24}"
+                f"{row['points']:>8.1f}  {row['wins']}-{row['draws']}-"
+                f"{row['losses']}  {row['margin']:+.1f}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Played {len(result)} matches between "
+                f"{len(result.participants)} Pokemon over {result.rounds} "
+                f"round(s) in {elapsed:.2f}s"
+                + (
+                    f", tournament {tournament_id}"
+                    if tournament_id
+                    else ""
+                )
+            )
+        )
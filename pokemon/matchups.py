@@ -0,0 +1,286 @@
+import logging
+import math
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from pokemon.roster import Roster, get_roster
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+
+class MatchupTable:
+    """
+    Outcome of every possible classic battle.
+
+    ``margins[a, b]`` is the damage Pokemon ``a`` deals to ``b`` minus the
+    damage ``b`` deals to ``a``: positive when ``a`` wins, negative when
+    ``b`` wins and zero on a draw. NaN marks pairs with incomplete stats.
+    Rows follow the order of the roster the table was built from.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        margins: np.ndarray,
+        version: Optional[str] = None,
+    ):
+        self.names = names
+        self.index = {name.lower(): i for i, name in enumerate(names)}
+        self.margins = margins
+        self.version = version
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Return the row of a Pokemon name (case-insensitive)."""
+        return self.index.get(name.lower().strip()) if name else None
+
+    def resolve(
+        self, pokemon_a: str, pokemon_b: str
+    ) -> Tuple[Optional[str], float]:
+        """
+        Resolve a single battle with one array lookup.
+
+        Returns:
+        Tuple[Optional[str], float]: The winner (as passed in, None on a draw) and the winning margin.
+        """
+        index_a = self.lookup(pokemon_a)
+        index_b = self.lookup(pokemon_b)
+
+        if index_a is None or index_b is None:
+            raise ValueError(
+                "One or both Pokemon not found in the database."
+            )
+
+        margin = float(self.margins[index_a, index_b])
+
+        if math.isnan(margin):
+            raise ValueError(
+                "One or both Pokemon have incomplete stats."
+            )
+
+        if margin > 0:
+            return pokemon_a, margin
+        elif margin < 0:
+            return pokemon_b, -margin
+        return None, 0
+
+    def resolve_many(
+        self, pokemon_a: List[str], pokemon_b: List[str]
+    ) -> List[Optional[Tuple[Optional[str], float]]]:
+        """
+        Resolve many battles with one vectorized gather.
+
+        Returns:
+        List[Optional[Tuple[Optional[str], float]]]: resolve() results in input order, None for pairs that cannot be resolved.
+        """
+        index_a = np.array(
+            [self.index.get(name.lower(), -1) for name in pokemon_a],
+            dtype=np.intp,
+        )
+        index_b = np.array(
+            [self.index.get(name.lower(), -1) for name in pokemon_b],
+            dtype=np.intp,
+        )
+        known = (index_a >= 0) & (index_b >= 0)
+
+        margins = np.full(len(index_a), np.nan)
+        margins[known] = self.margins[index_a[known], index_b[known]]
+
+        outcomes = []
+        for name_a, name_b, margin in zip(
+            pokemon_a, pokemon_b, margins.tolist()
+        ):
+            if math.isnan(margin):
+                outcomes.append(None)
+            elif margin > 0:
+                outcomes.append((name_a, margin))
+            elif margin < 0:
+                outcomes.append((name_b, -margin))
+            else:
+                outcomes.append((None, 0))
+
+        return outcomes
+
+    def counters(
+        self, row: int, k: int, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Rows beating ``row`` by the largest margins, best first."""
+        return self._top_k(self.margins[:, row], row, k, mask)
+
+    def targets(
+        self, row: int, k: int, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Rows ``row`` beats by the largest margins, best first."""
+        return self._top_k(self.margins[row, :], row, k, mask)
+
+    def _top_k(
+        self,
+        margins: np.ndarray,
+        row: int,
+        k: int,
+        mask: Optional[np.ndarray],
+    ) -> List[Tuple[int, float]]:
+        """
+        (row, margin) of the ``k`` largest positive margins among the rows
+        allowed by ``mask``, with ties in row (name) order.
+        """
+        scores = np.where(margins > 0, margins, -np.inf)
+        scores[row] = -np.inf
+        if mask is not None:
+            scores[~mask] = -np.inf
+
+        candidates = np.flatnonzero(np.isfinite(scores))
+        if len(candidates) > k:
+            # Keep every row tied with the k-th margin so ties are ordered
+            # by name rather than by partition order.
+            kth = np.partition(scores[candidates], len(candidates) - k)[
+                len(candidates) - k
+            ]
+            candidates = candidates[scores[candidates] >= kth]
+
+        best = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+        return [
+            (index, float(scores[index])) for index in best[:k].tolist()
+        ]
+
+    def matches_roster(self, roster: Roster) -> bool:
+        return (
+            self.version == roster.version
+            and self.names == roster.names
+        )
+
+
+def damage_matrix(roster: Roster) -> np.ndarray:
+    """
+    Vectorized classic damage: ``damage[a, b]`` is what ``a`` deals to ``b``.
+
+    Mirrors Roster.damage() operation for operation so both give
+    bit-identical results.
+    """
+    # NO_TYPE (-1) selects the trailing column of 1s
+    against = np.hstack(
+        [roster.against, np.ones((len(roster), 1), dtype=np.float64)]
+    )
+    against_type1 = against[:, roster.type1_idx].T
+    against_type2 = against[:, roster.type2_idx].T
+
+    return (roster.attack[:, np.newaxis] / 200) * 100 - (
+        ((against_type1 / 4) * 100) + ((against_type2 / 4) * 100)
+    )
+
+
+def pair_damage(
+    roster: Roster, attackers: np.ndarray, defenders: np.ndarray
+) -> np.ndarray:
+    """
+    Elementwise classic damage: ``damage[i]`` is what ``attackers[i]``
+    deals to ``defenders[i]``, bit-identical to damage_matrix().
+    """
+    against = np.hstack(
+        [roster.against, np.ones((len(roster), 1), dtype=np.float64)]
+    )
+    against_type1 = against[defenders, roster.type1_idx[attackers]]
+    against_type2 = against[defenders, roster.type2_idx[attackers]]
+
+    return (roster.attack[attackers] / 200) * 100 - (
+        ((against_type1 / 4) * 100) + ((against_type2 / 4) * 100)
+    )
+
+
+def pair_margins(
+    roster: Roster, pokemon_a: np.ndarray, pokemon_b: np.ndarray
+) -> np.ndarray:
+    """MatchupTable.margins for many (a, b) pairs of roster rows."""
+    return pair_damage(roster, pokemon_a, pokemon_b) - pair_damage(
+        roster, pokemon_b, pokemon_a
+    )
+
+
+def build_matchup_table(roster: Roster) -> MatchupTable:
+    """Compute the N x N margin matrix for a roster."""
+    damage = damage_matrix(roster)
+
+    return MatchupTable(
+        names=list(roster.names),
+        margins=damage - damage.T,
+        version=roster.version,
+    )
+
+
+def save_matchup_table(table: MatchupTable, path: str):
+    """Persist a table as an uncompressed .npz file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write next to the target and swap it in so readers never see a
+    # partially written file.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        np.savez(
+            fh,
+            margins=table.margins,
+            names=np.array(table.names, dtype=np.str_),
+            version=np.array(table.version or "", dtype=np.str_),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_matchup_table(path: str) -> Optional[MatchupTable]:
+    """Load a table written by save_matchup_table(), None if unavailable."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return MatchupTable(
+                names=data["names"].tolist(),
+                margins=data["margins"],
+                version=str(data["version"]) or None,
+            )
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"LOAD MATCHUP TABLE: {e}")
+        return None
+
+
+_table = None
+_table_roster = None
+_lock = threading.Lock()
+
+
+def get_matchup_table() -> MatchupTable:
+    """
+    Return the matchup table for the current roster.
+
+    The file at MATCHUP_TABLE_PATH is used when it was built from the same
+    roster version, otherwise the table is computed in memory. Either way
+    it is rebuilt whenever get_roster() hands out a reloaded roster.
+    """
+    global _table, _table_roster
+
+    roster = get_roster()
+    if _table_roster is roster:
+        return _table
+
+    with _lock:
+        if _table_roster is roster:
+            return _table
+
+        table = load_matchup_table(settings.MATCHUP_TABLE_PATH)
+        if table is None or not table.matches_roster(roster):
+            table = build_matchup_table(roster)
+            logger.info(
+                f"MATCHUP TABLE BUILT: {len(table)}x{len(table)}, "
+                f"version {table.version}"
+            )
+
+        _table, _table_roster = table, roster
+
+        return table
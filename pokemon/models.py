@@ -1,12 +1,17 @@
 # coding: utf-8
+import uuid
+
 from sqlalchemy import (
+    BINARY,
     Column,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     TIMESTAMP,
     Text,
+    TypeDecorator,
     text,
 )
 from sqlalchemy.orm import relationship
@@ -16,6 +21,28 @@ Base = declarative_base()
 metadata = Base.metadata
 
 
+class BinaryUUID(TypeDecorator):
+    """
+    A UUID stored in 16 bytes, bound from a uuid.UUID or its string form
+    and read back as the canonical lowercase string.
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
 class Pokemon(Base):
     __tablename__ = "pokemon"
 
@@ -61,13 +88,25 @@ class Pokemon(Base):
     generation = Column(Integer)
     is_legendary = Column(Integer)
 
+    __table_args__ = (
+        # Serves the ordering and keyset seeks of the Pokemon list
+        Index(
+            "idx_pokemon_listing",
+            is_legendary.desc(),
+            attack.desc(),
+            name,
+        ),
+    )
+
 
 class Battle(Base):
     __tablename__ = "battle"
 
-    battle_id = Column(
-        String(36), primary_key=True, server_default=text("(uuid())")
-    )
+    # Time-ordered (UUIDv7) so inserts append to the clustered index.
+    # No server default: MySQL's uuid() is a UUIDv1 whose leading bytes
+    # are the fast-changing time_low, so default IDs would land at random
+    # and every insert supplies a uuid7() instead.
+    battle_id = Column(BinaryUUID, primary_key=True)
     pokemon_a = Column(ForeignKey("pokemon.name"), index=True)
     pokemon_b = Column(ForeignKey("pokemon.name"), index=True)
     status = Column(String(50))
@@ -89,3 +128,63 @@ class Battle(Base):
     pokemon1 = relationship(
         "Pokemon", primaryjoin="Battle.pokemon_b == Pokemon.name"
     )
+
+    __table_args__ = (
+        # Serves the created_at range and ordering of battle exports
+        Index("idx_battle_created_at", created_at),
+    )
+
+
+class Tournament(Base):
+    __tablename__ = "tournament"
+
+    tournament_id = Column(
+        String(36), primary_key=True, server_default=text("(uuid())")
+    )
+    format = Column(String(50))
+    status = Column(String(50))
+    participants = Column(Integer)
+    rounds = Column(Integer)
+    winner_name = Column(String(100))
+    created_at = Column(
+        TIMESTAMP, server_default=text("CURRENT_TIMESTAMP")
+    )
+    updated_at = Column(
+        TIMESTAMP,
+        server_default=text(
+            "CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+        ),
+    )
+
+
+class TournamentMatch(Base):
+    __tablename__ = "tournament_match"
+
+    tournament_id = Column(
+        ForeignKey("tournament.tournament_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    match_no = Column(Integer, primary_key=True)
+    round = Column(Integer)
+    pokemon_a = Column(String(100))
+    pokemon_b = Column(String(100))
+    status = Column(String(50))
+    winner_name = Column(String(100))
+    won_by_margin = Column(Float)
+
+
+class TournamentStanding(Base):
+    __tablename__ = "tournament_standing"
+
+    tournament_id = Column(
+        ForeignKey("tournament.tournament_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rank = Column(Integer, primary_key=True)
+    pokemon_name = Column(String(100))
+    played = Column(Integer)
+    wins = Column(Integer)
+    draws = Column(Integer)
+    losses = Column(Integer)
+    points = Column(Float)
+    margin = Column(Float)
@@ -0,0 +1,200 @@
+import difflib
+import json
+import logging
+import math
+import os
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+# Name index snapshot: MAGIC, the byte length of a JSON header, the header
+# (names, alphabet, counts shape, cutoff, roster version), padding to
+# SNAPSHOT_ALIGNMENT and the int32 counts matrix, which is memory-mapped.
+SNAPSHOT_MAGIC = b"NAMEIDX1"
+SNAPSHOT_ALIGNMENT = 64
+
+
+class NameIndex:
+    """
+    Fuzzy name lookup returning exactly what
+    ``difflib.get_close_matches(word, names, n=1, cutoff=cutoff)`` returns.
+
+    difflib only accepts a name when ``ratio() >= cutoff``, and ratio() is
+    bounded by quick_ratio() (shared characters) and real_quick_ratio()
+    (lengths). Names are kept sorted by length next to a matrix of their
+    character counts, so both bounds are evaluated for all names at once
+    with NumPy and SequenceMatcher only runs on the few names that can
+    still reach the cutoff, best bound first.
+
+    ``alphabet`` and ``counts``, as read back by load_name_index(), skip
+    the counting; ``names`` must then already be in index order.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        cutoff: float = 0.8,
+        version: Optional[str] = None,
+        alphabet: Optional[List[str]] = None,
+        counts: Optional[np.ndarray] = None,
+    ):
+        self.cutoff = cutoff
+        self.version = version
+        if counts is None:
+            names = sorted(
+                set(names), key=lambda name: (len(name), name)
+            )
+        self.names = list(names)
+        self.exact = set(self.names)
+        self.lengths = [len(name) for name in self.names]
+        self.length_array = np.array(self.lengths, dtype=np.int32)
+
+        if alphabet is None:
+            alphabet = sorted(
+                {char for name in self.names for char in name}
+            )
+        self.alphabet = {char: i for i, char in enumerate(alphabet)}
+
+        if counts is None:
+            counts = np.zeros(
+                (len(self.names), len(alphabet)), dtype=np.int32
+            )
+            for row, name in enumerate(self.names):
+                for char in name:
+                    counts[row, self.alphabet[char]] += 1
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, word: str) -> Optional[str]:
+        """Return the closest name scoring at least the cutoff, if any."""
+        # Exact hash fast path: nothing can score above 1.0
+        if word in self.exact:
+            return word
+
+        cutoff = self.cutoff
+        size = len(word)
+
+        # real_quick_ratio() >= cutoff only holds for lengths in
+        # [size * c / (2 - c), size * (2 - c) / c]; widen by one to stay
+        # clear of rounding, the exact bound is applied below.
+        start = bisect_left(
+            self.lengths, math.floor(size * cutoff / (2 - cutoff)) - 1
+        )
+        stop = bisect_right(
+            self.lengths, math.ceil(size * (2 - cutoff) / cutoff) + 1
+        )
+        if start >= stop:
+            return None
+
+        query = np.zeros(len(self.alphabet), dtype=np.int32)
+        for char in word:
+            index = self.alphabet.get(char)
+            if index is not None:
+                query[index] += 1
+
+        # quick_ratio() of every name in the length window
+        shared = np.minimum(self.counts[start:stop], query).sum(axis=1)
+        bounds = 2.0 * shared / (self.length_array[start:stop] + size)
+
+        candidates = np.flatnonzero(bounds >= cutoff)
+        if not len(candidates):
+            return None
+        candidates = candidates[
+            np.argsort(-bounds[candidates], kind="stable")
+        ]
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        best = None
+        for candidate in candidates:
+            if best is not None and bounds[candidate] < best[0]:
+                break
+
+            name = self.names[start + candidate]
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+
+            # Ties go to the greatest name, as with heapq.nlargest()
+            if score >= cutoff and (
+                best is None or (score, name) > best
+            ):
+                best = (score, name)
+
+        return best[1] if best else None
+
+
+def save_name_index(index: NameIndex, path: str):
+    """Persist an index as a snapshot file for load_name_index()."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    header = json.dumps(
+        {
+            "version": index.version,
+            "cutoff": index.cutoff,
+            "names": index.names,
+            "alphabet": list(index.alphabet),
+            "shape": list(index.counts.shape),
+        }
+    ).encode()
+    offset = len(SNAPSHOT_MAGIC) + 8 + len(header)
+    padding = -offset % SNAPSHOT_ALIGNMENT
+
+    # Write next to the target and swap it in so readers never see a
+    # partially written file.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(SNAPSHOT_MAGIC)
+        fh.write(len(header).to_bytes(8, "little"))
+        fh.write(header)
+        fh.write(b"\0" * padding)
+        fh.write(
+            np.ascontiguousarray(index.counts, dtype="<i4").tobytes()
+        )
+    os.replace(tmp_path, path)
+
+
+def load_name_index(path: str) -> Optional[NameIndex]:
+    """
+    Load an index written by save_name_index(), None if unavailable.
+
+    The counts matrix is memory-mapped rather than read, so only the pages
+    a lookup touches are loaded.
+    """
+    try:
+        with open(path, "rb") as fh:
+            if fh.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a name index snapshot")
+            size = int.from_bytes(fh.read(8), "little")
+            header = json.loads(fh.read(size))
+
+        offset = len(SNAPSHOT_MAGIC) + 8 + size
+        offset += -offset % SNAPSHOT_ALIGNMENT
+        shape = tuple(header["shape"])
+        counts = (
+            np.memmap(
+                path, dtype="<i4", mode="r", offset=offset, shape=shape
+            )
+            if all(shape)
+            else np.zeros(shape, dtype=np.int32)
+        )
+
+        return NameIndex(
+            header["names"],
+            cutoff=header["cutoff"],
+            version=header["version"],
+            alphabet=header["alphabet"],
+            counts=counts,
+        )
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"LOAD NAME INDEX: {e}")
+        return None
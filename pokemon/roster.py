@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from battle_simulator.utils.redis_client import get_redis
+from pokemon.models import Pokemon
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+# Create DB Session
+session = settings.DB_SESSION
+
+# Order of the against_* columns in Roster.against
+AGAINST_TYPES = (
+    "bug",
+    "dark",
+    "dragon",
+    "electric",
+    "fairy",
+    "fight",
+    "fire",
+    "flying",
+    "ghost",
+    "grass",
+    "ground",
+    "ice",
+    "normal",
+    "poison",
+    "psychic",
+    "rock",
+    "steel",
+    "water",
+)
+AGAINST_INDEX = {
+    name: index for index, name in enumerate(AGAINST_TYPES)
+}
+
+# Types without a matching against_* column (e.g. an empty type2)
+NO_TYPE = -1
+
+STAT_COLUMNS = (
+    "attack",
+    "hp",
+    "defense",
+    "sp_attack",
+    "sp_defense",
+    "speed",
+    "generation",
+    "is_legendary",
+)
+
+
+class Roster:
+    """
+    Compact, read-only copy of the pokemon table.
+
+    Rows are addressed by position: ``index`` maps a lower-cased name to
+    its row, and every stat lives in a parallel NumPy array. Missing
+    values are stored as NaN.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        type1: List[Optional[str]],
+        type2: List[Optional[str]],
+        stats: np.ndarray,
+        against: np.ndarray,
+        version: Optional[str] = None,
+    ):
+        self.names = names
+        self.index = {name.lower(): i for i, name in enumerate(names)}
+        self.type1 = type1
+        self.type2 = type2
+        self.type1_idx = np.array(
+            [AGAINST_INDEX.get(each, NO_TYPE) for each in type1],
+            dtype=np.int8,
+        )
+        self.type2_idx = np.array(
+            [AGAINST_INDEX.get(each, NO_TYPE) for each in type2],
+            dtype=np.int8,
+        )
+        for column, values in zip(STAT_COLUMNS, stats.T):
+            setattr(self, column, np.ascontiguousarray(values))
+        self.against = against
+        self.version = version
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Return the row of a Pokemon name (case-insensitive)."""
+        return self.index.get(name.lower().strip()) if name else None
+
+    def multiplier(self, defender: int, attacker_type: int) -> float:
+        """Return the defender's against_* value for an attacking type."""
+        if attacker_type == NO_TYPE:
+            return 1
+        return self.against[defender, attacker_type]
+
+    def damage(self, attacker: int, defender: int) -> float:
+        """Damage dealt by one row to another under the classic rules."""
+        against_type1 = self.multiplier(
+            defender, self.type1_idx[attacker]
+        )
+        against_type2 = self.multiplier(
+            defender, self.type2_idx[attacker]
+        )
+        return float(
+            (self.attack[attacker] / 200) * 100
+            - (
+                ((against_type1 / 4) * 100)
+                + ((against_type2 / 4) * 100)
+            )
+        )
+
+
+def load_roster(version: Optional[str] = None) -> Roster:
+    """Load the pokemon table into a Roster with a single query."""
+    columns = (
+        [Pokemon.name, Pokemon.type1, Pokemon.type2]
+        + [getattr(Pokemon, column) for column in STAT_COLUMNS]
+        + [
+            getattr(Pokemon, f"against_{each}")
+            for each in AGAINST_TYPES
+        ]
+    )
+    rows = session.query(*columns).order_by(Pokemon.name).all()
+
+    session.commit()
+
+    # None becomes NaN with a float dtype
+    values = np.array(
+        [row[3:] for row in rows], dtype=np.float64
+    ).reshape(len(rows), len(STAT_COLUMNS) + len(AGAINST_TYPES))
+
+    roster = Roster(
+        names=[row.name for row in rows],
+        type1=[row.type1 for row in rows],
+        type2=[row.type2 for row in rows],
+        stats=values[:, : len(STAT_COLUMNS)],
+        against=np.ascontiguousarray(values[:, len(STAT_COLUMNS) :]),
+        version=version,
+    )
+    logger.info(
+        f"ROSTER LOADED: {len(roster)} pokemon, version {version}"
+    )
+
+    return roster
+
+
+def fetch_roster_version() -> Optional[str]:
+    """Read the shared roster version from Redis, None if unavailable."""
+    try:
+        return get_redis().get(settings.ROSTER_VERSION_KEY) or "0"
+    except Exception as e:
+        logger.error(f"FETCH ROSTER VERSION: {e}")
+        return None
+
+
+def bump_roster_version() -> str:
+    """Tell every process to reload its roster on its next version check."""
+    version = str(get_redis().incr(settings.ROSTER_VERSION_KEY))
+    invalidate_roster()
+    return version
+
+
+_roster = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def invalidate_roster():
+    """Drop this process' roster so the next get_roster() reloads it."""
+    global _roster
+
+    with _lock:
+        _roster = None
+
+
+def roster_is_fresh() -> bool:
+    """Whether get_roster() would answer from memory, without any I/O."""
+    return (
+        _roster is not None
+        and time.monotonic() - _checked_at
+        < settings.ROSTER_VERSION_CHECK_INTERVAL
+    )
+
+
+def get_roster() -> Roster:
+    """
+    Return the process-local roster, loading it on first use.
+
+    The shared version is checked at most once every
+    ROSTER_VERSION_CHECK_INTERVAL seconds; between checks no I/O is done.
+    If Redis is unreachable the roster currently held is kept.
+    """
+    global _roster, _checked_at
+
+    roster = _roster
+    interval = settings.ROSTER_VERSION_CHECK_INTERVAL
+    if roster is not None and time.monotonic() - _checked_at < interval:
+        return roster
+
+    with _lock:
+        if (
+            _roster is not None
+            and time.monotonic() - _checked_at < interval
+        ):
+            return _roster
+
+        version = fetch_roster_version()
+        if _roster is None or (
+            version is not None and version != _roster.version
+        ):
+            _roster = load_roster(version)
+        _checked_at = time.monotonic()
+
+        return _roster
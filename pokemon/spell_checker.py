@@ -1,9 +1,13 @@
 import difflib
 import logging
-from typing import List
+import threading
+import time
+from typing import List, Optional
 from django.conf import settings
 
 from pokemon.models import Pokemon
+from pokemon.name_index import NameIndex, load_name_index
+from pokemon.roster import fetch_roster_version, get_roster
 from battle_simulator.utils import custom_exceptions as ce
 
 # Get an instance of logger
@@ -14,10 +18,25 @@ session = settings.DB_SESSION
 
 
 class PokemonSpellChecker:
-    def __init__(self):
+    def __init__(
+        self,
+        names: Optional[List[str]] = None,
+        name_index: Optional[NameIndex] = None,
+    ):
+        if name_index is not None:
+            self.valid_pokemon_names = name_index.names
+            self.name_index = name_index
+            return
+
         self.valid_pokemon_names = [
-            each.lower() for each in fetch_pokemon_names()
+            each.lower()
+            for each in (
+                names if names is not None else fetch_pokemon_names()
+            )
         ]
+        self.name_index = NameIndex(
+            self.valid_pokemon_names, cutoff=0.8
+        )
 
     def normalize_name(self, name):
         """Normalize the Pokémon name by converting it to lowercase."""
@@ -26,16 +45,13 @@ class PokemonSpellChecker:
     def check_spelling(self, input_name):
         """Check for spelling mistakes in the Pokémon name."""
         normalized_input = self.normalize_name(input_name)
-        close_matches = difflib.get_close_matches(
-            normalized_input, self.valid_pokemon_names, n=1, cutoff=0.8
-        )
+        closest_name = self.name_index.match(normalized_input)
 
-        if not close_matches:
+        if not closest_name:
             raise ce.InvalidPokemon(
                 f"Pokémon name '{input_name}' is not recognized."
             )
 
-        closest_name = close_matches[0]
         if normalized_input == closest_name:
             return closest_name
         else:
@@ -71,4 +87,76 @@ def fetch_pokemon_names() -> List:
     return pokemons
 
 
-spell_checker = PokemonSpellChecker()
+def load_spell_checker(version: Optional[str]) -> PokemonSpellChecker:
+    """
+    Build the spell checker for the roster ``version``: from the name
+    index snapshot at NAME_INDEX_PATH (see `manage.py build_name_index`)
+    when it was built for that version, or when Redis could not tell the
+    version, without touching the database; otherwise from the names of
+    get_roster().
+    """
+    name_index = (
+        load_name_index(settings.NAME_INDEX_PATH)
+        if settings.NAME_INDEX_PATH
+        else None
+    )
+    if name_index is not None and (
+        version is None or version == name_index.version
+    ):
+        logger.info(
+            f"NAME INDEX LOADED: {len(name_index)} names, "
+            f"version {name_index.version}"
+        )
+        return PokemonSpellChecker(name_index=name_index)
+
+    roster = get_roster()
+    return PokemonSpellChecker(
+        name_index=NameIndex(
+            [each.lower() for each in roster.names],
+            cutoff=0.8,
+            version=roster.version,
+        )
+    )
+
+
+_checker = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_spell_checker() -> PokemonSpellChecker:
+    """
+    Return the process-local spell checker, built on first use.
+
+    Like get_roster(), the shared roster version is checked at most once
+    every ROSTER_VERSION_CHECK_INTERVAL seconds, and the checker is
+    rebuilt when it was built for another version, so names added or
+    removed since are recognized accordingly. If Redis is unreachable
+    the checker currently held is kept.
+    """
+    global _checker, _checked_at
+
+    checker = _checker
+    interval = settings.ROSTER_VERSION_CHECK_INTERVAL
+    if (
+        checker is not None
+        and time.monotonic() - _checked_at < interval
+    ):
+        return checker
+
+    with _lock:
+        if (
+            _checker is not None
+            and time.monotonic() - _checked_at < interval
+        ):
+            return _checker
+
+        version = fetch_roster_version()
+        if _checker is None or (
+            version is not None
+            and version != _checker.name_index.version
+        ):
+            _checker = load_spell_checker(version)
+        _checked_at = time.monotonic()
+
+        return _checker
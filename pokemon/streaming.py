@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from battle_simulator.utils.redis_client import get_async_redis
+from pokemon.battle_cache import battle_events_channel
+from pokemon.async_views import aget_battle_status
+from pokemon.views import format_battle_status
+
+# Get an instance of logger
+logger = logging.getLogger("pokemon")
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@require_GET
+async def battle_status_stream(request, battle_id):
+    """
+    Method: GET
+    Streams the status of a battle as Server-Sent Events.
+    -------
+    The current status is sent at once. While the battle is in progress
+    the connection stays open until the worker publishes the result, or
+    until BATTLE_STREAM_TIMEOUT seconds pass, in which case a "timeout"
+    event carrying the in-progress status is sent and the client should
+    reconnect.
+
+    Returns:
+    text/event-stream: "status" events with the same payload as GET /v1/pokemon/battle/<battle_id>.
+    """
+    battle = await aget_battle_status(battle_id)
+
+    if not battle:
+        return JsonResponse(
+            {"message": "Battle not found", "data": None}, status=404
+        )
+
+    return StreamingHttpResponse(
+        stream_battle_status(battle_id, battle),
+        content_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+async def stream_battle_status(battle_id: str, battle: dict):
+    yield sse_event("status", battle)
+
+    if battle["status"] != "BATTLE_INPROGRESS":
+        return
+
+    # A connection of the shared pool, held until the stream ends
+    pubsub = get_async_redis().pubsub()
+
+    try:
+        await pubsub.subscribe(battle_events_channel(battle_id))
+
+        # The result may have been published before the subscription
+        battle = await aget_battle_status(battle_id)
+        if battle and battle["status"] != "BATTLE_INPROGRESS":
+            yield sse_event("status", battle)
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.BATTLE_STREAM_TIMEOUT
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield sse_event(
+                    "timeout",
+                    {"status": "BATTLE_INPROGRESS", "result": None},
+                )
+                return
+
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=min(
+                    remaining, settings.BATTLE_STREAM_KEEPALIVE
+                ),
+            )
+            if message is None:
+                # Comment line, keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+
+            yield sse_event(
+                "status",
+                format_battle_status(json.loads(message["data"])),
+            )
+            return
+
+    except Exception as e:
+        logger.error(f"STREAM BATTLE STATUS: {e}")
+    finally:
+        await pubsub.aclose()
@@ -1,3 +1,1497 @@
-from django.test import TestCase
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import fakeredis
+import numpy as np
+from django.conf import settings
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    SimpleTestCase,
+)
+from sqlalchemy import delete, insert, text
+
+from battle_simulator.utils import custom_exceptions as ce
+from battle_simulator.utils import redis_client
+from battle_simulator.utils.uuid7 import uuid7
+from benchmarks.fixtures import synthetic_pokemon
+from benchmarks.load_test import create_tables
+from pokemon import spell_checker
+from pokemon.exports import EXPORT_COLUMNS
+from pokemon.models import Battle, Pokemon
+from pokemon.roster import (
+    AGAINST_TYPES,
+    STAT_COLUMNS,
+    Roster,
+    bump_roster_version,
+)
+
+# Shared by the sync and async clients of every test, like one Redis
+REDIS_SERVER = fakeredis.FakeServer()
+
+
+def use_fake_redis():
+    """Point get_redis() at the in-process fake Redis."""
+    redis_client._client = fakeredis.FakeRedis(
+        server=REDIS_SERVER, decode_responses=True
+    )
+    return redis_client._client
+
+
+def use_fake_async_redis(loop):
+    """Point get_async_redis() on ``loop`` at the fake Redis."""
+    client = fakeredis.FakeAsyncRedis(
+        server=REDIS_SERVER, decode_responses=True
+    )
+    redis_client._async_clients[loop] = client
+    return client
+
+
+@asynccontextmanager
+async def async_services():
+    """The fake Redis and the ASYNC_DATABASE_URL engine of this loop."""
+    from battle_simulator.utils.async_db import get_async_engine
+
+    use_fake_async_redis(asyncio.get_running_loop())
+    try:
+        yield
+    finally:
+        await get_async_engine().dispose()
+
+
+def named_like(row: dict, name: str) -> dict:
+    return {**row, "name": name}
+
+
+def synthetic_roster(size: int, seed: int = 7) -> Roster:
+    """A Roster of synthetic Pokemon, without the database."""
+    rows = synthetic_pokemon(size, seed)
+    return Roster(
+        names=[row["name"] for row in rows],
+        type1=[row["type1"] for row in rows],
+        type2=[row["type2"] for row in rows],
+        stats=np.array(
+            [[row[column] for column in STAT_COLUMNS] for row in rows],
+            dtype=np.float64,
+        ),
+        against=np.array(
+            [
+                [row[f"against_{each}"] for each in AGAINST_TYPES]
+                for row in rows
+            ],
+            dtype=np.float64,
+        ),
+    )
+
+
+@skipUnless(
+    settings.DATABASE_URL.startswith("sqlite"),
+    "set DATABASE_URL to a SQLite file, e.g. sqlite:////tmp/test.sqlite3",
+)
+class DatabaseTestCase(SimpleTestCase):
+    """
+    Tests against the SQLAlchemy engine, seeded once per class with
+    synthetic Pokemon, and the fake Redis.
+    """
+
+    pokemon = 30
+
+    @classmethod
+    def pokemon_rows(cls):
+        return synthetic_pokemon(cls.pokemon)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.redis = use_fake_redis()
+
+        engine = settings.ENGINE
+        create_tables(engine)
+        with engine.begin() as connection:
+            connection.execute(delete(Battle))
+            connection.execute(delete(Pokemon))
+            connection.execute(insert(Pokemon), cls.pokemon_rows())
+
+        # Every in-process cache keyed on the roster reloads
+        bump_roster_version()
+        spell_checker._checker = None
+        cls.names = [row["name"] for row in cls.pokemon_rows()]
+
+    def tearDown(self):
+        settings.DB_SESSION.remove()
+        super().tearDown()
+
+
+class PokemonListFilterTests(DatabaseTestCase):
+    @classmethod
+    def pokemon_rows(cls):
+        rows = synthetic_pokemon(cls.pokemon)
+        return rows[3:] + [
+            named_like(rows[0], "Mr_Mime"),
+            named_like(rows[1], "Mrxmime"),
+            named_like(rows[2], "Ho%Oh"),
+        ]
+
+    def test_sql_and_snapshot_filters_match(self):
+        from pokemon.views import load_list_snapshot, query_pokemon
+
+        snapshot = load_list_snapshot()
+        for needle in ("r_m", "_", "%", "o%o", "mime", "a"):
+            with self.subTest(name=needle):
+                rows = query_pokemon(needle) or []
+                positions, _ = snapshot.page(needle, 0, len(snapshot))
+
+                self.assertEqual(
+                    [row["name"] for row in rows],
+                    [
+                        json.loads(snapshot.fragments[each])["name"]
+                        for each in positions
+                    ],
+                )
+
+        self.assertEqual(
+            [row["name"] for row in query_pokemon("r_m")], ["Mr_Mime"]
+        )
+
+
+class KeysetPagingTests(DatabaseTestCase):
+    @classmethod
+    def pokemon_rows(cls):
+        rows = synthetic_pokemon(cls.pokemon)
+        # NULL attack rows in both legendary groups, some sharing attack
+        # values, and NULL is_legendary rows, which sort last
+        for index in (0, 1, 2):
+            rows[index] = {
+                **rows[index],
+                "attack": None,
+                "is_legendary": 0,
+            }
+        rows[3] = {**rows[3], "attack": None, "is_legendary": 1}
+        rows[4] = {**rows[4], "attack": rows[5]["attack"]}
+        rows[6] = {**rows[6], "is_legendary": None}
+        rows[7] = {**rows[7], "attack": None, "is_legendary": None}
+        return rows
+
+    def test_cursor_pages_match_offset_pages(self):
+        from battle_simulator.utils.pagination import (
+            decode_cursor,
+            encode_cursor,
+        )
+        from pokemon.views import (
+            load_list_snapshot,
+            query_pokemon,
+            query_pokemon_after,
+        )
+
+        expected = [row["name"] for row in query_pokemon()]
+        self.assertEqual(len(expected), self.pokemon)
+
+        snapshot = load_list_snapshot()
+        for limit in (1, 2, 3, 7):
+            with self.subTest(limit=limit):
+                names, snapshot_names, after = [], [], []
+                while True:
+                    rows, next_key = query_pokemon_after(
+                        None, limit, after
+                    )
+                    positions, more = snapshot.after(None, after, limit)
+                    names.extend(row["name"] for row in rows or [])
+                    snapshot_names.extend(
+                        json.loads(snapshot.fragments[each])["name"]
+                        for each in positions
+                    )
+                    self.assertEqual(more, next_key is not None)
+                    if next_key is None:
+                        break
+                    after = decode_cursor(encode_cursor(next_key))
+
+                self.assertEqual(names, expected)
+                self.assertEqual(snapshot_names, expected)
+
+
+class BinaryUUIDTests(DatabaseTestCase):
+    def test_round_trip(self):
+        import uuid
+
+        from pokemon.models import BinaryUUID
+
+        column = BinaryUUID()
+        value = uuid7()
+        for bound in (value, str(value), str(value).upper()):
+            with self.subTest(bound=bound):
+                stored = column.process_bind_param(bound, None)
+                self.assertEqual(stored, value.bytes)
+                self.assertEqual(
+                    column.process_result_value(stored, None),
+                    str(value),
+                )
+        self.assertEqual(
+            column.process_bind_param(value.bytes, None), value.bytes
+        )
+        self.assertIsNone(column.process_bind_param(None, None))
+        self.assertIsNone(column.process_result_value(None, None))
+        with self.assertRaises(ValueError):
+            column.process_bind_param("not a uuid", None)
+
+        # Unswapped, as BIN_TO_UUID() without the swap flag reads it
+        self.assertEqual(
+            uuid.UUID(
+                bytes=column.process_bind_param(str(value), None)
+            ),
+            value,
+        )
+
+    def test_stored_ids_read_back_and_sort_by_creation(self):
+        from sqlalchemy import select
+
+        from pokemon.views import insert_battle
+
+        import time
+
+        battle_ids = []
+        for _ in range(5):
+            battle_ids.append(uuid7())
+            # Order is by millisecond; IDs within one are random
+            time.sleep(0.002)
+        for battle_id in reversed(battle_ids):
+            insert_battle(
+                battle_id=battle_id,
+                pokemon_a=self.names[0],
+                pokemon_b=self.names[1],
+                status="BATTLE_INPROGRESS",
+            )
+
+        with settings.ENGINE.connect() as connection:
+            stored = (
+                connection.execute(
+                    select(Battle.battle_id)
+                    .where(
+                        Battle.battle_id.in_(
+                            [str(each) for each in battle_ids]
+                        )
+                    )
+                    .order_by(Battle.battle_id)
+                )
+                .scalars()
+                .all()
+            )
+        self.assertEqual(stored, [str(each) for each in battle_ids])
+
+
+class BattleExportTests(DatabaseTestCase):
+    def setUp(self):
+        import datetime
+
+        statuses = ("BATTLE_COMPLETED", "DRAW", "BATTLE_FAILED")
+        start = datetime.datetime(2024, 6, 1)
+        self.battles = [
+            {
+                "battle_id": str(uuid7()),
+                "pokemon_a": self.names[index],
+                "pokemon_b": self.names[index + 1],
+                "status": statuses[index % 3],
+                "winner_name": None,
+                "won_by_margin": None,
+                "created_at": start + datetime.timedelta(days=index),
+                "updated_at": start + datetime.timedelta(days=index),
+            }
+            for index in range(7)
+        ]
+        with settings.ENGINE.begin() as connection:
+            connection.execute(delete(Battle))
+            connection.execute(insert(Battle), self.battles)
+
+    def export(self, **params) -> tuple:
+        """(content type, body) of the sync export view."""
+        from pokemon.views import BattleExportAPIView
+
+        response = BattleExportAPIView.as_view()(
+            RequestFactory().get("/v1/pokemon/battle/export", params)
+        )
+        self.assertEqual(response.status_code, 200)
+        body = b"".join(response.streaming_content).decode()
+        return response["Content-Type"], body
+
+    def test_formats(self):
+        content_type, body = self.export()
+        self.assertEqual(content_type, "application/x-ndjson")
+        self.assertEqual(
+            [
+                json.loads(line)["battle_id"]
+                for line in body.splitlines()
+            ],
+            [each["battle_id"] for each in self.battles],
+        )
+
+        content_type, body = self.export(format="csv")
+        self.assertEqual(content_type, "text/csv")
+        lines = body.splitlines()
+        self.assertEqual(lines[0], ",".join(EXPORT_COLUMNS))
+        self.assertEqual(
+            [line.split(",")[0] for line in lines[1:]],
+            [each["battle_id"] for each in self.battles],
+        )
+
+    def test_filters(self):
+        for params, expected in (
+            ({"status": "DRAW"}, [1, 4]),
+            ({"created_from": "2024-06-03"}, [2, 3, 4, 5, 6]),
+            ({"created_to": "2024-06-03"}, [0, 1]),
+            (
+                {
+                    "format": "csv",
+                    "status": "BATTLE_COMPLETED",
+                    "created_from": "2024-06-02T00:00:00+00:00",
+                    "created_to": "2024-06-07",
+                },
+                [3],
+            ),
+        ):
+            with self.subTest(params=params):
+                _, body = self.export(**params)
+                if params.get("format") == "csv":
+                    battle_ids = [
+                        line.split(",")[0]
+                        for line in body.splitlines()[1:]
+                    ]
+                else:
+                    battle_ids = [
+                        json.loads(line)["battle_id"]
+                        for line in body.splitlines()
+                    ]
+                self.assertEqual(
+                    battle_ids,
+                    [
+                        self.battles[each]["battle_id"]
+                        for each in expected
+                    ],
+                )
+
+    def test_cursor_resumes_across_chunks(self):
+        from pokemon.exports import iter_battle_export
+
+        whole = list(iter_battle_export("csv", chunk_size=100))
+        self.assertEqual(len(whole), 2)
+
+        chunks = list(iter_battle_export("csv", chunk_size=2))
+        # The header, then 2 + 2 + 2 + 1 rows
+        self.assertEqual(
+            [len(each.splitlines()) for each in chunks], [1, 2, 2, 2, 1]
+        )
+        self.assertEqual("".join(chunks), "".join(whole))
+
+    async def test_async_export(self):
+        from pokemon.async_views import battle_export
+        from pokemon.exports import (
+            aiter_battle_export,
+            iter_battle_export,
+        )
+
+        async with async_services():
+            chunks = [
+                each
+                async for each in aiter_battle_export(
+                    "ndjson", chunk_size=3
+                )
+            ]
+            self.assertEqual(
+                [len(each.splitlines()) for each in chunks], [3, 3, 1]
+            )
+
+            response = await battle_export(
+                AsyncRequestFactory().get(
+                    "/v1/pokemon/battle/export", {"format": "csv"}
+                )
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/csv")
+            body = "".join(
+                [
+                    each.decode()
+                    async for each in response.streaming_content
+                ]
+            )
+
+        self.assertEqual(
+            "".join(chunks), "".join(iter_battle_export("ndjson"))
+        )
+        self.assertEqual(body, "".join(iter_battle_export("csv")))
+
+
+class BattleStreamTests(DatabaseTestCase):
+    async def test_stream_sends_the_published_result(self):
+        from pokemon.streaming import stream_battle_status
+        from pokemon.views import insert_battle, update_battle
+
+        battle_id = str(uuid7())
+        insert_battle(
+            battle_id=battle_id,
+            pokemon_a=self.names[0],
+            pokemon_b=self.names[1],
+            status="BATTLE_INPROGRESS",
+        )
+
+        async with async_services():
+            stream = stream_battle_status(
+                battle_id,
+                {"status": "BATTLE_INPROGRESS", "result": None},
+            )
+            self.assertIn("BATTLE_INPROGRESS", await anext(stream))
+
+            async def next_status():
+                async for event in stream:
+                    if not event.startswith(": keepalive"):
+                        return event
+
+            # Subscribed and waiting once the task yields to the test
+            result = asyncio.ensure_future(next_status())
+            await asyncio.sleep(0.1)
+            update_battle(
+                battle_id,
+                status="BATTLE_COMPLETED",
+                winner_name=self.names[0],
+                won_by_margin=12.5,
+            )
+
+            event = await asyncio.wait_for(result, timeout=5)
+            self.assertTrue(event.startswith("event: status\n"))
+            self.assertIn('"wonByMargin": 12.5', event)
+            await stream.aclose()
+
+    async def test_status_is_read_off_the_sync_thread(self):
+        from pokemon.streaming import battle_status_stream
+        from pokemon.views import insert_battle
+
+        factory = AsyncRequestFactory()
+        battle_id = str(uuid7())
+        insert_battle(
+            battle_id=battle_id,
+            pokemon_a=self.names[0],
+            pokemon_b=self.names[1],
+            status="DRAW",
+        )
+        # Read from the database, not the status cache
+        self.redis.delete(f"battle:status:{battle_id}")
+
+        async with async_services():
+            with mock.patch(
+                "pokemon.views.get_battle_status"
+            ) as get_battle_status:
+                response = await battle_status_stream(
+                    factory.get(
+                        f"/v1/pokemon/battle/{battle_id}/stream"
+                    ),
+                    battle_id,
+                )
+                events = [
+                    event async for event in response.streaming_content
+                ]
+
+                missing = str(uuid7())
+                not_found = await battle_status_stream(
+                    factory.get(f"/v1/pokemon/battle/{missing}/stream"),
+                    missing,
+                )
+
+        get_battle_status.assert_not_called()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(len(events), 1)
+        self.assertIn('"status": "DRAW"', events[0].decode())
+        self.assertEqual(not_found.status_code, 404)
+
+
+class AsyncViewTests(DatabaseTestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+    async def test_pokemon_list(self):
+        from pokemon.async_views import pokemon_list
+        from pokemon.views import query_pokemon
+
+        expected = [row["name"] for row in query_pokemon(None, 5, 0)]
+        async with async_services():
+            response = await pokemon_list(
+                self.factory.get("/v1/pokemon/list", {"limit": 5})
+            )
+            body = json.loads(response.content)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(
+                response["ETag"].startswith('W/"pokemon-list-')
+            )
+            self.assertEqual(
+                [row["name"] for row in body["data"]], expected
+            )
+            self.assertTrue(body["has_next"])
+
+            response = await pokemon_list(
+                self.factory.get(
+                    "/v1/pokemon/list", {"limit": 5, "cursor": ""}
+                )
+            )
+            body = json.loads(response.content)
+            self.assertEqual(
+                [row["name"] for row in body["data"]], expected
+            )
+
+            response = await pokemon_list(
+                self.factory.get(
+                    "/v1/pokemon/list",
+                    {"limit": 5, "cursor": body["next_cursor"]},
+                )
+            )
+            body = json.loads(response.content)
+            self.assertEqual(
+                [row["name"] for row in body["data"]],
+                [row["name"] for row in query_pokemon(None, 5, 5)],
+            )
+
+    async def test_create_inline_battle_and_read_its_status(self):
+        from pokemon.async_views import battle_status, create_battle
+
+        async with async_services():
+            response = await create_battle(
+                self.factory.post(
+                    "/v1/pokemon/battle?inline=true",
+                    {
+                        "pokemon_a": self.names[0].lower(),
+                        "pokemon_b": self.names[1],
+                    },
+                    content_type="application/json",
+                )
+            )
+            self.assertEqual(response.status_code, 200)
+            created = json.loads(response.content)
+
+            response = await battle_status(
+                self.factory.get(
+                    f"/v1/pokemon/battle/{created['battle_id']}"
+                ),
+                created["battle_id"],
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                json.loads(response.content)["data"], created["data"]
+            )
+            self.assertIn("immutable", response["Cache-Control"])
+
+    async def test_create_queued_battle(self):
+        from pokemon.async_views import battle_status, create_battle
+        from pokemon.views import perform_battle_task
+
+        async with async_services():
+            with mock.patch.object(
+                perform_battle_task, "apply_async"
+            ) as apply_async:
+                response = await create_battle(
+                    self.factory.post(
+                        "/v1/pokemon/battle?inline=false",
+                        {
+                            "pokemon_a": self.names[2],
+                            "pokemon_b": self.names[3],
+                        },
+                        content_type="application/json",
+                    )
+                )
+            self.assertEqual(response.status_code, 202)
+            battle_id = json.loads(response.content)["battle_id"]
+            self.assertEqual(
+                str(
+                    apply_async.call_args.kwargs["kwargs"]["battle_id"]
+                ),
+                battle_id,
+            )
+
+            response = await battle_status(
+                self.factory.get(f"/v1/pokemon/battle/{battle_id}"),
+                battle_id,
+            )
+            self.assertEqual(
+                json.loads(response.content)["data"],
+                {"status": "BATTLE_INPROGRESS", "result": None},
+            )
+
+    async def test_errors(self):
+        from pokemon.async_views import battle_status, create_battle
+
+        async with async_services():
+            battle_id = str(uuid7())
+            response = await battle_status(
+                self.factory.get(f"/v1/pokemon/battle/{battle_id}"),
+                battle_id,
+            )
+            self.assertEqual(response.status_code, 404)
+
+            response = await create_battle(
+                self.factory.post(
+                    "/v1/pokemon/battle",
+                    {"pokemon_a": self.names[0]},
+                    content_type="application/json",
+                )
+            )
+            self.assertEqual(response.status_code, 400)
+
+    async def test_run_blocking_releases_the_db_session(self):
+        from pokemon.async_views import run_blocking
+
+        def leave_transaction_open():
+            settings.DB_SESSION.execute(text("SELECT 1"))
+
+        checked_out = settings.ENGINE.pool.checkedout()
+        await run_blocking(leave_transaction_open)
+        self.assertEqual(settings.ENGINE.pool.checkedout(), checked_out)
+
+
+class IdempotencyTests(DatabaseTestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+    def battle_request(self, key: str, pokemon_b: int = 1):
+        return self.factory.post(
+            "/v1/pokemon/battle?inline=true",
+            {
+                "pokemon_a": self.names[0],
+                "pokemon_b": self.names[pokemon_b],
+            },
+            content_type="application/json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def battle_count(self) -> int:
+        with settings.ENGINE.connect() as connection:
+            return connection.execute(
+                text("SELECT COUNT(*) FROM battle")
+            ).scalar()
+
+    async def test_retries_get_the_first_response(self):
+        from pokemon.async_views import create_battle
+
+        async with async_services():
+            key = str(uuid7())
+            first = await create_battle(self.battle_request(key))
+            count = self.battle_count()
+
+            retry = await create_battle(self.battle_request(key))
+            self.assertEqual(retry.status_code, first.status_code)
+            self.assertEqual(retry["Idempotent-Replayed"], "true")
+            self.assertEqual(
+                json.loads(retry.content)["battle_id"],
+                json.loads(first.content)["battle_id"],
+            )
+            self.assertEqual(self.battle_count(), count)
+
+    async def test_a_different_request_with_the_same_key_conflicts(
+        self,
+    ):
+        from pokemon.async_views import create_battle
+
+        async with async_services():
+            key = str(uuid7())
+            await create_battle(self.battle_request(key))
+            count = self.battle_count()
+
+            response = await create_battle(
+                self.battle_request(key, pokemon_b=2)
+            )
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(self.battle_count(), count)
+
+    async def test_pending_until_the_view_returns(self):
+        from django.http import JsonResponse
+
+        from battle_simulator.utils.idempotency import (
+            idempotency_cache_key,
+            idempotent,
+        )
+        from pokemon.async_views import api_view
+
+        key = str(uuid7())
+        cache_key = idempotency_cache_key("test", key)
+        records = []
+
+        @api_view("TEST")
+        @idempotent("test")
+        async def view(request):
+            records.append(json.loads(self.redis.get(cache_key)))
+            # A retry while the first request runs
+            retry = await view(self.battle_request(key))
+            return JsonResponse(
+                {"retry": retry.status_code}, status=201
+            )
+
+        async with async_services():
+            response = await view(self.battle_request(key))
+
+        self.assertEqual(records[0]["status"], None)
+        self.assertEqual(json.loads(response.content), {"retry": 409})
+        record = json.loads(self.redis.get(cache_key))
+        self.assertEqual(record["status"], 201)
+        self.assertEqual(json.loads(record["content"]), {"retry": 409})
+        self.assertEqual(
+            record["fingerprint"], records[0]["fingerprint"]
+        )
+
+    async def test_failed_requests_release_the_key(self):
+        from battle_simulator.utils.idempotency import (
+            idempotency_cache_key,
+        )
+        from pokemon.async_views import create_battle
+
+        async with async_services():
+            key = str(uuid7())
+            response = await create_battle(
+                self.factory.post(
+                    "/v1/pokemon/battle?inline=true",
+                    {"pokemon_a": self.names[0]},
+                    content_type="application/json",
+                    headers={"Idempotency-Key": key},
+                )
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIsNone(
+                self.redis.get(idempotency_cache_key("battle", key))
+            )
+
+            response = await create_battle(self.battle_request(key))
+            self.assertEqual(response.status_code, 200)
+
+
+class InflightBattleTests(DatabaseTestCase):
+    def setUp(self):
+        from pokemon.views import perform_battle_task
+
+        self.factory = AsyncRequestFactory()
+        for key in self.redis.scan_iter("inflight:*"):
+            self.redis.delete(key)
+        patcher = mock.patch.object(perform_battle_task, "apply_async")
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def submit(self, **data) -> str:
+        from pokemon.async_views import create_battle
+
+        response = await create_battle(
+            self.factory.post(
+                "/v1/pokemon/battle?inline=false",
+                {
+                    "pokemon_a": self.names[4],
+                    "pokemon_b": self.names[5],
+                    **data,
+                },
+                content_type="application/json",
+            )
+        )
+        self.assertEqual(response.status_code, 202)
+        return json.loads(response.content)["battle_id"]
+
+    def battle_count(self) -> int:
+        with settings.ENGINE.connect() as connection:
+            return connection.execute(
+                text("SELECT COUNT(*) FROM battle")
+            ).scalar()
+
+    async def test_identical_submissions_join_the_queued_battle(self):
+        async with async_services():
+            battle_id = await self.submit(engine="classic")
+            count = self.battle_count()
+
+            self.assertEqual(
+                await self.submit(engine="classic"), battle_id
+            )
+            self.assertEqual(self.battle_count(), count)
+            self.assertEqual(self.apply_async.call_count, 1)
+
+            # A different battle is queued on its own
+            self.assertNotEqual(
+                await self.submit(pokemon_b=self.names[6]), battle_id
+            )
+
+    async def test_only_deterministic_battles_are_joined(self):
+        async with async_services():
+            seeded = await self.submit(engine="turn_based", seed=7)
+            self.assertEqual(
+                await self.submit(engine="turn_based", seed=7), seeded
+            )
+            self.assertNotEqual(
+                await self.submit(engine="turn_based", seed=8), seeded
+            )
+            self.assertNotEqual(
+                await self.submit(engine="turn_based"),
+                await self.submit(engine="turn_based"),
+            )
+
+    async def test_a_finished_battle_is_no_longer_joined(self):
+        from pokemon.async_views import run_blocking
+        from pokemon.views import perform_battle_task
+
+        async with async_services():
+            battle_id = await self.submit(engine="classic")
+            await run_blocking(
+                perform_battle_task,
+                **self.apply_async.call_args.kwargs["kwargs"],
+            )
+            self.assertNotEqual(
+                await self.submit(engine="classic"), battle_id
+            )
+
+
+class OutcomeCacheTests(SimpleTestCase):
+    def test_hits_and_least_recently_used_eviction(self):
+        from pokemon.outcome_cache import OutcomeCache
+
+        cache = OutcomeCache(maxsize=2)
+        cache.put("a", {"winner_name": "a"})
+        cache.put("b", {"winner_name": "b"})
+        self.assertEqual(cache.get("a"), {"winner_name": "a"})
+
+        # "b" is now the least recently used
+        cache.put("c", {"winner_name": "c"})
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+        stats = cache.snapshot()
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_zero_size_disables_the_cache(self):
+        from pokemon.outcome_cache import OutcomeCache
+
+        cache = OutcomeCache(maxsize=0)
+        cache.put("a", {})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class ResolveBattleCacheTests(DatabaseTestCase):
+    def setUp(self):
+        from pokemon.outcome_cache import outcome_cache
+
+        outcome_cache.clear()
+
+    def test_only_seeded_turn_based_outcomes_are_cached(self):
+        from pokemon.outcome_cache import outcome_cache
+        from pokemon.views import resolve_battle
+
+        pokemon_a, pokemon_b = self.names[:2]
+        resolve_battle(pokemon_a, pokemon_b)
+        resolve_battle(pokemon_a, pokemon_b, engine="turn_based")
+        self.assertEqual(len(outcome_cache), 0)
+
+        first = resolve_battle(
+            pokemon_a, pokemon_b, engine="turn_based", seed=3
+        )
+        hits = outcome_cache.snapshot()["hits"]
+        self.assertEqual(
+            resolve_battle(
+                pokemon_a, pokemon_b, engine="turn_based", seed=3
+            ),
+            first,
+        )
+        self.assertEqual(len(outcome_cache), 1)
+        self.assertEqual(outcome_cache.snapshot()["hits"], hits + 1)
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        from battle_simulator.utils.pagination import (
+            decode_cursor,
+            encode_cursor,
+        )
+
+        key = [1, 137, "Flabébé"]
+        cursor = encode_cursor(key)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), key)
+        self.assertEqual(decode_cursor(""), [])
+
+    def test_invalid_cursors_fail_validation(self):
+        from battle_simulator.utils.pagination import (
+            decode_cursor,
+            encode_cursor,
+        )
+
+        for cursor in ("not a cursor", "e30", encode_cursor({"a": 1})):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ce.ValidationFailed):
+                    decode_cursor(cursor)
+
+
+class NameIndexTests(SimpleTestCase):
+    def setUp(self):
+        import random
+
+        from benchmarks.spell_checker import (
+            generate_names,
+            make_queries,
+        )
+
+        rng = random.Random(7)
+        self.names = generate_names(300, rng)
+        self.queries = make_queries(self.names, 200, rng)
+
+    def assertMatchesDifflib(self, index):
+        from benchmarks.spell_checker import difflib_match
+
+        for kind, words in self.queries.items():
+            for word in words:
+                with self.subTest(kind=kind, word=word):
+                    self.assertEqual(
+                        index.match(word),
+                        difflib_match(word, self.names),
+                    )
+
+    def test_matches_difflib(self):
+        from pokemon.name_index import NameIndex
+
+        self.assertMatchesDifflib(NameIndex(self.names, cutoff=0.8))
+
+    def test_snapshot_round_trip(self):
+        import os
+        import tempfile
+
+        from pokemon.name_index import (
+            NameIndex,
+            load_name_index,
+            save_name_index,
+        )
+
+        path = os.path.join(tempfile.mkdtemp(), "names.idx")
+        save_name_index(NameIndex(self.names, version="3"), path)
+
+        index = load_name_index(path)
+        self.assertEqual(index.version, "3")
+        self.assertMatchesDifflib(index)
+
+
+class SpellCheckerTests(DatabaseTestCase):
+    def setUp(self):
+        import os
+        import tempfile
+
+        spell_checker._checker = None
+        self.path = os.path.join(tempfile.mkdtemp(), "names.idx")
+
+    def test_rebuilt_for_a_new_roster_version(self):
+        from pokemon.spell_checker import get_spell_checker
+
+        with self.settings(
+            NAME_INDEX_PATH=self.path, ROSTER_VERSION_CHECK_INTERVAL=0
+        ):
+            checker = get_spell_checker()
+            self.assertIs(get_spell_checker(), checker)
+            self.assertEqual(
+                checker.check_spelling(self.names[0].upper()),
+                self.names[0].lower(),
+            )
+
+            row = named_like(synthetic_pokemon(1)[0], "Zzyzxmon")
+            with settings.ENGINE.begin() as connection:
+                connection.execute(insert(Pokemon), [row])
+            try:
+                bump_roster_version()
+                self.assertEqual(
+                    get_spell_checker().check_spelling("zzyzxmon"),
+                    "zzyzxmon",
+                )
+            finally:
+                with settings.ENGINE.begin() as connection:
+                    connection.execute(
+                        delete(Pokemon).where(
+                            Pokemon.name == "Zzyzxmon"
+                        )
+                    )
+                bump_roster_version()
+
+            with self.assertRaises(ce.InvalidPokemon):
+                get_spell_checker().check_spelling("zzyzxmon")
+
+    def test_a_current_snapshot_skips_the_database(self):
+        from pokemon.name_index import NameIndex, save_name_index
+        from pokemon.roster import fetch_roster_version
+        from pokemon.spell_checker import get_spell_checker
+
+        save_name_index(
+            NameIndex(["currentmon"], version=fetch_roster_version()),
+            self.path,
+        )
+        with self.settings(NAME_INDEX_PATH=self.path), mock.patch(
+            "pokemon.spell_checker.get_roster"
+        ) as get_roster:
+            self.assertEqual(
+                get_spell_checker().check_spelling("currentmon"),
+                "currentmon",
+            )
+        get_roster.assert_not_called()
+
+    def test_ignores_a_snapshot_of_another_version(self):
+        from pokemon.name_index import NameIndex, save_name_index
+        from pokemon.spell_checker import get_spell_checker
+
+        save_name_index(
+            NameIndex(["stalemon"], version="stale"), self.path
+        )
+        with self.settings(NAME_INDEX_PATH=self.path):
+            checker = get_spell_checker()
+        with self.assertRaises(ce.InvalidPokemon):
+            checker.check_spelling("stalemon")
+        self.assertEqual(
+            checker.check_spelling(self.names[0]), self.names[0].lower()
+        )
+
+
+class ETagTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_etag_matches(self):
+        from battle_simulator.utils.http_cache import etag_matches
+
+        etag = 'W/"pokemon-list-3"'
+        for header, expected in (
+            (None, False),
+            ('W/"pokemon-list-3"', True),
+            ('"pokemon-list-3"', True),
+            ('"other", W/"pokemon-list-3"', True),
+            ('W/"pokemon-list-2"', False),
+            ("*", False),
+        ):
+            with self.subTest(header=header):
+                headers = {"If-None-Match": header} if header else {}
+                request = self.factory.get("/", headers=headers)
+                self.assertEqual(etag_matches(request, etag), expected)
+
+    def test_conditional(self):
+        from django.http import HttpResponse
+
+        from battle_simulator.utils.http_cache import conditional
+
+        calls = []
+
+        @conditional(lambda request: '"v1"', max_age=60)
+        def view(request):
+            calls.append(request)
+            return HttpResponse("body")
+
+        response = view(self.factory.get("/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertEqual(response["Cache-Control"], "max-age=60")
+
+        response = view(
+            self.factory.get("/", headers={"If-None-Match": '"v1"'})
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertEqual(len(calls), 1)
+
+
+class LeaderboardDeltaTests(SimpleTestCase):
+    def test_result_deltas(self):
+        from pokemon.leaderboard import result_deltas
+
+        deltas = result_deltas(
+            [
+                {
+                    "pokemon_a": "Ekans",
+                    "pokemon_b": "Pikachu",
+                    "status": "BATTLE_COMPLETED",
+                    "winner_name": "ekans",
+                    "won_by_margin": 7.5,
+                },
+                {
+                    "pokemon_a": "pikachu",
+                    "pokemon_b": "ekans",
+                    "status": "BATTLE_COMPLETED",
+                    "winner_name": "Pikachu",
+                    "won_by_margin": 2,
+                },
+                {
+                    "pokemon_a": "Ekans",
+                    "pokemon_b": "Onix",
+                    "status": "DRAW",
+                },
+                {
+                    "pokemon_a": "Ekans",
+                    "pokemon_b": "Onix",
+                    "status": "BATTLE_FAILED",
+                },
+                {"pokemon_a": "Ekans", "status": "DRAW"},
+            ]
+        )
+
+        self.assertEqual(
+            dict(deltas),
+            {
+                "ekans": [1, 1, 1, 7.5],
+                "pikachu": [1, 1, 0, 2.0],
+                "onix": [0, 0, 1, 0.0],
+            },
+        )
+
+
+class LeaderboardRebuildTests(DatabaseTestCase):
+    def setUp(self):
+        from pokemon.leaderboard import REBUILD_KEY
+
+        for key in self.redis.scan_iter("leaderboard:*"):
+            self.redis.delete(key)
+        settings.ENGINE.dispose()
+        with settings.ENGINE.begin() as connection:
+            connection.execute(delete(Battle))
+        self.redis.delete(REBUILD_KEY)
+        self.finished = []
+
+    def finish_battle(self, index: int) -> dict:
+        """Insert a battle between two Pokemon and finish it."""
+        from pokemon.views import insert_battle, update_battle
+
+        pokemon_a = self.names[index % 5]
+        pokemon_b = self.names[index % 5 + 5]
+        battle = {
+            "battle_id": str(uuid7()),
+            "pokemon_a": pokemon_a,
+            "pokemon_b": pokemon_b,
+            "status": "DRAW" if index % 3 == 0 else "BATTLE_COMPLETED",
+            "winner_name": None if index % 3 == 0 else pokemon_b,
+            "won_by_margin": None if index % 3 == 0 else index * 1.5,
+        }
+        insert_battle(
+            battle["battle_id"],
+            pokemon_a,
+            pokemon_b,
+            "BATTLE_INPROGRESS",
+        )
+        update_battle(
+            battle["battle_id"],
+            battle["status"],
+            battle["winner_name"],
+            battle["won_by_margin"],
+            pokemon_a,
+            pokemon_b,
+        )
+        self.finished.append(battle)
+        return battle
+
+    def assertLeaderboardMatches(self, totals: dict):
+        from pokemon.leaderboard import (
+            LEADERBOARD_KEYS,
+            STAT_FIELDS,
+            stats_key,
+        )
+
+        self.assertEqual(
+            set(self.redis.zrange(LEADERBOARD_KEYS["wins"], 0, -1)),
+            set(totals),
+        )
+        for name, values in totals.items():
+            with self.subTest(name=name):
+                stats = self.redis.hgetall(stats_key(name))
+                self.assertEqual(
+                    [float(stats[field]) for field in STAT_FIELDS],
+                    [float(each) for each in values],
+                )
+                self.assertEqual(
+                    self.redis.zscore(LEADERBOARD_KEYS["wins"], name),
+                    values[0],
+                )
+
+    def test_recorded_results_match_the_sql_totals(self):
+        from pokemon.leaderboard import (
+            load_battle_totals,
+            result_deltas,
+        )
+
+        for index in range(12):
+            self.finish_battle(index)
+
+        totals = load_battle_totals()
+        self.assertEqual(
+            dict(result_deltas(self.finished)), dict(totals)
+        )
+        self.assertLeaderboardMatches(totals)
+
+    def test_rebuild_keeps_results_recorded_meanwhile(self):
+        from pokemon import leaderboard
+
+        for index in range(6):
+            self.finish_battle(index)
+        # A result Redis missed, for the rebuild to repair
+        self.redis.delete(leaderboard.stats_key(self.names[0].lower()))
+
+        battle_totals = leaderboard._battle_totals
+        load_finished_battles = leaderboard.load_finished_battles
+        snapshot = set()
+
+        def finishing_battles_meanwhile():
+            # Recorded during the rebuild, seen by the recount
+            self.finish_battle(6)
+            totals = battle_totals()
+            snapshot.update(each["battle_id"] for each in self.finished)
+            # Recorded during the rebuild, after the recount
+            self.finish_battle(7)
+            self.finish_battle(8)
+            return totals
+
+        def in_snapshot(battle_ids):
+            # SQLite reads every query afresh, where the recount's
+            # REPEATABLE READ transaction on MySQL sees its snapshot
+            rows = load_finished_battles(battle_ids)
+            if not snapshot:
+                return rows
+            seen = [
+                each for each in rows if each["battle_id"] in snapshot
+            ]
+            snapshot.clear()
+            return seen
+
+        with mock.patch.multiple(
+            leaderboard,
+            _battle_totals=finishing_battles_meanwhile,
+            load_finished_battles=in_snapshot,
+        ):
+            self.assertEqual(
+                leaderboard.rebuild_leaderboard(),
+                len(leaderboard.result_deltas(self.finished[:7])),
+            )
+
+        totals = leaderboard.load_battle_totals()
+        self.assertEqual(
+            dict(leaderboard.result_deltas(self.finished)), dict(totals)
+        )
+        self.assertLeaderboardMatches(totals)
+        self.assertFalse(
+            self.redis.exists(
+                leaderboard.REBUILD_KEY,
+                leaderboard.REBUILD_BATTLES_KEY,
+                *leaderboard.REBUILT_KEYS.values(),
+            )
+        )
+
+    def test_one_rebuild_at_a_time(self):
+        from pokemon.leaderboard import REBUILD_KEY, rebuild_leaderboard
+
+        self.redis.set(REBUILD_KEY, 1)
+        with self.assertRaises(RuntimeError):
+            rebuild_leaderboard()
+        self.assertTrue(self.redis.exists(REBUILD_KEY))
+
+
+class MatchupTableTests(SimpleTestCase):
+    def test_margins_match_classic_battles(self):
+        from pokemon.matchups import build_matchup_table
+
+        rows = synthetic_pokemon(40)
+        roster = synthetic_roster(40)
+        table = build_matchup_table(roster)
+
+        def classic_damage(poke_a, poke_b):
+            # perform_battle_task's per-pair arithmetic
+            against_type1_b = poke_b.get(
+                f"against_{poke_a['type1']}", 1
+            )
+            against_type2_b = poke_b.get(
+                f"against_{poke_a['type2']}", 1
+            )
+            return (poke_a["attack"] / 200) * 100 - (
+                ((against_type1_b / 4) * 100)
+                + ((against_type2_b / 4) * 100)
+            )
+
+        self.assertEqual(table.margins.shape, (40, 40))
+        for a, poke_a in enumerate(rows):
+            for b, poke_b in enumerate(rows):
+                self.assertEqual(
+                    table.margins[a, b],
+                    roster.damage(a, b) - roster.damage(b, a),
+                )
+                self.assertEqual(
+                    table.margins[a, b],
+                    classic_damage(poke_a, poke_b)
+                    - classic_damage(poke_b, poke_a),
+                )
+
+    def test_top_k(self):
+        from pokemon.matchups import MatchupTable
+
+        # margins[a, b] > 0 when a beats b
+        margins = np.array(
+            [
+                [0.0, 2.0, -1.0, 2.0, np.nan],
+                [-2.0, 0.0, 0.0, 3.0, 1.0],
+                [1.0, 0.0, 0.0, 2.0, 4.0],
+                [-2.0, -3.0, -2.0, 0.0, 2.0],
+                [np.nan, -1.0, -4.0, -2.0, 0.0],
+            ]
+        )
+        table = MatchupTable(list("abcde"), margins)
+
+        # Best first, ties in row order, no draws, losses or NaN
+        self.assertEqual(table.targets(0, 5), [(1, 2.0), (3, 2.0)])
+        self.assertEqual(
+            table.targets(2, 5), [(4, 4.0), (3, 2.0), (0, 1.0)]
+        )
+        self.assertEqual(
+            table.counters(3, 5), [(1, 3.0), (0, 2.0), (2, 2.0)]
+        )
+        self.assertEqual(
+            table.counters(4, 5), [(2, 4.0), (3, 2.0), (1, 1.0)]
+        )
+
+        # At most k rows, the tie at the k-th margin broken by row order
+        self.assertEqual(table.counters(3, 2), [(1, 3.0), (0, 2.0)])
+        self.assertEqual(table.targets(0, 1), [(1, 2.0)])
+
+        mask = np.array([True, False, True, True, True])
+        self.assertEqual(
+            table.counters(3, 2, mask), [(0, 2.0), (2, 2.0)]
+        )
+
+    def test_top_k_matches_sorting(self):
+        from pokemon.matchups import build_matchup_table
+
+        table = build_matchup_table(synthetic_roster(40))
+        for row in (0, 7, 39):
+            for k in (1, 5, 40, 100):
+                with self.subTest(row=row, k=k):
+                    for relation, margins in (
+                        ("counters", table.margins[:, row]),
+                        ("targets", table.margins[row, :]),
+                    ):
+                        expected = sorted(
+                            (
+                                (index, float(margin))
+                                for index, margin in enumerate(margins)
+                                if margin > 0 and index != row
+                            ),
+                            key=lambda each: (-each[1], each[0]),
+                        )[:k]
+                        ranked = getattr(table, relation)(row, k)
+
+                        self.assertEqual(ranked, expected)
+                        self.assertLessEqual(len(ranked), k)
+
+
+class MatchupViewTests(DatabaseTestCase):
+    def test_counters_and_targets(self):
+        from pokemon.matchups import get_matchup_table
+
+        table = get_matchup_table()
+        row = table.lookup(self.names[0])
+        for relation in ("counters", "targets"):
+            with self.subTest(relation=relation):
+                response = self.client.get(
+                    f"/v1/pokemon/{self.names[0]}/{relation}", {"k": 3}
+                )
+                self.assertEqual(response.status_code, 200)
+
+                data = response.json()["data"]
+                self.assertEqual(
+                    [
+                        (
+                            table.lookup(each["name"]),
+                            each["wonByMargin"],
+                        )
+                        for each in data
+                    ],
+                    getattr(table, relation)(row, 3),
+                )
+                self.assertLessEqual(len(data), 3)
+
+    def test_k_must_be_positive(self):
+        for k in ("0", "-1", "many"):
+            with self.subTest(k=k):
+                response = self.client.get(
+                    f"/v1/pokemon/{self.names[0]}/counters", {"k": k}
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class TournamentTests(SimpleTestCase):
+    def test_standings(self):
+        from pokemon.tournaments import TournamentResult
+
+        # 0 beats 1 by 5, 1 draws 2, 2 beats 0 by 3, 1 v 0 unresolved
+        result = TournamentResult(
+            participants=np.arange(3),
+            rounds=1,
+            match_round=np.ones(4, dtype=np.int64),
+            match_a=np.array([0, 1, 0, 1]),
+            match_b=np.array([1, 2, 2, 0]),
+            match_margin=np.array([5.0, 0.0, -3.0, np.nan]),
+        )
+        standings = result.standings()
+
+        self.assertEqual(standings["order"].tolist(), [2, 0, 1])
+        self.assertEqual(standings["points"].tolist(), [1.5, 1.0, 0.5])
+        self.assertEqual(standings["played"].tolist(), [2, 2, 2])
+        self.assertEqual(standings["wins"].tolist(), [1, 1, 0])
+        self.assertEqual(standings["draws"].tolist(), [1, 0, 1])
+        self.assertEqual(standings["losses"].tolist(), [0, 1, 1])
+        self.assertEqual(standings["margin"].tolist(), [3.0, 2.0, -5.0])
+
+    def test_formats(self):
+        from pokemon.tournaments import run_tournament
+
+        roster = synthetic_roster(12)
+        names = roster.names[:7]
+
+        result = run_tournament(roster, "round_robin", chunk_size=3)
+        self.assertEqual(len(result), 12 * 11 // 2)
+        self.assertEqual(
+            result.standings()["played"].tolist(), [11] * 12
+        )
+
+        result = run_tournament(roster, "single_elimination", names)
+        self.assertEqual(len(result), len(names) - 1)
+        self.assertEqual(result.byes.sum(), 1)
+
+        result = run_tournament(roster, "swiss", names, rounds=3)
+        self.assertEqual(len(result), 3 * 3)
+        self.assertEqual(result.byes.sum(), 3)
+        self.assertEqual(
+            sorted(result.standings()["order"].tolist()),
+            list(range(len(names))),
+        )
+
+        with self.assertRaises(ValueError):
+            run_tournament(roster, "swiss", [names[0], names[0]])
+
+
+class BattleEngineTests(SimpleTestCase):
+    def test_engines_must_implement_margins(self):
+        from pokemon.engines import BattleEngine
+
+        class NoRules(BattleEngine):
+            name = "no_rules"
+
+        with self.assertRaises(TypeError):
+            BattleEngine()
+        with self.assertRaises(TypeError):
+            NoRules()
+
+
+class TurnBasedEngineTests(SimpleTestCase):
+    def test_seeded_battles_are_deterministic(self):
+        from pokemon.engines import get_engine
+
+        engine = get_engine("turn_based")
+        roster = synthetic_roster(20)
+        pokemon_a = np.arange(0, 10)
+        pokemon_b = np.arange(10, 20)
+
+        def play(seed):
+            return engine.margins(
+                roster,
+                pokemon_a,
+                pokemon_b,
+                trials=25,
+                rng=np.random.default_rng(seed),
+            )
+
+        first = play(11)
+        self.assertEqual(first.shape, (10, 25))
+        np.testing.assert_array_equal(first, play(11))
+        self.assertFalse(np.array_equal(first, play(12)))
@@ -0,0 +1,404 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from pokemon.matchups import pair_margins
+from pokemon.roster import Roster
+
+FORMATS = ("round_robin", "swiss", "single_elimination")
+
+
+class TournamentResult:
+    """
+    Every match of a tournament and the standings they produce.
+
+    Matches are parallel arrays in play order. ``match_a`` and ``match_b``
+    hold positions in ``participants`` (itself an array of roster rows),
+    and ``match_margin`` follows MatchupTable.margins: positive when ``a``
+    wins, negative when ``b`` wins, zero on a draw and NaN when the match
+    could not be resolved. ``byes`` counts the byes of each participant.
+    """
+
+    def __init__(
+        self,
+        participants: np.ndarray,
+        rounds: int,
+        match_round: np.ndarray,
+        match_a: np.ndarray,
+        match_b: np.ndarray,
+        match_margin: np.ndarray,
+        byes: Optional[np.ndarray] = None,
+    ):
+        self.participants = participants
+        self.rounds = rounds
+        self.match_round = match_round
+        self.match_a = match_a
+        self.match_b = match_b
+        self.match_margin = match_margin
+        self.byes = (
+            byes
+            if byes is not None
+            else np.zeros(len(participants), dtype=np.int64)
+        )
+
+    def __len__(self):
+        return len(self.match_margin)
+
+    def standings(self) -> dict:
+        """
+        Per-participant totals in rank order.
+
+        A win or a bye is worth one point and a draw half a point. Ties
+        are broken by the summed margin, then by participant order.
+
+        Returns:
+        dict: Arrays order (participant positions), played, wins, draws, losses, points and margin, all in rank order.
+        """
+        size = len(self.participants)
+        margin = self.match_margin
+        played = ~np.isnan(margin)
+
+        a, b, margin = (
+            self.match_a[played],
+            self.match_b[played],
+            margin[played],
+        )
+
+        def count(positions, mask=None):
+            return np.bincount(
+                positions if mask is None else positions[mask],
+                minlength=size,
+            )
+
+        wins = count(a, margin > 0) + count(b, margin < 0)
+        draws = count(a, margin == 0) + count(b, margin == 0)
+        losses = count(a, margin < 0) + count(b, margin > 0)
+        margins = np.bincount(
+            a, weights=margin, minlength=size
+        ) - np.bincount(b, weights=margin, minlength=size)
+        points = wins + self.byes + draws / 2
+
+        # lexsort sorts by its last key first
+        order = np.lexsort((np.arange(size), -margins, -points))
+
+        return {
+            "order": order,
+            "played": (wins + draws + losses)[order],
+            "wins": wins[order],
+            "draws": draws[order],
+            "losses": losses[order],
+            "points": points[order],
+            "margin": margins[order],
+        }
+
+
+def _round_robin_chunk(
+    roster: Roster, participants: np.ndarray, start: int, stop: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Margins of every pair (i, j) with start <= i < stop and i < j."""
+    rows = np.arange(start, stop)
+    pair_i, pair_j = np.nonzero(
+        np.arange(len(participants))[np.newaxis, :]
+        > rows[:, np.newaxis]
+    )
+    pair_i = rows[pair_i]
+
+    return (
+        pair_i,
+        pair_j,
+        pair_margins(
+            roster, participants[pair_i], participants[pair_j]
+        ),
+    )
+
+
+_worker_roster = None
+
+
+def _init_worker(roster: Roster):
+    global _worker_roster
+
+    _worker_roster = roster
+
+
+def _round_robin_worker(
+    participants: np.ndarray, start: int, stop: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return _round_robin_chunk(_worker_roster, participants, start, stop)
+
+
+def round_robin(
+    roster: Roster,
+    participants: np.ndarray,
+    chunk_size: int = 256,
+    workers: int = 1,
+) -> TournamentResult:
+    """
+    Every participant plays every other one once, as a single round.
+
+    The pairs are split into chunks of ``chunk_size`` participants, each
+    resolved in one vectorized pass. With ``workers`` > 1 the chunks are
+    spread over a process pool.
+    """
+    size = len(participants)
+    bounds = [
+        (start, min(start + chunk_size, size))
+        for start in range(0, size, chunk_size)
+    ]
+
+    # Daemonic processes (e.g. Celery prefork workers) cannot have children
+    if multiprocessing.current_process().daemon:
+        workers = 1
+
+    if workers > 1 and len(bounds) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(bounds)),
+            initializer=_init_worker,
+            initargs=(roster,),
+        ) as executor:
+            chunks = list(
+                executor.map(
+                    _round_robin_worker,
+                    [participants] * len(bounds),
+                    *zip(*bounds),
+                )
+            )
+    else:
+        chunks = [
+            _round_robin_chunk(roster, participants, start, stop)
+            for start, stop in bounds
+        ]
+
+    match_a, match_b, match_margin = (
+        np.concatenate(columns) for columns in zip(*chunks)
+    )
+
+    return TournamentResult(
+        participants=participants,
+        rounds=1,
+        match_round=np.ones(len(match_margin), dtype=np.int64),
+        match_a=match_a,
+        match_b=match_b,
+        match_margin=match_margin,
+    )
+
+
+def swiss(
+    roster: Roster,
+    participants: np.ndarray,
+    rounds: Optional[int] = None,
+) -> TournamentResult:
+    """
+    Swiss system: every round pairs participants with equal or close
+    scores who have not met yet.
+
+    ``rounds`` defaults to ceil(log2(participants)). With an odd number of
+    participants the lowest ranked one without a bye sits out the round
+    and scores a point.
+    """
+    size = len(participants)
+    if rounds is None:
+        rounds = max(1, math.ceil(math.log2(size)))
+
+    points = np.zeros(size)
+    margins = np.zeros(size)
+    byes = np.zeros(size, dtype=np.int64)
+    met = set()
+    match_round, match_a, match_b, match_margin = [], [], [], []
+
+    for round_no in range(1, rounds + 1):
+        ranking = np.lexsort(
+            (np.arange(size), -margins, -points)
+        ).tolist()
+
+        if size % 2:
+            bye = next(
+                (each for each in reversed(ranking) if not byes[each]),
+                ranking[-1],
+            )
+            ranking.remove(bye)
+            byes[bye] += 1
+            points[bye] += 1
+
+        pairs = []
+        while ranking:
+            first = ranking.pop(0)
+            # Closest ranked opponent not met yet, else the closest one
+            opponent = next(
+                (
+                    each
+                    for each in ranking
+                    if (min(first, each), max(first, each)) not in met
+                ),
+                ranking[0],
+            )
+            ranking.remove(opponent)
+            met.add((min(first, opponent), max(first, opponent)))
+            pairs.append((first, opponent))
+
+        pair_a = np.array([each[0] for each in pairs], dtype=np.int64)
+        pair_b = np.array([each[1] for each in pairs], dtype=np.int64)
+        outcome = pair_margins(
+            roster, participants[pair_a], participants[pair_b]
+        )
+
+        resolved = ~np.isnan(outcome)
+        np.add.at(points, pair_a, (outcome > 0) + (outcome == 0) / 2)
+        np.add.at(points, pair_b, (outcome < 0) + (outcome == 0) / 2)
+        np.add.at(margins, pair_a[resolved], outcome[resolved])
+        np.add.at(margins, pair_b[resolved], -outcome[resolved])
+
+        match_round.append(
+            np.full(len(pairs), round_no, dtype=np.int64)
+        )
+        match_a.append(pair_a)
+        match_b.append(pair_b)
+        match_margin.append(outcome)
+
+    return TournamentResult(
+        participants=participants,
+        rounds=rounds,
+        match_round=np.concatenate(match_round),
+        match_a=np.concatenate(match_a),
+        match_b=np.concatenate(match_b),
+        match_margin=np.concatenate(match_margin),
+        byes=byes,
+    )
+
+
+def bracket_order(size: int) -> List[int]:
+    """Seed (0-based) at each slot of a standard bracket of ``size``."""
+    order = [0]
+    while len(order) < size:
+        order = [
+            seed
+            for each in order
+            for seed in (each, len(order) * 2 - 1 - each)
+        ]
+    return order
+
+
+def single_elimination(
+    roster: Roster, participants: np.ndarray
+) -> TournamentResult:
+    """
+    Knockout bracket seeded in participant order, with byes for the top
+    seeds when the field is not a power of two.
+
+    A draw or an unresolved match sends the higher seed through. Byes
+    score like wins, so standings follow the round each Pokemon reached.
+    """
+    size = len(participants)
+    rounds = max(1, math.ceil(math.log2(size)))
+
+    # Slots holding a seed beyond the field are byes
+    alive = [
+        seed if seed < size else None
+        for seed in bracket_order(2**rounds)
+    ]
+    byes = np.zeros(size, dtype=np.int64)
+    match_round, match_a, match_b, match_margin = [], [], [], []
+
+    for round_no in range(1, rounds + 1):
+        pairs = [
+            (alive[slot], alive[slot + 1])
+            for slot in range(0, len(alive), 2)
+        ]
+        played = [
+            (a, b) for a, b in pairs if a is not None and b is not None
+        ]
+        for a, b in pairs:
+            if a is None or b is None:
+                byes[a if b is None else b] += 1
+
+        pair_a = np.array([each[0] for each in played], dtype=np.int64)
+        pair_b = np.array([each[1] for each in played], dtype=np.int64)
+        outcome = pair_margins(
+            roster, participants[pair_a], participants[pair_b]
+        )
+        winners = {
+            (a, b): (
+                b if margin < 0 else a if margin > 0 else min(a, b)
+            )
+            for a, b, margin in zip(
+                pair_a.tolist(), pair_b.tolist(), outcome.tolist()
+            )
+        }
+
+        alive = [
+            (
+                winners[(a, b)]
+                if a is not None and b is not None
+                else a if b is None else b
+            )
+            for a, b in pairs
+        ]
+
+        match_round.append(
+            np.full(len(played), round_no, dtype=np.int64)
+        )
+        match_a.append(pair_a)
+        match_b.append(pair_b)
+        match_margin.append(outcome)
+
+    return TournamentResult(
+        participants=participants,
+        rounds=rounds,
+        match_round=np.concatenate(match_round),
+        match_a=np.concatenate(match_a),
+        match_b=np.concatenate(match_b),
+        match_margin=np.concatenate(match_margin),
+        byes=byes,
+    )
+
+
+def run_tournament(
+    roster: Roster,
+    tournament_format: str,
+    participants: Optional[List[str]] = None,
+    rounds: Optional[int] = None,
+    chunk_size: int = 256,
+    workers: int = 1,
+) -> TournamentResult:
+    """
+    Play a tournament under the classic battle rules.
+
+    Parameters:
+    roster (Roster): The roster to take stats from.
+    tournament_format (str): One of FORMATS.
+    participants (Optional[List[str]]): Pokemon names, in seed order; the whole roster when omitted.
+    rounds (Optional[int]): Number of Swiss rounds.
+    chunk_size (int): Participants per vectorized round-robin chunk.
+    workers (int): Processes resolving round-robin chunks.
+
+    Returns:
+    TournamentResult: The matches and standings.
+    """
+    if tournament_format not in FORMATS:
+        raise ValueError(
+            f"Unknown tournament format: {tournament_format}"
+        )
+
+    if participants is None:
+        rows = np.arange(len(roster), dtype=np.int64)
+    else:
+        rows = np.array(
+            [roster.lookup(name) for name in participants], dtype=object
+        )
+        if any(row is None for row in rows):
+            raise ValueError("One or more Pokemon not found.")
+        rows = rows.astype(np.int64)
+
+    if len(rows) < 2:
+        raise ValueError("A tournament needs at least two Pokemon.")
+    if len(np.unique(rows)) != len(rows):
+        raise ValueError("A Pokemon can enter a tournament only once.")
+
+    if tournament_format == "round_robin":
+        return round_robin(roster, rows, chunk_size, workers)
+    elif tournament_format == "swiss":
+        return swiss(roster, rows, rounds)
+    return single_elimination(roster, rows)
@@ -1,21 +1,100 @@
+from django.conf import settings
 from django.urls import path
-from pokemon.views import PokemonAPIView, BattleAPIView
+from pokemon.views import (
+    PokemonAPIView,
+    BattleAPIView,
+    BattleBatchAPIView,
+    BattleExportAPIView,
+    LeaderboardAPIView,
+    MatchupAPIView,
+    ProfileAPIView,
+    SimulationAPIView,
+    StatsAPIView,
+    TournamentAPIView,
+)
+from pokemon.streaming import battle_status_stream
 
+if settings.ASYNC_VIEWS:
+    from pokemon import async_views
+
+    pokemon_list_view = async_views.pokemon_list
+    battle_view = async_views.create_battle
+    battle_status_view = async_views.battle_status
+    battle_export_view = async_views.battle_export
+else:
+    pokemon_list_view = PokemonAPIView.as_view()
+    battle_view = battle_status_view = BattleAPIView.as_view()
+    battle_export_view = BattleExportAPIView.as_view()
 
 urlpatterns = [
     path(
         "list",
-        PokemonAPIView.as_view(),
+        pokemon_list_view,
         name="pokemon-list",
     ),
     path(
         "battle",
-        BattleAPIView.as_view(),
+        battle_view,
         name="perform-battle",
     ),
+    path(
+        "battle/batch",
+        BattleBatchAPIView.as_view(),
+        name="perform-battle-batch",
+    ),
+    path(
+        "battle/export",
+        battle_export_view,
+        name="battle-export",
+    ),
     path(
         "battle/<str:battle_id>",
-        BattleAPIView.as_view(),
+        battle_status_view,
         name="battle-status",
     ),
+    path(
+        "battle/<str:battle_id>/stream",
+        battle_status_stream,
+        name="battle-status-stream",
+    ),
+    path(
+        "simulate",
+        SimulationAPIView.as_view(),
+        name="simulate-battles",
+    ),
+    path(
+        "leaderboard",
+        LeaderboardAPIView.as_view(),
+        name="leaderboard",
+    ),
+    path(
+        "stats",
+        StatsAPIView.as_view(),
+        name="process-stats",
+    ),
+    path(
+        "profiles/<str:request_id>",
+        ProfileAPIView.as_view(),
+        name="request-profile",
+    ),
+    path(
+        "tournament",
+        TournamentAPIView.as_view(),
+        name="run-tournament",
+    ),
+    path(
+        "tournament/<str:tournament_id>",
+        TournamentAPIView.as_view(),
+        name="tournament-standings",
+    ),
+    path(
+        "<str:name>/counters",
+        MatchupAPIView.as_view(relation="counters"),
+        name="pokemon-counters",
+    ),
+    path(
+        "<str:name>/targets",
+        MatchupAPIView.as_view(relation="targets"),
+        name="pokemon-targets",
+    ),
 ]
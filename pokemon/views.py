@@ -1,24 +1,100 @@
+import base64
 import logging
+import math
+import secrets
+import time
 import uuid
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
+import numpy as np
 from celery import shared_task
 from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
 from rest_framework import status
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.versioning import NamespaceVersioning
 from rest_framework.views import APIView
-from sqlalchemy import case
+from sqlalchemy import (
+    and_,
+    bindparam,
+    case,
+    false,
+    insert,
+    or_,
+    update,
+)
 
 from battle_simulator.utils import custom_exceptions as ce
 from battle_simulator.utils.custom_validator import CustomValidator
+from battle_simulator.utils.db_pool import pool_metrics
+from battle_simulator.utils.http_cache import (
+    cache_headers,
+    conditional,
+    etag_matches,
+    not_modified,
+)
+from battle_simulator.utils.idempotency import (
+    idempotent,
+    join_inflight,
+    leave_inflight,
+)
+from battle_simulator.utils.metrics import observe_queue_wait, stage
+from battle_simulator.utils.profiling import (
+    fetch_profile,
+    has_profile_token,
+)
 from battle_simulator.utils.data_formatter import (
     result_list_to_dict,
     result_row_to_dict,
 )
-from pokemon.models import Battle, Pokemon
-from pokemon.spell_checker import spell_checker
+from battle_simulator.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+)
+from battle_simulator.utils.uuid7 import uuid7
+from pokemon.models import (
+    Battle,
+    Pokemon,
+    Tournament,
+    TournamentMatch,
+    TournamentStanding,
+)
+from pokemon.engines import ENGINES, get_engine, summarize
+from pokemon.exports import (
+    EXPORT_FORMATS,
+    iter_battle_export,
+    parse_export_params,
+)
+from pokemon.battle_cache import (
+    cache_battle_status,
+    cache_battle_statuses,
+    get_cached_battle_status,
+    invalidate_battle_status,
+)
+from pokemon.leaderboard import (
+    LEADERBOARD_KEYS,
+    pokemon_standing,
+    record_battle_results,
+    top_pokemon,
+)
+from pokemon.list_snapshot import (
+    PokemonListSnapshot,
+    dump,
+    get_list_snapshot,
+    json_object,
+)
+from pokemon.matchups import get_matchup_table
+from pokemon.outcome_cache import outcome_cache
+from pokemon.roster import Roster, get_roster
+from pokemon.spell_checker import get_spell_checker
+from pokemon.tournaments import (
+    FORMATS,
+    TournamentResult,
+    run_tournament,
+)
 
 # Get an instance of logger
 logger = logging.getLogger("pokemon")
@@ -29,6 +105,9 @@ c_validator = CustomValidator({}, allow_unknown=True)
 # Create DB Session
 session = settings.DB_SESSION
 
+# Statuses a battle never leaves once its result is known
+FINISHED_BATTLE_STATUSES = ("BATTLE_COMPLETED", "DRAW")
+
 
 class VersioningConfig(NamespaceVersioning):
     default_version = "v1"
@@ -44,6 +123,13 @@ class PokemonAPIView(APIView):
     versioning_class = VersioningConfig
     permission_classes = (AllowAny,)
 
+    @method_decorator(
+        conditional(
+            lambda request: pokemon_list_etag(request),
+            public=True,
+            max_age=settings.POKEMON_LIST_MAX_AGE,
+        )
+    )
     def get(self, request):
         """
         Method: GET
@@ -53,18 +139,85 @@ class PokemonAPIView(APIView):
         name (str): Name of the Pokemon (optional).
         page (int): Page number for pagination (optional).
         limit (int): Limit of items per page (optional).
+        cursor (str): Opaque cursor for keyset pagination, empty for the first page (optional).
 
         Returns:
         json: A list of Pokemon or a single Pokemon if the name is provided.
         """
         try:
-            # Handling pagination
-            page = int(request.query_params.get("page", 1))
             limit = int(request.query_params.get("limit", 10))
-            offset = (page - 1) * limit
 
             # Filter Pokemon by name if provided
             pokemon_name = request.query_params.get("name")
+
+            # Keyset pagination when a cursor (even an empty one) is given
+            if "cursor" in request.query_params:
+                after = decode_cursor(request.query_params["cursor"])
+                if after and len(after) != 3:
+                    raise ce.ValidationFailed(
+                        {"message": "Invalid cursor"}
+                    )
+
+                if settings.POKEMON_LIST_SNAPSHOT:
+                    snapshot = get_list_snapshot(load_list_snapshot)
+                    snapshot_page = snapshot.after(
+                        pokemon_name, after, limit
+                    )
+
+                    # Cursors from an older roster fall through to SQL
+                    if snapshot_page is not None:
+                        positions, has_next = snapshot_page
+                        next_cursor = (
+                            encode_cursor(snapshot.keys[positions[-1]])
+                            if has_next and positions
+                            else None
+                        )
+                        return HttpResponse(
+                            json_object(
+                                next_cursor=dump(next_cursor),
+                                has_next=dump(has_next),
+                                data=snapshot.render(positions),
+                            ),
+                            content_type="application/json",
+                        )
+
+                pokemon, next_key = query_pokemon_after(
+                    name=pokemon_name, limit=limit, after=after
+                )
+
+                return Response(
+                    {
+                        "next_cursor": (
+                            encode_cursor(next_key)
+                            if next_key
+                            else None
+                        ),
+                        "has_next": True if next_key else False,
+                        "data": pokemon,
+                    },
+                    status=status.HTTP_200_OK,
+                )
+
+            # Handling pagination
+            page = int(request.query_params.get("page", 1))
+            offset = (page - 1) * limit
+
+            if settings.POKEMON_LIST_SNAPSHOT:
+                snapshot = get_list_snapshot(load_list_snapshot)
+                positions, has_next = snapshot.page(
+                    pokemon_name, offset, limit
+                )
+
+                return HttpResponse(
+                    json_object(
+                        page=dump(page),
+                        has_next=dump(has_next),
+                        has_prev=dump(page != 1),
+                        data=snapshot.render(positions),
+                    ),
+                    content_type="application/json",
+                )
+
             pokemon = query_pokemon(
                 name=pokemon_name, limit=limit + 1, offset=offset
             )
@@ -84,6 +237,9 @@ class PokemonAPIView(APIView):
                 status=status.HTTP_200_OK,
             )
 
+        except ce.ValidationFailed as vf:
+            logger.error(f"POKEMON API VIEW - GET : {vf}")
+            raise
         except Exception as e:
             logger.error(f"POKEMON API VIEW - GET : {e}")
             raise ce.InternalServerError
@@ -109,6 +265,12 @@ class BattleAPIView(APIView):
         json: Status of the battle (BATTLE_INPROGRESS, BATTLE_COMPLETED, BATTLE_FAILED).
         """
         try:
+            # Finished battles never change: revalidations skip the lookup
+            etag = battle_etag(battle_id)
+            if etag_matches(request, etag):
+                return not_modified(
+                    etag, **finished_battle_cache_control()
+                )
 
             # Fetch the battle record
             battle = get_battle_status(battle_id)
@@ -116,7 +278,11 @@ class BattleAPIView(APIView):
             if not battle:
                 raise ce.NotFound({"message": "Battle not found"})
 
-            return Response({"data": battle}, status=status.HTTP_200_OK)
+            return battle_cache_headers(
+                Response({"data": battle}, status=status.HTTP_200_OK),
+                battle_id,
+                battle,
+            )
 
         except ce.ValidationFailed as vf:
             logger.error(f"BATTLE API VIEW - GET : {vf}")
@@ -128,17 +294,26 @@ class BattleAPIView(APIView):
             logger.error(f"BATTLE API VIEW - GET : {e}")
             raise ce.InternalServerError
 
+    @method_decorator(idempotent("battle"))
     def post(self, request):
         """
         Method: POST
         Initiates a new battle between two Pokemon.
         -------
+        Headers:
+        Idempotency-Key (str): Retries with the same key get the first response back (optional).
+        -------
+        Query Parameters:
+        inline (bool): Resolve the battle within the request (optional, defaults to BATTLE_INLINE_RESOLUTION).
+        -------
         Request Data:
         - pokemon_a (str): Name of Pokemon A.
         - pokemon_b (str): Name of Pokemon B.
+        - engine (str): Battle engine, classic or turn_based (optional, defaults to BATTLE_ENGINE).
+        - seed (int): Seed of the engine's random numbers (optional).
 
         Returns:
-        json: UUID battle ID to track the battle status.
+        json: UUID battle ID to track the battle status, along with the result when resolved inline.
         """
         try:
             data = request.data
@@ -153,34 +328,107 @@ class BattleAPIView(APIView):
                     }
                 )
 
-            pokemon_a = spell_checker.check_spelling(pokemon_a)
-            pokemon_b = spell_checker.check_spelling(pokemon_b)
+            engine, seed = validate_engine(data)
 
-            if not query_pokemon(pokemon_a) or not query_pokemon(
-                pokemon_b
-            ):
+            with stage("battle_post", "spell_check"):
+                spell_checker = get_spell_checker()
+                pokemon_a = spell_checker.check_spelling(pokemon_a)
+                pokemon_b = spell_checker.check_spelling(pokemon_b)
+
+            with stage("battle_post", "db_fetch"):
+                roster = get_roster()
+                known = (
+                    roster.lookup(pokemon_a) is not None
+                    and roster.lookup(pokemon_b) is not None
+                )
+            if not known:
                 raise ce.NotFound(
                     {"message": "One or both Pokemon not found"}
                 )
 
-            battle_id = uuid.uuid4()
-            insert_battle(
-                battle_id=battle_id,
-                pokemon_a=pokemon_a,
-                pokemon_b=pokemon_b,
-                status="BATTLE_INPROGRESS",
+            battle_id = uuid7()
+
+            inline = request.query_params.get("inline")
+            inline = (
+                settings.BATTLE_INLINE_RESOLUTION
+                if inline is None
+                else inline.lower() in ("1", "true")
             )
+            if inline:
+                # Resolve now and store the finished battle in one insert
+                try:
+                    with stage("battle_post", "compute"):
+                        outcome = resolve_battle(
+                            pokemon_a,
+                            pokemon_b,
+                            engine=engine,
+                            seed=seed,
+                        )
+                except ValueError as e:
+                    logger.error(f"BATTLE API VIEW - POST : {e}")
+                    outcome = {
+                        "status": "BATTLE_FAILED",
+                        "winner_name": None,
+                        "won_by_margin": None,
+                    }
 
-            # Initiate battle in the background (asynchronous task)
-            battle = perform_battle_task.apply_async(
-                kwargs={
-                    "battle_id": battle_id,
-                    "pokemon_a": pokemon_a,
-                    "pokemon_b": pokemon_b,
-                }
+                with stage("battle_post", "insert_battle"):
+                    inserted = insert_battle(
+                        battle_id=battle_id,
+                        pokemon_a=pokemon_a,
+                        pokemon_b=pokemon_b,
+                        **outcome,
+                    )
+                if not inserted:
+                    raise ce.InternalServerError
+
+                return Response(
+                    {
+                        "battle_id": battle_id,
+                        "data": format_battle_status(outcome),
+                    },
+                    status=status.HTTP_200_OK,
+                )
+
+            # Join the identical battle already queued, if any
+            inflight = inflight_battle_key(
+                pokemon_a, pokemon_b, engine, seed
             )
+            if inflight:
+                with stage("battle_post", "join_inflight"):
+                    joined = join_inflight(
+                        "battle", inflight, str(battle_id)
+                    )
+                if joined:
+                    return Response(
+                        {"battle_id": joined},
+                        status=status.HTTP_202_ACCEPTED,
+                    )
+
+            with stage("battle_post", "insert_battle"):
+                insert_battle(
+                    battle_id=battle_id,
+                    pokemon_a=pokemon_a,
+                    pokemon_b=pokemon_b,
+                    status="BATTLE_INPROGRESS",
+                )
+
+            # Initiate battle in the background (asynchronous task)
+            with stage("battle_post", "enqueue"):
+                battle = perform_battle_task.apply_async(
+                    kwargs={
+                        "battle_id": battle_id,
+                        "pokemon_a": pokemon_a,
+                        "pokemon_b": pokemon_b,
+                        "engine": engine,
+                        "seed": seed,
+                        "enqueued_at": time.time(),
+                    }
+                )
 
             if not battle:
+                if inflight:
+                    leave_inflight("battle", inflight, str(battle_id))
                 return Response(
                     {"message": "Failed to create Battle"},
                     status=status.HTTP_400_BAD_REQUEST,
@@ -204,192 +452,1197 @@ class BattleAPIView(APIView):
             raise ce.InternalServerError
 
 
-def get_battle_status(battle_id: uuid.UUID) -> Union[dict, None]:
+class BattleBatchAPIView(APIView):
+    """
+    Handles submitting many Pokemon battles in one request.
     """
-    Retrieves the current status of a battle based on its battle ID.
 
-    Parameters:
-    battle_id (UUID): Unique identifier for the battle.
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
 
-    Returns:
-    Union[dict, None]: A dictionary containing the battle status and results, or None if the battle isn't found.
-    """
-    try:
-        battle = fetch_battle_by_id(battle_id)
+    def post(self, request):
+        """
+        Method: POST
+        Initiates a batch of battles, resolved in chunks by background tasks.
+        -------
+        Request Data:
+        - battles (list): Objects with pokemon_a (str) and pokemon_b (str).
+        - engine (str): Battle engine, classic or turn_based (optional, defaults to BATTLE_ENGINE).
+        - seed (int): Seed of the engine's random numbers (optional).
 
-        if not battle:
-            raise ValueError("Battle not found.")
-
-        if battle["status"] == "BATTLE_INPROGRESS":
-            return {"status": "BATTLE_INPROGRESS", "result": None}
-        elif battle["status"] == "BATTLE_COMPLETED":
-            return {
-                "status": "BATTLE_COMPLETED",
-                "result": {
-                    "winnerName": battle["winner_name"],
-                    "wonByMargin": battle["won_by_margin"],
+        Returns:
+        json: UUID battle IDs, in the order the battles were submitted.
+        """
+        try:
+            validator = CustomValidator(
+                {
+                    "battles": {
+                        "type": "list",
+                        "required": True,
+                        "minlength": 1,
+                        "maxlength": settings.BATTLE_BATCH_MAX_SIZE,
+                        "schema": {
+                            "type": "dict",
+                            "schema": {
+                                "pokemon_a": {
+                                    "type": "string",
+                                    "required": True,
+                                    "empty": False,
+                                },
+                                "pokemon_b": {
+                                    "type": "string",
+                                    "required": True,
+                                    "empty": False,
+                                },
+                            },
+                        },
+                    }
                 },
-            }
-        elif battle.status == "BATTLE_FAILED":
-            return {"status": "BATTLE_FAILED", "result": None}
+                allow_unknown=True,
+            )
+            if not validator.validate(request.data):
+                raise ce.ValidationFailed(
+                    {
+                        "message": "Invalid battles",
+                        "data": validator.errors,
+                    }
+                )
 
-    except Exception as e:
-        logger.error(f"GET BATTLE STATUS : {e}")
-        return None
+            battles = request.data["battles"]
+            engine, seed = validate_engine(request.data)
+
+            # Spell check every distinct name once
+            names = {}
+            invalid_names = []
+            spell_checker = get_spell_checker()
+            for each in battles:
+                for name in (each["pokemon_a"], each["pokemon_b"]):
+                    if name in names or name in invalid_names:
+                        continue
+                    try:
+                        names[name] = spell_checker.check_spelling(name)
+                    except ce.InvalidPokemon:
+                        invalid_names.append(name)
+
+            if invalid_names:
+                raise ce.InvalidPokemon(
+                    {
+                        "message": "Pokémon names are not recognized.",
+                        "data": invalid_names,
+                    }
+                )
 
+            roster = get_roster()
+            if any(
+                roster.lookup(name) is None for name in names.values()
+            ):
+                raise ce.NotFound(
+                    {"message": "One or more Pokemon not found"}
+                )
 
-def insert_battle(
-    battle_id: uuid.UUID,
-    pokemon_a: str,
-    pokemon_b: str,
-    status: str,
-    winner_name: Optional[str] = None,
-    won_by_margin: Optional[float] = None,
-) -> Optional[Battle]:
-    """
-    Insert a new battle into the database.
+            rows = [
+                {
+                    "battle_id": str(uuid7()),
+                    "pokemon_a": names[each["pokemon_a"]],
+                    "pokemon_b": names[each["pokemon_b"]],
+                    "status": "BATTLE_INPROGRESS",
+                }
+                for each in battles
+            ]
+
+            if not insert_battles(rows):
+                raise ce.InternalServerError
+
+            # Initiate the battles in the background, one task per chunk
+            chunk_size = settings.BATTLE_BATCH_CHUNK_SIZE
+            for start in range(0, len(rows), chunk_size):
+                perform_battle_batch_task.apply_async(
+                    kwargs={
+                        "battles": [
+                            [
+                                row["battle_id"],
+                                row["pokemon_a"],
+                                row["pokemon_b"],
+                            ]
+                            for row in rows[start : start + chunk_size]
+                        ],
+                        "engine": engine,
+                        # One stream of random numbers per chunk
+                        "seed": None if seed is None else [seed, start],
+                        "enqueued_at": time.time(),
+                    }
+                )
 
-    Parameters:
-    pokemon_a (str): The name of the first Pokemon.
-    pokemon_b (str): The name of the second Pokemon.
-    status (str): The status of the battle (e.g., BATTLE_INPROGRESS, BATTLE_COMPLETED).
-    winner_name (Optional[str]): The name of the winning Pokemon, if any.
-    won_by_margin (Optional[float]): The margin by which the Pokemon won, if applicable.
+            return Response(
+                {"battle_ids": [row["battle_id"] for row in rows]},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        except ce.InvalidPokemon as ip:
+            logger.error(f"BATTLE BATCH API VIEW - POST : {ip}")
+            raise
+        except ce.ValidationFailed as vf:
+            logger.error(f"BATTLE BATCH API VIEW - POST : {vf}")
+            raise
+        except ce.NotFound as nf:
+            logger.error(f"BATTLE BATCH API VIEW - POST : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"BATTLE BATCH API VIEW - POST : {e}")
+            raise ce.InternalServerError
 
-    Returns:
-    Optional[Battle]: The created Battle object or None if the creation failed.
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    """
+    Leaves the export format to the view's ?format= parameter, which DRF
+    would otherwise read as a renderer override; errors render as JSON.
     """
-    try:
-        battle = Battle(
-            battle_id=battle_id,
-            pokemon_a=pokemon_a,
-            pokemon_b=pokemon_b,
-            status=status,
-            winner_name=winner_name,
-            won_by_margin=won_by_margin,
-        )
-        session.add(battle)
-        session.commit()
 
-    except Exception as e:
-        logger.error("INSERT BATTLE: {}".format(e))
-        session.rollback()
-        battle = None
+    def select_parser(self, request, parsers):
+        return parsers[0]
 
-    return battle
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
 
 
-def query_pokemon(
-    name: Optional[str] = None,
-    limit: Optional[int] = None,
-    offset: Optional[int] = None,
-) -> Union[List[dict], None]:
+class BattleExportAPIView(APIView):
     """
-    Query Pokemon data based on filters like name, type1, and type2.
-
-    Parameters:
-    name (Optional[str]): The name of the Pokemon to filter by.
-    type1 (Optional[str]): The primary type to filter Pokemon.
-    type2 (Optional[str]): The secondary type to filter Pokemon.
-    limit (Optional[int]): The maximum number of records to return.
-    offset (Optional[int]): The number of records to skip before starting to return results.
-
-    Returns:
-    Union[List[dict], None]: A list of Pokemon matching the query or None if no Pokemon are found.
+    Handles exporting the battle history.
     """
-    try:
-        query = session.query(
-            Pokemon.name,
-            Pokemon.type1,
-            Pokemon.type2,
-            Pokemon.attack,
-            Pokemon.hp,
-            case(
-                [(Pokemon.is_legendary == 1, "Legendary")],
-                else_="Normal",
-            ).label("Category"),
-        ).order_by(Pokemon.is_legendary.desc(), Pokemon.attack.desc())
-
-        if name:
-            query = query.filter(Pokemon.name.contains(name))
-
-        if offset is not None and limit is not None:
-            query = query.limit(limit).offset(offset)
 
-        pokemon = query.all()
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
+    content_negotiation_class = ExportContentNegotiation
 
-        session.commit()
+    def get(self, request):
+        """
+        Method: GET
+        Streams the battles, oldest first, as NDJSON or CSV.
+        -------
+        Query Parameters:
+        format (str): ndjson or csv (optional, defaults to ndjson).
+        status (str): Only battles with this status (optional).
+        created_from (str): Only battles created at or after this ISO 8601 date or datetime (optional).
+        created_to (str): Only battles created before this ISO 8601 date or datetime (optional).
 
-        pokemon = result_list_to_dict(pokemon) if pokemon else None
+        Returns:
+        stream: One JSON object or CSV record per battle, read from the database in chunks.
+        """
+        try:
+            params = parse_export_params(request.query_params)
+            export_format = params["export_format"]
 
-    except Exception as e:
-        logger.error(f"QUERY POKEMON: {e}")
-        pokemon = None
+            response = StreamingHttpResponse(
+                iter_battle_export(**params),
+                content_type=EXPORT_FORMATS[export_format],
+            )
+            response["Content-Disposition"] = (
+                f'attachment; filename="battles.{export_format}"'
+            )
+            return response
 
-    return pokemon
+        except ce.ValidationFailed as vf:
+            logger.error(f"BATTLE EXPORT API VIEW - GET : {vf}")
+            raise
+        except Exception as e:
+            logger.error(f"BATTLE EXPORT API VIEW - GET : {e}")
+            raise ce.InternalServerError
 
 
-def fetch_battle_by_id(battle_id: uuid.UUID) -> Optional[dict]:
+class SimulationAPIView(APIView):
     """
-    Retrieve the details of a battle based on its battle ID.
-
-    This function queries the database to find the battle record with the specified battle ID.
-
-    Returns:
-    Optional[dict]: A dictionary containing battle details if a matching record is found; otherwise, None.
+    Handles simulating many battles between two Pokemon.
     """
-    try:
-        query = (
-            session.query(
-                Battle.battle_id,
-                Battle.pokemon_a,
-                Battle.pokemon_b,
-                Battle.status,
-                Battle.winner_name,
-                Battle.won_by_margin,
-            )
-            .filter(Battle.battle_id == battle_id)
-            .first()
-        )
 
-        session.commit()
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
 
-        battle_details = result_row_to_dict(query) if query else None
+    def post(self, request):
+        """
+        Method: POST
+        Plays many independent battles between two Pokemon and summarizes them.
+        -------
+        Request Data:
+        - pokemon_a (str): Name of Pokemon A.
+        - pokemon_b (str): Name of Pokemon B.
+        - engine (str): Battle engine, classic or turn_based (optional, defaults to BATTLE_ENGINE).
+        - trials (int): Number of battles (optional, defaults to SIMULATION_DEFAULT_TRIALS).
+        - seed (int): Seed of the engine's random numbers (optional, returned when omitted).
 
-    except Exception as e:
-        logger.error(f"FETCH BATTLE BY ID: {e}")
-        battle_details = None
+        Returns:
+        json: Win probability of each side and the distribution of margins, from pokemon_a's side.
+        """
+        try:
+            validator = CustomValidator(
+                {
+                    "pokemon_a": {
+                        "type": "string",
+                        "required": True,
+                        "empty": False,
+                    },
+                    "pokemon_b": {
+                        "type": "string",
+                        "required": True,
+                        "empty": False,
+                    },
+                    "trials": {
+                        "type": "integer",
+                        "nullable": True,
+                        "min": 1,
+                        "max": settings.SIMULATION_MAX_TRIALS,
+                    },
+                },
+                allow_unknown=True,
+            )
+            if not validator.validate(request.data):
+                raise ce.ValidationFailed(
+                    {
+                        "message": "Invalid simulation",
+                        "data": validator.errors,
+                    }
+                )
 
-    return battle_details
+            engine, seed = validate_engine(request.data)
+            if seed is None:
+                seed = secrets.randbits(32)
+            trials = (
+                request.data.get("trials")
+                or settings.SIMULATION_DEFAULT_TRIALS
+            )
 
+            spell_checker = get_spell_checker()
+            pokemon_a = spell_checker.check_spelling(
+                request.data["pokemon_a"]
+            )
+            pokemon_b = spell_checker.check_spelling(
+                request.data["pokemon_b"]
+            )
 
-def get_pokemon_data(name: str):
-    """Fetch Pokemon data from the database."""
-    try:
-        return (
-            session.query(Pokemon)
-            .filter(Pokemon.name == name)
-            .one_or_none()
-        )
-    except Exception as e:
-        logger.error(f"Error fetching Pokemon data for {name}: {e}")
-        return None
+            roster = get_roster()
+            index_a = roster.lookup(pokemon_a)
+            index_b = roster.lookup(pokemon_b)
+            if index_a is None or index_b is None:
+                raise ce.NotFound(
+                    {"message": "One or both Pokemon not found"}
+                )
 
+            margins = get_engine(engine).margins(
+                roster,
+                np.array([index_a]),
+                np.array([index_b]),
+                trials=trials,
+                rng=np.random.default_rng(seed),
+            )[0]
 
-def update_battle(
-    battle_id: str,
-    status: Optional[str] = None,
-    winner_name: Optional[str] = None,
-    won_by_margin: Optional[float] = None,
-) -> Optional[Battle]:
-    """
-    Update details of a battle in the database.
+            if np.isnan(margins).any():
+                raise ce.ValidationFailed(
+                    {
+                        "message": "One or both Pokemon have incomplete stats"
+                    }
+                )
+
+            return Response(
+                {
+                    "data": {
+                        "pokemon_a": pokemon_a,
+                        "pokemon_b": pokemon_b,
+                        "engine": engine,
+                        "trials": trials,
+                        "seed": seed,
+                        **summarize(margins),
+                    }
+                },
+                status=status.HTTP_200_OK,
+            )
+        except ce.InvalidPokemon as ip:
+            logger.error(f"SIMULATION API VIEW - POST : {ip}")
+            raise
+        except ce.ValidationFailed as vf:
+            logger.error(f"SIMULATION API VIEW - POST : {vf}")
+            raise
+        except ce.NotFound as nf:
+            logger.error(f"SIMULATION API VIEW - POST : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"SIMULATION API VIEW - POST : {e}")
+            raise ce.InternalServerError
+
+
+class MatchupAPIView(APIView):
+    """
+    Handles ranking the best counters or targets of a Pokemon.
+    """
+
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
+
+    # "counters" (who beats the Pokemon) or "targets" (who it beats)
+    relation = "counters"
+
+    def get(self, request, name):
+        """
+        Method: GET
+        Retrieves the Pokemon winning a classic battle against (counters) or losing to (targets) a Pokemon, by the largest margin.
+        -------
+        Query Parameters:
+        name (str): Name of the Pokemon.
+        k (int): Number of Pokemon to return (optional, defaults to 10).
+        type1 (str): Only Pokemon of this primary type (optional).
+        generation (int): Only Pokemon of this generation (optional).
+        is_legendary (bool): Only legendary or only non-legendary Pokemon (optional).
+
+        Returns:
+        json: Up to k Pokemon with the margin of their win, best first.
+        """
+        try:
+            params = request.query_params
+            try:
+                k = int(params.get("k", 10))
+                generation = (
+                    int(params["generation"])
+                    if params.get("generation")
+                    else None
+                )
+            except ValueError:
+                raise ce.ValidationFailed(
+                    {"message": "k and generation must be integers"}
+                )
+            if k < 1:
+                raise ce.ValidationFailed(
+                    {"message": "k must be a positive integer"}
+                )
+
+            roster = get_roster()
+            row = roster.lookup(
+                get_spell_checker().check_spelling(name)
+            )
+            if row is None:
+                raise ce.NotFound({"message": "Pokemon not found"})
+
+            mask = np.ones(len(roster), dtype=bool)
+            if params.get("type1"):
+                type1 = params["type1"].lower()
+                mask &= np.array(
+                    [
+                        (each or "").lower() == type1
+                        for each in roster.type1
+                    ]
+                )
+            if generation is not None:
+                mask &= roster.generation == generation
+            if params.get("is_legendary"):
+                mask &= (roster.is_legendary == 1) == (
+                    params["is_legendary"].lower() in ("1", "true")
+                )
+
+            table = get_matchup_table()
+            ranked = getattr(table, self.relation)(row, k, mask)
+
+            return Response(
+                {
+                    "name": roster.names[row],
+                    "data": [
+                        {
+                            "name": roster.names[index],
+                            "type1": roster.type1[index],
+                            "type2": roster.type2[index],
+                            "generation": int(roster.generation[index]),
+                            "Category": (
+                                "Legendary"
+                                if roster.is_legendary[index] == 1
+                                else "Normal"
+                            ),
+                            "wonByMargin": margin,
+                        }
+                        for index, margin in ranked
+                    ],
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        except ce.InvalidPokemon as ip:
+            logger.error(f"MATCHUP API VIEW - GET : {ip}")
+            raise
+        except ce.ValidationFailed as vf:
+            logger.error(f"MATCHUP API VIEW - GET : {vf}")
+            raise
+        except ce.NotFound as nf:
+            logger.error(f"MATCHUP API VIEW - GET : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"MATCHUP API VIEW - GET : {e}")
+            raise ce.InternalServerError
+
+
+class LeaderboardAPIView(APIView):
+    """
+    Handles ranking the Pokemon by their battle record.
+    """
+
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """
+        Method: GET
+        Retrieves the top Pokemon by wins, win rate or mean winning margin, or the record of one Pokemon.
+        -------
+        Query Parameters:
+        by (str): wins, win_rate or margin (optional, defaults to wins).
+        k (int): Number of Pokemon to return (optional, defaults to 10).
+        name (str): Name of a Pokemon, to get its record and ranks instead (optional).
+
+        Returns:
+        json: Up to k Pokemon with their wins, losses, draws, win rate and mean margin, best first.
+        """
+        try:
+            params = request.query_params
+
+            if params.get("name"):
+                standing = pokemon_standing(
+                    get_spell_checker().check_spelling(params["name"])
+                )
+                if not standing:
+                    raise ce.NotFound(
+                        {"message": "Pokemon has no finished battles"}
+                    )
+
+                return Response(
+                    {"data": standing}, status=status.HTTP_200_OK
+                )
+
+            by = params.get("by", "wins")
+            if by not in LEADERBOARD_KEYS:
+                raise ce.ValidationFailed(
+                    {
+                        "message": "by must be one of "
+                        + ", ".join(LEADERBOARD_KEYS)
+                    }
+                )
+            try:
+                k = int(params.get("k", 10))
+            except ValueError:
+                raise ce.ValidationFailed(
+                    {"message": "k must be an integer"}
+                )
+            if k < 1:
+                raise ce.ValidationFailed(
+                    {"message": "k must be a positive integer"}
+                )
+
+            return Response(
+                {"by": by, "data": top_pokemon(by, k)},
+                status=status.HTTP_200_OK,
+            )
+
+        except ce.InvalidPokemon as ip:
+            logger.error(f"LEADERBOARD API VIEW - GET : {ip}")
+            raise
+        except ce.ValidationFailed as vf:
+            logger.error(f"LEADERBOARD API VIEW - GET : {vf}")
+            raise
+        except ce.NotFound as nf:
+            logger.error(f"LEADERBOARD API VIEW - GET : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"LEADERBOARD API VIEW - GET : {e}")
+            raise ce.InternalServerError
+
+
+class StatsAPIView(APIView):
+    """
+    Handles reporting the counters of this process' caches and pools.
+    """
+
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """
+        Method: GET
+        Retrieves the outcome cache and database pool counters of the process serving the request.
+        -------
+
+        Returns:
+        json: outcome_cache (size, hits, misses, evictions, hit_ratio) and db_pool (checkouts, waits, timeouts, pool state).
+        """
+        try:
+            return Response(
+                {
+                    "data": {
+                        "outcome_cache": outcome_cache.snapshot(),
+                        "db_pool": pool_metrics.snapshot(
+                            settings.ENGINE.pool
+                        ),
+                    }
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        except Exception as e:
+            logger.error(f"STATS API VIEW - GET : {e}")
+            raise ce.InternalServerError
+
+
+class ProfileAPIView(APIView):
+    """
+    Handles retrieving the profiles of requests recorded by the profiling
+    middleware.
+    """
+
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
+
+    def get(self, request, request_id):
+        """
+        Method: GET
+        Retrieves the profile of a request by the id returned in its X-Profile-Id header.
+        -------
+        Headers:
+        X-Profile-Token (str): The PROFILING_TOKEN.
+        -------
+        Query Parameters:
+        download (bool): Return the raw cProfile stats, for pstats or snakeviz (optional).
+
+        Returns:
+        json: The request, its duration, SQL statement count and time, and the slowest functions.
+        """
+        try:
+            if not has_profile_token(request):
+                raise ce.InvalidTokenError(
+                    {"message": "Invalid profiling token"}
+                )
+
+            profile = fetch_profile(request_id)
+            if not profile:
+                raise ce.NotFound({"message": "Profile not found"})
+
+            raw = profile.pop("pstats")
+            if request.query_params.get("download", "").lower() in (
+                "1",
+                "true",
+            ):
+                response = HttpResponse(
+                    base64.b64decode(raw),
+                    content_type="application/octet-stream",
+                )
+                response["Content-Disposition"] = (
+                    f'attachment; filename="{request_id}.prof"'
+                )
+                return response
+
+            return Response(
+                {"data": profile}, status=status.HTTP_200_OK
+            )
+
+        except ce.InvalidTokenError as it:
+            logger.error(f"PROFILE API VIEW - GET : {it}")
+            raise
+        except ce.NotFound as nf:
+            logger.error(f"PROFILE API VIEW - GET : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"PROFILE API VIEW - GET : {e}")
+            raise ce.InternalServerError
+
+
+class TournamentAPIView(APIView):
+    """
+    Handles running tournaments over the Pokemon roster.
+    """
+
+    versioning_class = VersioningConfig
+    permission_classes = (AllowAny,)
+
+    def get(self, request, tournament_id):
+        """
+        Method: GET
+        Retrieves a tournament and a page of its standings.
+        -------
+        Query Parameters:
+        tournament_id (UUID): Unique identifier of the tournament.
+        page (int): Page number for the standings (optional).
+        limit (int): Limit of standings per page (optional).
+
+        Returns:
+        json: Status of the tournament (TOURNAMENT_INPROGRESS, TOURNAMENT_COMPLETED, TOURNAMENT_FAILED) and its standings by rank.
+        """
+        try:
+            limit = int(request.query_params.get("limit", 10))
+            page = int(request.query_params.get("page", 1))
+
+            tournament = fetch_tournament_by_id(tournament_id)
+
+            if not tournament:
+                raise ce.NotFound({"message": "Tournament not found"})
+
+            standings = query_tournament_standings(
+                tournament_id=tournament_id,
+                limit=limit + 1,
+                offset=(page - 1) * limit,
+            )
+
+            tournament["standings"] = (
+                standings[:limit] if standings else None
+            )
+
+            return Response(
+                {
+                    "page": page,
+                    "has_next": (
+                        True
+                        if standings and len(standings) > limit
+                        else False
+                    ),
+                    "has_prev": False if page == 1 else True,
+                    "data": tournament,
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        except ce.NotFound as nf:
+            logger.error(f"TOURNAMENT API VIEW - GET : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"TOURNAMENT API VIEW - GET : {e}")
+            raise ce.InternalServerError
+
+    def post(self, request):
+        """
+        Method: POST
+        Starts a tournament, played by a background task.
+        -------
+        Request Data:
+        - format (str): round_robin, swiss or single_elimination.
+        - participants (list): Pokemon names in seed order (optional, defaults to every Pokemon).
+        - rounds (int): Number of rounds of a swiss tournament (optional).
+
+        Returns:
+        json: UUID tournament ID to track the tournament.
+        """
+        try:
+            validator = CustomValidator(
+                {
+                    "format": {
+                        "type": "string",
+                        "required": True,
+                        "allowed": list(FORMATS),
+                    },
+                    "participants": {
+                        "type": "list",
+                        "nullable": True,
+                        "minlength": 2,
+                        "schema": {"type": "string", "empty": False},
+                    },
+                    "rounds": {
+                        "type": "integer",
+                        "nullable": True,
+                        "min": 1,
+                    },
+                },
+                allow_unknown=True,
+            )
+            if not validator.validate(request.data):
+                raise ce.ValidationFailed(
+                    {
+                        "message": "Invalid tournament",
+                        "data": validator.errors,
+                    }
+                )
+
+            tournament_format = request.data["format"]
+            participants = request.data.get("participants")
+
+            roster = get_roster()
+            if participants:
+                # Spell check every name, keeping the first entry of each
+                names = []
+                invalid_names = []
+                spell_checker = get_spell_checker()
+                for name in participants:
+                    try:
+                        name = spell_checker.check_spelling(name)
+                    except ce.InvalidPokemon:
+                        invalid_names.append(name)
+                        continue
+                    if name not in names:
+                        names.append(name)
+
+                if invalid_names:
+                    raise ce.InvalidPokemon(
+                        {
+                            "message": "Pokémon names are not recognized.",
+                            "data": invalid_names,
+                        }
+                    )
+
+                if any(roster.lookup(name) is None for name in names):
+                    raise ce.NotFound(
+                        {"message": "One or more Pokemon not found"}
+                    )
+
+                if len(names) < 2:
+                    raise ce.ValidationFailed(
+                        {
+                            "message": "A tournament needs at least two Pokemon"
+                        }
+                    )
+
+                participants = names
+
+            tournament_id = str(uuid.uuid4())
+
+            if not insert_tournament(
+                tournament_id=tournament_id,
+                tournament_format=tournament_format,
+                participants=(
+                    len(participants) if participants else len(roster)
+                ),
+            ):
+                raise ce.InternalServerError
+
+            # Play the tournament in the background (asynchronous task)
+            run_tournament_task.apply_async(
+                kwargs={
+                    "tournament_id": tournament_id,
+                    "format": tournament_format,
+                    "participants": participants,
+                    "rounds": request.data.get("rounds"),
+                }
+            )
+
+            return Response(
+                {"tournament_id": tournament_id},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        except ce.InvalidPokemon as ip:
+            logger.error(f"TOURNAMENT API VIEW - POST : {ip}")
+            raise
+        except ce.ValidationFailed as vf:
+            logger.error(f"TOURNAMENT API VIEW - POST : {vf}")
+            raise
+        except ce.NotFound as nf:
+            logger.error(f"TOURNAMENT API VIEW - POST : {nf}")
+            raise
+        except Exception as e:
+            logger.error(f"TOURNAMENT API VIEW - POST : {e}")
+            raise ce.InternalServerError
+
+
+def get_battle_status(battle_id: uuid.UUID) -> Union[dict, None]:
+    """
+    Retrieves the current status of a battle based on its battle ID.
+
+    Parameters:
+    battle_id (UUID): Unique identifier for the battle.
+
+    Returns:
+    Union[dict, None]: A dictionary containing the battle status and results, or None if the battle isn't found.
+    """
+    try:
+        # Read through the Redis cache, filling it on a miss
+        battle = get_cached_battle_status(battle_id)
+
+        if not battle:
+            battle = fetch_battle_by_id(battle_id)
+
+            if not battle:
+                raise ValueError("Battle not found.")
+
+            cache_battle_status(
+                battle_id,
+                status=battle["status"],
+                winner_name=battle["winner_name"],
+                won_by_margin=battle["won_by_margin"],
+                only_if_missing=True,
+            )
+
+        return format_battle_status(battle)
+
+    except Exception as e:
+        logger.error(f"GET BATTLE STATUS : {e}")
+        return None
+
+
+def format_battle_status(battle: dict) -> Union[dict, None]:
+    """
+    Shape a battle's status, winner_name and won_by_margin for the API.
+
+    Returns:
+    Union[dict, None]: The status and result, or None for an unknown status.
+    """
+    if battle["status"] == "BATTLE_INPROGRESS":
+        return {"status": "BATTLE_INPROGRESS", "result": None}
+    elif battle["status"] == "BATTLE_COMPLETED":
+        return {
+            "status": "BATTLE_COMPLETED",
+            "result": {
+                "winnerName": battle["winner_name"],
+                "wonByMargin": battle["won_by_margin"],
+            },
+        }
+    elif battle["status"] == "DRAW":
+        return {
+            "status": "DRAW",
+            "result": {"winnerName": None, "wonByMargin": 0},
+        }
+    elif battle["status"] == "BATTLE_FAILED":
+        return {"status": "BATTLE_FAILED", "result": None}
+
+
+def pokemon_list_etag(request) -> Optional[str]:
+    """
+    ETag of the Pokemon list: the version of the roster this process
+    serves, read from memory between version checks. None if unknown.
+    """
+    try:
+        return list_etag(get_roster().version)
+    except Exception as e:
+        logger.error(f"POKEMON LIST ETAG: {e}")
+        return None
+
+
+def list_etag(version: Optional[str]) -> Optional[str]:
+    """ETag shared by every list page of a roster version."""
+    return (
+        f'W/"pokemon-list-{version}"' if version is not None else None
+    )
+
+
+def battle_etag(battle_id) -> str:
+    """ETag of a battle, only ever sent once it is finished."""
+    return f'W/"battle-{battle_id}"'
+
+
+def finished_battle_cache_control() -> dict:
+    return {
+        "public": True,
+        "max_age": settings.FINISHED_BATTLE_MAX_AGE,
+        "immutable": True,
+    }
+
+
+def battle_cache_headers(response, battle_id, battle: dict):
+    """
+    Let clients and CDNs keep finished battles for good; battles still in
+    progress (or failed) are always fetched again.
+    """
+    if battle["status"] in FINISHED_BATTLE_STATUSES:
+        return cache_headers(
+            response,
+            battle_etag(battle_id),
+            **finished_battle_cache_control(),
+        )
+    return cache_headers(response, no_cache=True)
+
+
+def insert_battle(
+    battle_id: uuid.UUID,
+    pokemon_a: str,
+    pokemon_b: str,
+    status: str,
+    winner_name: Optional[str] = None,
+    won_by_margin: Optional[float] = None,
+) -> Optional[Battle]:
+    """
+    Insert a new battle into the database.
+
+    Parameters:
+    pokemon_a (str): The name of the first Pokemon.
+    pokemon_b (str): The name of the second Pokemon.
+    status (str): The status of the battle (e.g., BATTLE_INPROGRESS, BATTLE_COMPLETED).
+    winner_name (Optional[str]): The name of the winning Pokemon, if any.
+    won_by_margin (Optional[float]): The margin by which the Pokemon won, if applicable.
+
+    Returns:
+    Optional[Battle]: The created Battle object or None if the creation failed.
+    """
+    try:
+        battle = Battle(
+            battle_id=battle_id,
+            pokemon_a=pokemon_a,
+            pokemon_b=pokemon_b,
+            status=status,
+            winner_name=winner_name,
+            won_by_margin=won_by_margin,
+        )
+        session.add(battle)
+        session.commit()
+
+        cache_battle_status(
+            battle_id,
+            status=status,
+            winner_name=winner_name,
+            won_by_margin=won_by_margin,
+        )
+        record_battle_results(
+            [
+                {
+                    "battle_id": battle_id,
+                    "pokemon_a": pokemon_a,
+                    "pokemon_b": pokemon_b,
+                    "status": status,
+                    "winner_name": winner_name,
+                    "won_by_margin": won_by_margin,
+                }
+            ]
+        )
+
+    except Exception as e:
+        logger.error("INSERT BATTLE: {}".format(e))
+        session.rollback()
+        battle = None
+
+    return battle
+
+
+def insert_battles(battles: List[dict]) -> Optional[int]:
+    """
+    Insert many battles with a single multi-row INSERT.
+
+    Parameters:
+    battles (List[dict]): Battle rows with battle_id, pokemon_a, pokemon_b and status.
+
+    Returns:
+    Optional[int]: The number of inserted battles or None if the insert failed.
+    """
+    try:
+        session.execute(insert(Battle).values(battles))
+        session.commit()
+
+        cache_battle_statuses(battles)
+
+        inserted = len(battles)
+
+    except Exception as e:
+        logger.error("INSERT BATTLES: {}".format(e))
+        session.rollback()
+        inserted = None
+
+    return inserted
+
+
+def pokemon_list_query(name: Optional[str] = None):
+    """
+    Build the Pokemon list projection, ordered legendary first, then by
+    attack, with name as a unique tie-breaker.
+
+    The ordering matches the idx_pokemon_listing index.
+    """
+    query = session.query(
+        Pokemon.name,
+        Pokemon.type1,
+        Pokemon.type2,
+        Pokemon.attack,
+        Pokemon.hp,
+        case(
+            [(Pokemon.is_legendary == 1, "Legendary")],
+            else_="Normal",
+        ).label("Category"),
+    ).order_by(
+        Pokemon.is_legendary.desc(),
+        Pokemon.attack.desc(),
+        Pokemon.name.asc(),
+    )
+
+    if name:
+        # A literal substring, as in the list snapshot: % and _ are
+        # escaped rather than LIKE wildcards
+        query = query.filter(
+            Pokemon.name.contains(name, autoescape=True)
+        )
+
+    return query
+
+
+def descending_after(column, value):
+    """
+    Filter keeping the rows that follow ``value`` on a column sorted in
+    descending order, where NULLs sort last (as in MySQL and SQLite).
+    """
+    if value is None:
+        return false()
+    return or_(column < value, column.is_(None))
+
+
+def equal_to(column, value):
+    """``column == value``, matching NULL when ``value`` is None."""
+    return column.is_(None) if value is None else column == value
+
+
+def pokemon_list_after(after: list):
+    """
+    Filter keeping the rows of the Pokemon list that follow the sort key
+    [is_legendary, attack, name] of a row. Either number may be NULL.
+    """
+    is_legendary, attack, last_name = after
+
+    return or_(
+        descending_after(Pokemon.is_legendary, is_legendary),
+        and_(
+            equal_to(Pokemon.is_legendary, is_legendary),
+            descending_after(Pokemon.attack, attack),
+        ),
+        and_(
+            equal_to(Pokemon.is_legendary, is_legendary),
+            equal_to(Pokemon.attack, attack),
+            Pokemon.name > last_name,
+        ),
+    )
+
+
+def query_pokemon(
+    name: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Union[List[dict], None]:
+    """
+    Query Pokemon data based on filters like name, type1, and type2.
+
+    Parameters:
+    name (Optional[str]): The name of the Pokemon to filter by.
+    type1 (Optional[str]): The primary type to filter Pokemon.
+    type2 (Optional[str]): The secondary type to filter Pokemon.
+    limit (Optional[int]): The maximum number of records to return.
+    offset (Optional[int]): The number of records to skip before starting to return results.
+
+    Returns:
+    Union[List[dict], None]: A list of Pokemon matching the query or None if no Pokemon are found.
+    """
+    try:
+        query = pokemon_list_query(name)
+
+        if offset is not None and limit is not None:
+            query = query.limit(limit).offset(offset)
+
+        pokemon = query.all()
+
+        session.commit()
+
+        pokemon = result_list_to_dict(pokemon) if pokemon else None
+
+    except Exception as e:
+        logger.error(f"QUERY POKEMON: {e}")
+        pokemon = None
+
+    return pokemon
+
+
+def query_pokemon_after(
+    name: Optional[str] = None,
+    limit: int = 10,
+    after: Optional[list] = None,
+) -> Tuple[Optional[List[dict]], Optional[list]]:
+    """
+    Keyset pagination over the Pokemon list: seeks past the sort key of the
+    previous page instead of skipping rows, so every page costs the same.
+
+    Parameters:
+    name (Optional[str]): The name of the Pokemon to filter by.
+    limit (int): The maximum number of records to return.
+    after (Optional[list]): Sort key [is_legendary, attack, name] of the last row already returned.
+
+    Returns:
+    Tuple[Optional[List[dict]], Optional[list]]: The page of Pokemon (None if empty) and the sort key of its last row if more rows follow.
+    """
+    try:
+        query = pokemon_list_query(name).add_columns(
+            Pokemon.is_legendary
+        )
+
+        if after:
+            query = query.filter(pokemon_list_after(after))
+
+        rows = query.limit(limit + 1).all()
+
+        session.commit()
+
+        next_key = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_key = [last.is_legendary, last.attack, last.name]
+
+        pokemon = result_list_to_dict(rows[:limit]) or None
+        for each in pokemon or []:
+            del each["is_legendary"]
+
+    except Exception as e:
+        logger.error(f"QUERY POKEMON AFTER: {e}")
+        pokemon, next_key = None, None
+
+    return pokemon, next_key
+
+
+def load_list_snapshot(
+    version: Optional[str] = None,
+) -> PokemonListSnapshot:
+    """
+    Load the whole Pokemon list, in list order, into an in-memory snapshot.
+
+    Parameters:
+    version (Optional[str]): The roster version the snapshot is built for.
+
+    Returns:
+    PokemonListSnapshot: The pre-ordered, pre-serialized Pokemon list.
+    """
+    rows = pokemon_list_query().add_columns(Pokemon.is_legendary).all()
+
+    session.commit()
+
+    return PokemonListSnapshot(rows, version)
+
+
+def fetch_battle_by_id(battle_id: uuid.UUID) -> Optional[dict]:
+    """
+    Retrieve the details of a battle based on its battle ID.
+
+    This function queries the database to find the battle record with the specified battle ID.
+
+    Returns:
+    Optional[dict]: A dictionary containing battle details if a matching record is found; otherwise, None.
+    """
+    try:
+        query = (
+            session.query(
+                Battle.battle_id,
+                Battle.pokemon_a,
+                Battle.pokemon_b,
+                Battle.status,
+                Battle.winner_name,
+                Battle.won_by_margin,
+            )
+            .filter(Battle.battle_id == battle_id)
+            .first()
+        )
+
+        session.commit()
+
+        battle_details = result_row_to_dict(query) if query else None
+
+    except Exception as e:
+        logger.error(f"FETCH BATTLE BY ID: {e}")
+        battle_details = None
+
+    return battle_details
+
+
+def update_battle(
+    battle_id: str,
+    status: Optional[str] = None,
+    winner_name: Optional[str] = None,
+    won_by_margin: Optional[float] = None,
+    pokemon_a: Optional[str] = None,
+    pokemon_b: Optional[str] = None,
+) -> Optional[Battle]:
+    """
+    Update details of a battle in the database.
 
     Parameters:
     battle_id (str): The unique ID of the battle to update.
     status (Optional[str]): The new status of the battle (e.g., BATTLE_INPROGRESS, BATTLE_COMPLETED).
     winner_name (Optional[str]): The new winner's name, if applicable.
     won_by_margin (Optional[float]): The new margin by which the Pokemon won, if applicable.
+    pokemon_a (Optional[str]): The first Pokemon, to count a finished battle on the leaderboard.
+    pokemon_b (Optional[str]): The second Pokemon, to count a finished battle on the leaderboard.
 
     Returns:
     Optional[Battle]: The updated Battle object or None if the update failed.
@@ -412,6 +1665,29 @@ def update_battle(
 
         session.commit()
 
+        # Write the new status through to the cache
+        if updated_record and status is not None:
+            cache_battle_status(
+                battle_id,
+                status=status,
+                winner_name=winner_name,
+                won_by_margin=won_by_margin,
+            )
+            record_battle_results(
+                [
+                    {
+                        "battle_id": battle_id,
+                        "pokemon_a": pokemon_a,
+                        "pokemon_b": pokemon_b,
+                        "status": status,
+                        "winner_name": winner_name,
+                        "won_by_margin": won_by_margin,
+                    }
+                ]
+            )
+        elif updated_record:
+            invalidate_battle_status(battle_id)
+
     except Exception as e:
         logger.error("UPDATE BATTLE ERROR: {}".format(e))
         session.rollback()
@@ -420,81 +1696,547 @@ def update_battle(
     return updated_record
 
 
-@shared_task(bind=True, queue="perform_battle_queue")
-def perform_battle_task(self, **kwargs) -> Optional[Battle]:
+def update_battles(battles: List[dict]) -> int:
     """
-    Perform a battle between two Pokemon and update the Battle table.
+    Update the outcome of many battles in a single executemany round-trip.
 
     Parameters:
-    battle_id (uuid): The unique battle perform id.
-    pokemon_a (str): The name of the first Pokemon.
-    pokemon_b (str): The name of the second Pokemon.
+    battles (List[dict]): Rows with battle_id, status, winner_name and won_by_margin, and the pokemon_a and pokemon_b counted on the leaderboard.
 
     Returns:
-    Optional[Battle]: The updated Battle object or None if the operation failed.
+    int: The number of updated battles, 0 if the update failed.
+    """
+    try:
+        statement = (
+            update(Battle)
+            .where(Battle.battle_id == bindparam("b_battle_id"))
+            .values(
+                status=bindparam("b_status"),
+                winner_name=bindparam("b_winner_name"),
+                won_by_margin=bindparam("b_won_by_margin"),
+            )
+        )
+        session.execute(
+            statement,
+            [
+                {
+                    f"b_{key}": each.get(key)
+                    for key in (
+                        "battle_id",
+                        "status",
+                        "winner_name",
+                        "won_by_margin",
+                    )
+                }
+                for each in battles
+            ],
+        )
+
+        session.commit()
+
+        cache_battle_statuses(battles)
+        record_battle_results(battles)
+
+        updated_records = len(battles)
+
+    except Exception as e:
+        logger.error("UPDATE BATTLES ERROR: {}".format(e))
+        session.rollback()
+        updated_records = 0
+
+    return updated_records
+
+
+def insert_tournament(
+    tournament_id: str,
+    tournament_format: str,
+    participants: int,
+) -> Optional[Tournament]:
+    """
+    Insert a new tournament, in progress, into the database.
+
+    Parameters:
+    tournament_id (str): The unique ID of the tournament.
+    tournament_format (str): round_robin, swiss or single_elimination.
+    participants (int): The number of Pokemon taking part.
+
+    Returns:
+    Optional[Tournament]: The created Tournament object or None if the creation failed.
+    """
+    try:
+        tournament = Tournament(
+            tournament_id=tournament_id,
+            format=tournament_format,
+            status="TOURNAMENT_INPROGRESS",
+            participants=participants,
+        )
+        session.add(tournament)
+        session.commit()
+
+    except Exception as e:
+        logger.error(f"INSERT TOURNAMENT: {e}")
+        session.rollback()
+        tournament = None
+
+    return tournament
+
+
+def update_tournament(tournament_id: str, **values) -> int:
     """
+    Update columns of a tournament.
 
+    Returns:
+    int: The number of updated tournaments, 0 if the update failed.
+    """
     try:
-        battle_id = kwargs.get("battle_id")
-        pokemon_a = kwargs.get("pokemon_a")
-        pokemon_b = kwargs.get("pokemon_b")
+        updated_record = (
+            session.query(Tournament)
+            .filter(Tournament.tournament_id == tournament_id)
+            .update(values)
+        )
 
-        # Fetch Pokemon data
-        poke_a = get_pokemon_data(pokemon_a)
-        poke_b = get_pokemon_data(pokemon_b)
+        session.commit()
 
-        if not poke_a or not poke_b:
-            raise ValueError(
-                "One or both Pokemon not found in the database."
+    except Exception as e:
+        logger.error(f"UPDATE TOURNAMENT: {e}")
+        session.rollback()
+        updated_record = 0
+
+    return updated_record
+
+
+def tournament_match_rows(
+    tournament_id: str, roster: Roster, result: TournamentResult
+) -> List[dict]:
+    """Rows of tournament_match for every match of a result."""
+    names = [roster.names[row] for row in result.participants.tolist()]
+
+    rows = []
+    for match_no, (round_no, a, b, margin) in enumerate(
+        zip(
+            result.match_round.tolist(),
+            result.match_a.tolist(),
+            result.match_b.tolist(),
+            result.match_margin.tolist(),
+        ),
+        start=1,
+    ):
+        if margin > 0:
+            outcome = ("BATTLE_COMPLETED", names[a], margin)
+        elif margin < 0:
+            outcome = ("BATTLE_COMPLETED", names[b], -margin)
+        elif margin == 0:
+            outcome = ("DRAW", None, 0)
+        else:
+            outcome = ("BATTLE_FAILED", None, None)
+
+        rows.append(
+            {
+                "tournament_id": tournament_id,
+                "match_no": match_no,
+                "round": round_no,
+                "pokemon_a": names[a],
+                "pokemon_b": names[b],
+                "status": outcome[0],
+                "winner_name": outcome[1],
+                "won_by_margin": outcome[2],
+            }
+        )
+
+    return rows
+
+
+def tournament_standing_rows(
+    tournament_id: str, roster: Roster, result: TournamentResult
+) -> List[dict]:
+    """Rows of tournament_standing, by rank, for a result."""
+    standings = result.standings()
+    rows = result.participants[standings["order"]].tolist()
+
+    return [
+        {
+            "tournament_id": tournament_id,
+            "rank": rank,
+            "pokemon_name": roster.names[row],
+            "played": played,
+            "wins": wins,
+            "draws": draws,
+            "losses": losses,
+            "points": points,
+            "margin": margin,
+        }
+        for rank, (
+            row,
+            played,
+            wins,
+            draws,
+            losses,
+            points,
+            margin,
+        ) in (
+            enumerate(
+                zip(
+                    rows,
+                    standings["played"].tolist(),
+                    standings["wins"].tolist(),
+                    standings["draws"].tolist(),
+                    standings["losses"].tolist(),
+                    standings["points"].tolist(),
+                    standings["margin"].tolist(),
+                ),
+                start=1,
             )
+        )
+    ]
+
+
+def save_tournament_results(
+    tournament_id: str, roster: Roster, result: TournamentResult
+) -> bool:
+    """
+    Write the matches and standings of a tournament in bulk and mark it
+    completed, all in one transaction.
+
+    Parameters:
+    tournament_id (str): The unique ID of the tournament.
+    roster (Roster): The roster the tournament was played on.
+    result (TournamentResult): The matches and standings.
+
+    Returns:
+    bool: True if the results were written.
+    """
+    try:
+        chunk_size = settings.TOURNAMENT_INSERT_CHUNK_SIZE
+
+        matches = tournament_match_rows(tournament_id, roster, result)
+        for start in range(0, len(matches), chunk_size):
+            session.execute(
+                insert(TournamentMatch),
+                matches[start : start + chunk_size],
+            )
+
+        standings = tournament_standing_rows(
+            tournament_id, roster, result
+        )
+        for start in range(0, len(standings), chunk_size):
+            session.execute(
+                insert(TournamentStanding),
+                standings[start : start + chunk_size],
+            )
+
+        session.query(Tournament).filter(
+            Tournament.tournament_id == tournament_id
+        ).update(
+            {
+                "status": "TOURNAMENT_COMPLETED",
+                "participants": len(result.participants),
+                "rounds": result.rounds,
+                "winner_name": standings[0]["pokemon_name"],
+            }
+        )
+
+        session.commit()
+
+        saved = True
+
+    except Exception as e:
+        logger.error(f"SAVE TOURNAMENT RESULTS: {e}")
+        session.rollback()
+        saved = False
+
+    return saved
+
+
+def fetch_tournament_by_id(tournament_id: str) -> Optional[dict]:
+    """
+    Retrieve the details of a tournament based on its tournament ID.
+
+    Returns:
+    Optional[dict]: A dictionary containing tournament details if a matching record is found; otherwise, None.
+    """
+    try:
+        query = (
+            session.query(
+                Tournament.tournament_id,
+                Tournament.format,
+                Tournament.status,
+                Tournament.participants,
+                Tournament.rounds,
+                Tournament.winner_name,
+            )
+            .filter(Tournament.tournament_id == tournament_id)
+            .first()
+        )
+
+        session.commit()
+
+        tournament = result_row_to_dict(query) if query else None
+
+    except Exception as e:
+        logger.error(f"FETCH TOURNAMENT BY ID: {e}")
+        tournament = None
+
+    return tournament
+
+
+def query_tournament_standings(
+    tournament_id: str,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Union[List[dict], None]:
+    """
+    Query the standings of a tournament by rank.
+
+    Parameters:
+    tournament_id (str): The unique ID of the tournament.
+    limit (Optional[int]): The maximum number of records to return.
+    offset (Optional[int]): The number of records to skip before starting to return results.
+
+    Returns:
+    Union[List[dict], None]: The standings or None if there are none.
+    """
+    try:
+        query = (
+            session.query(
+                TournamentStanding.rank,
+                TournamentStanding.pokemon_name,
+                TournamentStanding.played,
+                TournamentStanding.wins,
+                TournamentStanding.draws,
+                TournamentStanding.losses,
+                TournamentStanding.points,
+                TournamentStanding.margin,
+            )
+            .filter(TournamentStanding.tournament_id == tournament_id)
+            .order_by(TournamentStanding.rank)
+        )
+
+        if offset is not None and limit is not None:
+            query = query.limit(limit).offset(offset)
 
-        # Extract required data
-        type1_a, type2_a, attack_a = (
-            poke_a.type1,
-            poke_a.type2,
-            poke_a.attack,
+        standings = query.all()
+
+        session.commit()
+
+        standings = (
+            result_list_to_dict(standings) if standings else None
         )
-        type1_b, type2_b, attack_b = (
-            poke_b.type1,
-            poke_b.type2,
-            poke_b.attack,
+
+    except Exception as e:
+        logger.error(f"QUERY TOURNAMENT STANDINGS: {e}")
+        standings = None
+
+    return standings
+
+
+def validate_engine(data: dict) -> Tuple[str, Optional[int]]:
+    """
+    Read the optional engine and seed of a battle request.
+
+    Parameters:
+    data (dict): The request data.
+
+    Returns:
+    Tuple[str, Optional[int]]: The engine name (BATTLE_ENGINE when omitted) and the seed, if any.
+    """
+    engine = data.get("engine") or settings.BATTLE_ENGINE
+    seed = data.get("seed")
+
+    if engine not in ENGINES:
+        raise ce.ValidationFailed(
+            {
+                "message": "Unknown battle engine",
+                "data": list(ENGINES),
+            }
         )
 
-        against_type1_b = getattr(poke_b, f"against_{type1_a}", 1)
-        against_type2_b = getattr(poke_b, f"against_{type2_a}", 1)
-        damage_a = (attack_a / 200) * 100 - (
-            ((against_type1_b / 4) * 100)
-            + ((against_type2_b / 4) * 100)
+    if seed is not None and (
+        isinstance(seed, bool) or not isinstance(seed, int) or seed < 0
+    ):
+        raise ce.ValidationFailed(
+            {"message": "seed must be a non-negative integer"}
         )
 
-        against_type1_a = getattr(poke_a, f"against_{type1_b}", 1)
-        against_type2_a = getattr(poke_a, f"against_{type2_b}", 1)
-        damage_b = (attack_b / 200) * 100 - (
-            ((against_type1_a / 4) * 100)
-            + ((against_type2_a / 4) * 100)
+    return engine, seed
+
+
+def inflight_battle_key(
+    pokemon_a: str, pokemon_b: str, engine: str, seed: Optional[int]
+) -> Optional[str]:
+    """
+    Name a queued battle by its pairing, engine and seed, for identical
+    submissions to join it while it runs (see join_inflight()).
+
+    Returns:
+    Optional[str]: The key, None for an unseeded non-classic battle, whose outcome is a fresh draw every time.
+    """
+    if engine != "classic" and seed is None:
+        return None
+    return f"{pokemon_a}:{pokemon_b}:{engine}:{seed}"
+
+
+def resolve_battle(
+    pokemon_a: str,
+    pokemon_b: str,
+    engine: str = "classic",
+    seed: Optional[int] = None,
+) -> dict:
+    """
+    Resolve a battle, from the precomputed matchup table for the classic
+    engine.
+
+    Seeded turn_based outcomes, the deterministic ones worth keeping, are
+    memoized per roster version in the process' outcome cache. Classic
+    outcomes are not: the matchup table holds every pair's outcome
+    already, so its O(1) lookup replaces memoizing them.
+
+    Parameters:
+    pokemon_a (str): The name of the first Pokemon.
+    pokemon_b (str): The name of the second Pokemon.
+    engine (str): The battle engine.
+    seed (Optional[int]): Seed of the engine's random numbers.
+
+    Returns:
+    dict: The status, winner_name and won_by_margin to store on the Battle.
+    """
+    key = None
+    if engine != "classic" and seed is not None:
+        key = (get_roster().version, engine, pokemon_a, pokemon_b, seed)
+        outcome = outcome_cache.get(key)
+        if outcome is not None:
+            return dict(outcome)
+
+    if engine == "classic":
+        winner_name, won_by_margin = get_matchup_table().resolve(
+            pokemon_a, pokemon_b
         )
+    else:
+        outcome = resolve_battles(
+            [pokemon_a], [pokemon_b], engine=engine, seed=seed
+        )[0]
+
+        if outcome is None:
+            raise ValueError(
+                "One or both Pokemon not found or have incomplete stats."
+            )
+
+        winner_name, won_by_margin = outcome
+
+    outcome = {
+        "status": "BATTLE_COMPLETED" if winner_name else "DRAW",
+        "winner_name": winner_name,
+        "won_by_margin": won_by_margin,
+    }
 
-        # Determine the winner
-        winner_name = None
-        won_by_margin = None
-        if damage_a > damage_b:
-            winner_name = pokemon_a
-            won_by_margin = damage_a - damage_b
-        elif damage_b > damage_a:
-            winner_name = pokemon_b
-            won_by_margin = damage_b - damage_a
+    if key is not None:
+        outcome_cache.put(key, outcome)
+
+    return dict(outcome)
+
+
+def resolve_battles(
+    pokemon_a: List[str],
+    pokemon_b: List[str],
+    engine: str = "classic",
+    seed: Optional[Union[int, List[int]]] = None,
+) -> List[Optional[Tuple[Optional[str], float]]]:
+    """
+    Resolve many battles with one vectorized pass of an engine.
+
+    Parameters:
+    pokemon_a (List[str]): The names of the first Pokemon.
+    pokemon_b (List[str]): The names of the second Pokemon.
+    engine (str): The battle engine.
+    seed (Optional[Union[int, List[int]]]): Seed of the engine's random numbers.
+
+    Returns:
+    List[Optional[Tuple[Optional[str], float]]]: The winner (None on a draw) and margin of every battle, None for battles that cannot be resolved.
+    """
+    if engine == "classic":
+        return get_matchup_table().resolve_many(pokemon_a, pokemon_b)
+
+    roster = get_roster()
+    index_a = np.array(
+        [roster.index.get(name.lower(), -1) for name in pokemon_a],
+        dtype=np.intp,
+    )
+    index_b = np.array(
+        [roster.index.get(name.lower(), -1) for name in pokemon_b],
+        dtype=np.intp,
+    )
+    known = (index_a >= 0) & (index_b >= 0)
+
+    margins = np.full(len(index_a), np.nan)
+    margins[known] = get_engine(engine).margins(
+        roster,
+        index_a[known],
+        index_b[known],
+        rng=np.random.default_rng(seed),
+    )[:, 0]
+
+    outcomes = []
+    for name_a, name_b, margin in zip(
+        pokemon_a, pokemon_b, margins.tolist()
+    ):
+        if math.isnan(margin):
+            outcomes.append(None)
+        elif margin > 0:
+            outcomes.append((name_a, margin))
+        elif margin < 0:
+            outcomes.append((name_b, -margin))
         else:
-            # If it's a draw
-            winner_name = None
-            won_by_margin = 0
+            outcomes.append((None, 0))
+
+    return outcomes
+
+
+@shared_task(bind=True, queue="perform_battle_queue")
+def perform_battle_task(self, **kwargs) -> Optional[Battle]:
+    """
+    Perform a battle between two Pokemon and update the Battle table.
+
+    Parameters:
+    battle_id (uuid): The unique battle perform id.
+    pokemon_a (str): The name of the first Pokemon.
+    pokemon_b (str): The name of the second Pokemon.
+    engine (str): The battle engine (optional, classic).
+    seed (Optional[int]): Seed of the engine's random numbers.
+    enqueued_at (Optional[float]): time.time() when the task was enqueued.
+
+    Returns:
+    Optional[Battle]: The updated Battle object or None if the operation failed.
+    """
+    observe_queue_wait("perform_battle_task", kwargs.get("enqueued_at"))
+
+    try:
+        battle_id = kwargs.get("battle_id")
+        pokemon_a = kwargs.get("pokemon_a")
+        pokemon_b = kwargs.get("pokemon_b")
+        engine = kwargs.get("engine") or "classic"
+
+        # Loads the roster and matchup table if this process has none yet
+        with stage("perform_battle_task", "db_fetch"):
+            if engine == "classic":
+                get_matchup_table()
+            else:
+                get_roster()
+
+        with stage("perform_battle_task", "compute"):
+            outcome = resolve_battle(
+                pokemon_a,
+                pokemon_b,
+                engine=engine,
+                seed=kwargs.get("seed"),
+            )
 
         # Create or update the Battle record
-        update_battle(
-            battle_id=battle_id,
-            status="BATTLE_COMPLETED" if winner_name else "DRAW",
-            winner_name=winner_name,
-            won_by_margin=won_by_margin,
-        )
+        with stage("perform_battle_task", "update_battle"):
+            update_battle(
+                battle_id=battle_id,
+                pokemon_a=pokemon_a,
+                pokemon_b=pokemon_b,
+                **outcome,
+            )
 
     except ValueError as e:
         logger.error("PERFORM BATTLE: {}".format(e))
@@ -504,3 +2246,148 @@ def perform_battle_task(self, **kwargs) -> Optional[Battle]:
         logger.error("PERFORM BATTLE: {}".format(e))
         update_battle(battle_id=battle_id, status="BATTLE_FAILED")
         return None
+    finally:
+        # Later identical submissions start a battle of their own
+        inflight = inflight_battle_key(
+            kwargs.get("pokemon_a"),
+            kwargs.get("pokemon_b"),
+            kwargs.get("engine") or "classic",
+            kwargs.get("seed"),
+        )
+        if inflight:
+            leave_inflight(
+                "battle", inflight, str(kwargs.get("battle_id"))
+            )
+
+
+@shared_task(bind=True, queue="perform_battle_queue")
+def perform_battle_batch_task(self, **kwargs) -> int:
+    """
+    Perform a chunk of battles in one vectorized pass and update them in bulk.
+
+    Parameters:
+    battles (list): [battle_id, pokemon_a, pokemon_b] triples.
+    engine (str): The battle engine (optional, classic).
+    seed (Optional[list]): Seed of the engine's random numbers.
+    enqueued_at (Optional[float]): time.time() when the task was enqueued.
+
+    Returns:
+    int: The number of updated battles.
+    """
+    observe_queue_wait(
+        "perform_battle_batch_task", kwargs.get("enqueued_at")
+    )
+    battles = kwargs.get("battles") or []
+
+    try:
+        with stage("perform_battle_batch_task", "compute"):
+            outcomes = resolve_battles(
+                [each[1] for each in battles],
+                [each[2] for each in battles],
+                engine=kwargs.get("engine") or "classic",
+                seed=kwargs.get("seed"),
+            )
+    except Exception as e:
+        logger.error("PERFORM BATTLE BATCH: {}".format(e))
+        outcomes = [None] * len(battles)
+
+    results = []
+    for (battle_id, pokemon_a, pokemon_b), outcome in zip(
+        battles, outcomes
+    ):
+        if outcome is None:
+            results.append(
+                {
+                    "battle_id": battle_id,
+                    "pokemon_a": pokemon_a,
+                    "pokemon_b": pokemon_b,
+                    "status": "BATTLE_FAILED",
+                    "winner_name": None,
+                    "won_by_margin": None,
+                }
+            )
+            continue
+
+        winner_name, won_by_margin = outcome
+        results.append(
+            {
+                "battle_id": battle_id,
+                "pokemon_a": pokemon_a,
+                "pokemon_b": pokemon_b,
+                "status": "BATTLE_COMPLETED" if winner_name else "DRAW",
+                "winner_name": winner_name,
+                "won_by_margin": won_by_margin,
+            }
+        )
+
+    with stage("perform_battle_batch_task", "update_battle"):
+        return update_battles(results)
+
+
+def play_tournament(
+    tournament_id: str,
+    tournament_format: str,
+    participants: Optional[List[str]] = None,
+    rounds: Optional[int] = None,
+    workers: int = 1,
+) -> Optional[TournamentResult]:
+    """
+    Play a tournament on the current roster and store its results.
+
+    Parameters:
+    tournament_id (str): The unique ID of an inserted tournament.
+    tournament_format (str): round_robin, swiss or single_elimination.
+    participants (Optional[List[str]]): Pokemon names in seed order, every Pokemon when omitted.
+    rounds (Optional[int]): Number of rounds of a swiss tournament.
+    workers (int): Processes resolving round-robin chunks.
+
+    Returns:
+    Optional[TournamentResult]: The result, or None if the tournament failed.
+    """
+    try:
+        roster = get_roster()
+        result = run_tournament(
+            roster,
+            tournament_format,
+            participants=participants,
+            rounds=rounds,
+            chunk_size=settings.TOURNAMENT_CHUNK_SIZE,
+            workers=workers,
+        )
+
+        if not save_tournament_results(tournament_id, roster, result):
+            raise ValueError("Tournament results could not be saved.")
+
+    except Exception as e:
+        logger.error(f"PLAY TOURNAMENT: {e}")
+        update_tournament(tournament_id, status="TOURNAMENT_FAILED")
+        return None
+
+    return result
+
+
+@shared_task(bind=True, queue="tournament_queue")
+def run_tournament_task(self, **kwargs) -> Optional[str]:
+    """
+    Play a tournament and store its matches and standings.
+
+    Parameters:
+    tournament_id (str): The unique tournament id.
+    format (str): round_robin, swiss or single_elimination.
+    participants (Optional[list]): Pokemon names in seed order.
+    rounds (Optional[int]): Number of rounds of a swiss tournament.
+
+    Returns:
+    Optional[str]: The tournament id, or None if the tournament failed.
+    """
+    tournament_id = kwargs.get("tournament_id")
+
+    result = play_tournament(
+        tournament_id=tournament_id,
+        tournament_format=kwargs.get("format"),
+        participants=kwargs.get("participants"),
+        rounds=kwargs.get("rounds"),
+        workers=settings.TOURNAMENT_WORKERS,
+    )
+
+    return tournament_id if result else None
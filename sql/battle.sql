@@ -1,7 +1,7 @@
 -- battle_simulator.battle definition
 
 CREATE TABLE `battle` (
-  `battle_id` varchar(36) NOT NULL DEFAULT (uuid()),
+  `battle_id` binary(16) NOT NULL,
   `pokemon_a` varchar(100) DEFAULT NULL,
   `pokemon_b` varchar(100) DEFAULT NULL,
   `status` varchar(50) DEFAULT NULL,
@@ -12,6 +12,7 @@ CREATE TABLE `battle` (
   PRIMARY KEY (`battle_id`),
   KEY `fk_pokemon_a` (`pokemon_a`),
   KEY `fk_pokemon_b` (`pokemon_b`),
+  KEY `idx_battle_created_at` (`created_at`),
   CONSTRAINT `fk_pokemon_a` FOREIGN KEY (`pokemon_a`) REFERENCES `pokemon` (`name`),
   CONSTRAINT `fk_pokemon_b` FOREIGN KEY (`pokemon_b`) REFERENCES `pokemon` (`name`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
\ No newline at end of file
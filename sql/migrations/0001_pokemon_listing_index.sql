@@ -0,0 +1,9 @@
+-- Composite index backing GET /v1/pokemon/list.
+-- Matches ORDER BY is_legendary DESC, attack DESC, name so pages are read
+-- in index order, and lets ?cursor= pages seek straight to their first row.
+
+CREATE INDEX `idx_pokemon_listing`
+  ON `pokemon` (`is_legendary` DESC, `attack` DESC, `name`);
+
+-- Rollback:
+-- DROP INDEX `idx_pokemon_listing` ON `pokemon`;
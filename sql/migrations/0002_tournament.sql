@@ -0,0 +1,46 @@
+-- Tables of the tournament subsystem (POST /v1/pokemon/tournament and
+-- `manage.py run_tournament`), as defined in sql/tournament.sql.
+
+CREATE TABLE `tournament` (
+  `tournament_id` varchar(36) NOT NULL DEFAULT (uuid()),
+  `format` varchar(50) DEFAULT NULL,
+  `status` varchar(50) DEFAULT NULL,
+  `participants` int DEFAULT NULL,
+  `rounds` int DEFAULT NULL,
+  `winner_name` varchar(100) DEFAULT NULL,
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`tournament_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `tournament_match` (
+  `tournament_id` varchar(36) NOT NULL,
+  `match_no` int NOT NULL,
+  `round` int DEFAULT NULL,
+  `pokemon_a` varchar(100) DEFAULT NULL,
+  `pokemon_b` varchar(100) DEFAULT NULL,
+  `status` varchar(50) DEFAULT NULL,
+  `winner_name` varchar(100) DEFAULT NULL,
+  `won_by_margin` float DEFAULT NULL,
+  PRIMARY KEY (`tournament_id`, `match_no`),
+  CONSTRAINT `fk_tournament_match` FOREIGN KEY (`tournament_id`) REFERENCES `tournament` (`tournament_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `tournament_standing` (
+  `tournament_id` varchar(36) NOT NULL,
+  `rank` int NOT NULL,
+  `pokemon_name` varchar(100) DEFAULT NULL,
+  `played` int DEFAULT NULL,
+  `wins` int DEFAULT NULL,
+  `draws` int DEFAULT NULL,
+  `losses` int DEFAULT NULL,
+  `points` float DEFAULT NULL,
+  `margin` float DEFAULT NULL,
+  PRIMARY KEY (`tournament_id`, `rank`),
+  CONSTRAINT `fk_tournament_standing` FOREIGN KEY (`tournament_id`) REFERENCES `tournament` (`tournament_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Rollback:
+-- DROP TABLE `tournament_standing`;
+-- DROP TABLE `tournament_match`;
+-- DROP TABLE `tournament`;
@@ -0,0 +1,9 @@
+-- Index backing GET /v1/pokemon/battle/export and `manage.py
+-- export_battles`: created_at ranges are read in index order, so a
+-- streamed export starts without sorting the battle table first.
+
+CREATE INDEX `idx_battle_created_at`
+  ON `battle` (`created_at`);
+
+-- Rollback:
+-- DROP INDEX `idx_battle_created_at` ON `battle`;
@@ -0,0 +1,31 @@
+-- Store battle_id as BINARY(16) instead of VARCHAR(36).
+-- New battle IDs are time-ordered (UUIDv7), so inserts append to the end
+-- of the clustered index instead of splitting pages at random, and every
+-- secondary index carries a 16-byte key instead of a 36-character one.
+-- Existing IDs are stored without swapping their fields, like the API
+-- stores them, so BIN_TO_UUID() gives back the same strings.
+-- The column has no default: the application supplies every ID, and
+-- uuid()'s UUIDv1 values would be inserted at random positions.
+-- Both ALTERs rebuild the table.
+
+ALTER TABLE `battle`
+  ADD COLUMN `battle_id_bin` binary(16) DEFAULT NULL FIRST;
+
+UPDATE `battle` SET `battle_id_bin` = UUID_TO_BIN(`battle_id`);
+
+ALTER TABLE `battle`
+  DROP PRIMARY KEY,
+  DROP COLUMN `battle_id`,
+  CHANGE COLUMN `battle_id_bin` `battle_id` binary(16) NOT NULL,
+  ADD PRIMARY KEY (`battle_id`);
+
+-- Rollback (BIN_TO_UUID() without the swap flag, as above):
+-- ALTER TABLE `battle`
+--   ADD COLUMN `battle_id_str` varchar(36) DEFAULT NULL FIRST;
+-- UPDATE `battle` SET `battle_id_str` = BIN_TO_UUID(`battle_id`);
+-- ALTER TABLE `battle`
+--   DROP PRIMARY KEY,
+--   DROP COLUMN `battle_id`,
+--   CHANGE COLUMN `battle_id_str` `battle_id` varchar(36) NOT NULL
+--     DEFAULT (uuid()),
+--   ADD PRIMARY KEY (`battle_id`);
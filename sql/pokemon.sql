@@ -42,5 +42,6 @@ CREATE TABLE `pokemon` (
   `weight_kg` float DEFAULT NULL,
   `generation` int DEFAULT NULL,
   `is_legendary` int DEFAULT NULL,
-  PRIMARY KEY (`name`)
+  PRIMARY KEY (`name`),
+  KEY `idx_pokemon_listing` (`is_legendary` DESC,`attack` DESC,`name`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
\ No newline at end of file